@@ -1,6 +1,35 @@
+from http import HTTPStatus
+
+import orjson
+from django.http import HttpRequest
 from ninja import NinjaAPI
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
 
+from config.db_pool import database_pool_stats
 from products.api_ninja import router as products_router
 
-api = NinjaAPI()
+
+class ORJSONRenderer(BaseRenderer):
+    """Serialize responses with orjson (several times faster than json)."""
+
+    media_type = "application/json"
+
+    def render(self, request, data, *, response_status):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportIncompatibleMethodOverride]
+        # Types unknown to orjson (Decimal, pydantic objects...) fall back to
+        # the encoder of the default ninja renderer.
+        return orjson.dumps(data, default=NinjaJSONEncoder().default)
+
+
+api = NinjaAPI(renderer=ORJSONRenderer())
 api.add_router(prefix="/products/", router=products_router)
+
+
+@api.get("/health/db-pool", include_in_schema=False)
+def get_database_pool_stats(request: HttpRequest):
+    """Connection pool statistics of the process serving the request (staff)."""
+    if not request.user.is_staff:
+        return api.create_response(
+            request, {"error": "Staff only"}, status=HTTPStatus.FORBIDDEN
+        )
+    return database_pool_stats()
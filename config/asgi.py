@@ -42,14 +42,34 @@ if settings.DEBUG:
 django_application = get_asgi_application()
 
 # Import websocket application here, so apps from django_application are loaded first
+from asgiref.sync import sync_to_async  # noqa: E402
+
+from config.warmup import warm_up  # noqa: E402
 from config.websocket import websocket_application  # noqa: E402
 
 
+async def lifespan_application(scope, receive, send):
+    """Warm the worker up (config.warmup) before it accepts traffic."""
+    while True:
+        event = await receive()
+
+        if event["type"] == "lifespan.startup":
+            # Blocking steps (database, templates): run in a thread
+            await sync_to_async(warm_up, thread_sensitive=False)()
+            await send({"type": "lifespan.startup.complete"})
+
+        if event["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
 async def application(scope, receive, send):
     if scope["type"] == "http":
         await django_application(scope, receive, send)
     elif scope["type"] == "websocket":
         await websocket_application(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await lifespan_application(scope, receive, send)
     else:
         msg = f"Unknown scope type {scope['type']}"
         raise NotImplementedError(msg)
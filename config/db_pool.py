@@ -0,0 +1,74 @@
+"""
+PostgreSQL connection pool (psycopg 3) of each process.
+
+Without a pool, every request opens (TCP, TLS, authentication, backend fork)
+and closes its own connection. With ``OPTIONS["pool"]``, Django borrows a
+connection from a per-process ``psycopg_pool.ConnectionPool`` and returns it
+at the end of the request.
+
+A pool serves the threads of one process, so it is sized from how many of
+them can hold a connection at once: the concurrent requests of a uvicorn
+worker (``--limit-concurrency``) or the threads of a Celery worker (prefork
+children run one task at a time). Beyond ``max_size``, requests wait for a
+connection, at most ``timeout`` seconds: ``database_pool_stats`` exposes these
+waits and the saturation of the pools.
+"""
+
+from typing import Any
+
+from django.db import connections
+
+
+def database_pool_options(
+    concurrency: int,
+    *,
+    timeout: float = 10.0,
+) -> dict[str, Any]:
+    """
+    ``OPTIONS["pool"]`` of a database, for a process running ``concurrency``
+    threads that use the database.
+    """
+    max_size = max(1, concurrency)
+    return {
+        # Kept open while idle, so that a burst after a quiet period does
+        # not pay the connection setup.
+        "min_size": max(1, max_size // 2),
+        "max_size": max_size,
+        "timeout": timeout,
+        # Idle connections above min_size are closed after 5 minutes, every
+        # connection is renewed after an hour.
+        "max_idle": 300.0,
+        "max_lifetime": 3600.0,
+        # Django passes check=ConnectionPool.check_connection: connections
+        # are health checked before being handed out.
+    }
+
+
+def pool_stats(pool: Any) -> dict[str, Any]:
+    """
+    Statistics of a ``psycopg_pool.ConnectionPool``.
+
+    Besides the ``psycopg_pool`` counters (cumulated since the pool opened),
+    ``saturation`` is the share of ``max_size`` connections in use and
+    ``wait_ms_mean`` the mean wait of the requests that had to queue.
+    """
+    stats: dict[str, Any] = pool.get_stats()
+    in_use = stats["pool_size"] - stats["pool_available"]
+    queued = stats.get("requests_queued", 0)
+    return {
+        **stats,
+        "saturation": in_use / stats["pool_max"],
+        "wait_ms_mean": stats.get("requests_wait_ms", 0) / queued if queued else 0.0,
+    }
+
+
+def database_pool_stats() -> dict[str, dict[str, Any]]:
+    """Statistics of the open pools of this process (``pool_stats``), by alias."""
+    stats: dict[str, dict[str, Any]] = {}
+    for alias in connections:
+        # Only pools already created: reading stats must not create one.
+        pools = getattr(type(connections[alias]), "_connection_pools", {})
+        pool = pools.get(alias)
+        if pool is not None:
+            stats[alias] = pool_stats(pool)
+    return stats
@@ -0,0 +1,167 @@
+"""
+Read-replica routing of product reads.
+
+With a ``replica`` database configured (``DATABASE_REPLICA_URL``), reads of
+the product models go to it only where they are marked read-only: views
+decorated with ``read_from_replica`` and code run in ``replica_reads()``
+(e.g. exports). Everything else, writes and reads inside a transaction
+included, uses the primary.
+
+A replica lags behind the primary. So that users see their own edits,
+``PrimaryStickinessMiddleware`` pins a client to the primary for
+``DATABASE_REPLICA_STICKY_SECONDS`` after a request that wrote products (a
+cookie holding the end of the window): replica-marked views then read from
+the primary too.
+"""
+
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any
+from typing import Final
+from typing import ParamSpec
+from typing import TypeVar
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db.models import Model
+from django.http import HttpRequest
+from django.http import HttpResponse
+
+REPLICA_DB_ALIAS: Final = "replica"
+# Apps whose models can be read from the replica
+REPLICA_APP_LABELS: Final = frozenset({"products"})
+STICKY_COOKIE: Final = "db_primary_until"
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class _Routing:
+    # Reads may use the replica (read_from_replica / replica_reads)
+    replica: bool = False
+    # The client wrote recently: primary only
+    pinned: bool = False
+    # Products were written by this request (or task)
+    wrote: bool = False
+
+
+# Mutated in place: changes are seen whatever the thread or context copy
+# (sync views under ASGI) the router runs in.
+_routing: ContextVar[_Routing | None] = ContextVar("db_routing", default=None)
+
+
+def replica_configured() -> bool:
+    return REPLICA_DB_ALIAS in connections.settings
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Send the product reads of the block to the replica (background jobs)."""
+    token = _routing.set(_Routing(replica=True))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+def read_from_replica(view: Callable[P, R]) -> Callable[P, R]:  # noqa: UP047
+    """Decorate a read-only view: its product reads may use the replica."""
+
+    if iscoroutinefunction(view):
+
+        async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
+            routing = _routing.get()
+            if routing is None:
+                return await view(*args, **kwargs)  # pyright: ignore[reportGeneralTypeIssues]
+            routing.replica = True
+            try:
+                return await view(*args, **kwargs)  # pyright: ignore[reportGeneralTypeIssues]
+            finally:
+                routing.replica = False
+
+        return markcoroutinefunction(wraps(view)(async_wrapper))  # pyright: ignore[reportReturnType]
+
+    @wraps(view)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        routing = _routing.get()
+        if routing is None:  # outside of a request (no middleware)
+            return view(*args, **kwargs)
+        routing.replica = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            routing.replica = False
+
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Route marked product reads to the replica, everything else to default."""
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str | None:
+        routing = _routing.get()
+        if (
+            routing is None
+            or not routing.replica
+            or routing.pinned
+            or routing.wrote
+            or model._meta.app_label not in REPLICA_APP_LABELS  # noqa: SLF001
+            or not replica_configured()
+            # Reads of a transaction must see its writes
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return None
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str | None:
+        routing = _routing.get()
+        if routing is not None and model._meta.app_label in REPLICA_APP_LABELS:  # noqa: SLF001
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        # Both databases hold the same data
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> bool | None:
+        # The replica follows the primary (physical replication)
+        return db != REPLICA_DB_ALIAS
+
+
+class PrimaryStickinessMiddleware:
+    """Pin clients that just wrote products to the primary."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        try:
+            pinned = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        routing = _Routing(pinned=pinned)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if routing.wrote:
+            sticky_seconds: int = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(int(time.time()) + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,95 @@
+"""
+Import time of the entry points of the project (``python -X importtime``).
+
+Each entry point is imported in a fresh interpreter, after ``django.setup()``
+(itself measured as the ``django.setup`` entry point): the report only counts
+the modules the entry point adds to what every process already loaded.
+``-X importtime`` prints one line per module imported, with its own time and
+the time including the modules it imported in turn (microseconds).
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Final
+
+from django.conf import settings
+
+SETUP_ENTRY_POINT: Final = "django.setup"
+ENTRY_POINTS: Final = (
+    SETUP_ENTRY_POINT,
+    "config.celery_app",
+    "config.urls",
+    "products.tasks",
+    "products.views",
+    "products.api_ninja",
+)
+
+# Printed to stderr once the imports not to measure are done
+MARKER: Final = "--- importtime marker ---"
+IMPORTTIME_LINE: Final = re.compile(
+    r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| (?P<indent>\s*)"
+    r"(?P<name>\S+)$"
+)
+
+
+@dataclass
+class ImportTimes:
+    """Modules an entry point imported, with their own time (microseconds)."""
+
+    entry_point: str
+    self_us: dict[str, int] = field(default_factory=dict)
+    total_us: int = 0
+
+    @property
+    def modules(self) -> set[str]:
+        return set(self.self_us)
+
+    def by_package(self) -> Counter[str]:
+        """Own time of the modules, summed by top-level package."""
+        packages: Counter[str] = Counter()
+        for name, us in self.self_us.items():
+            packages[name.partition(".")[0]] += us
+        return packages
+
+
+def parse_importtime(entry_point: str, stderr: str) -> ImportTimes:
+    """Read the ``-X importtime`` lines printed after ``MARKER``."""
+    times = ImportTimes(entry_point)
+    _, found, measured = stderr.partition(MARKER)
+    if not found:
+        msg = f"Import of {entry_point} failed:\n{stderr}"
+        raise RuntimeError(msg)
+    for line in measured.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        times.self_us[match["name"]] = int(match["self"])
+        if not match["indent"]:  # imported by the entry point itself
+            times.total_us += int(match["cumulative"])
+    return times
+
+
+def measure_imports(entry_point: str) -> ImportTimes:
+    """Import ``entry_point`` in a fresh interpreter, with the current settings."""
+    write_marker = f"sys.stderr.write({MARKER!r} + '\\n')"
+    if entry_point == SETUP_ENTRY_POINT:
+        code = f"import sys; {write_marker}; import django; django.setup()"
+    else:
+        code = (
+            f"import sys, django; django.setup(); {write_marker}; import {entry_point}"
+        )
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=False,
+        cwd=settings.BASE_DIR,
+        env=env,
+        text=True,
+    )
+    return parse_importtime(entry_point, completed.stderr)
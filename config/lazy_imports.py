@@ -0,0 +1,38 @@
+"""
+Lazy import of heavy dependencies (pandas, pyarrow, HTTP and Redis clients).
+
+Every process imports the product modules at startup (``django.setup()``
+through the admin and the signals, Celery through task discovery, web
+workers and system checks through the URLconf), but only some requests and
+jobs use these libraries. ``lazy_import`` returns the module at once and
+executes it on first attribute access (``importlib.util.LazyLoader``), so a
+process only pays for the libraries it uses.
+
+NumPy is not one of them: pint imports it at startup, through the quantity
+fields of the models (``quantityfield``).
+
+Modules using it keep the real import under ``TYPE_CHECKING`` for type
+checkers and quote their annotations: evaluating ``pd.DataFrame`` in a
+signature would load pandas at import time.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return module ``name``, executed on first attribute access."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
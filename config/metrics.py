@@ -0,0 +1,274 @@
+"""
+Per-request metrics, exposed to Prometheus (``/metrics``).
+
+``RequestMetricsMiddleware`` observes, for each request, by route (the URL
+pattern, not the path: a bounded set of label values):
+
+- its total latency, with the method (``other`` for non-standard ones) and
+  status code;
+- the number of database queries and the time spent in them, counted by an
+  execute wrapper installed on every connection as it opens (all aliases and
+  threads, sync views under ASGI included);
+- the time spent waiting on outbound HTTP calls, timed by ``outbound_http``
+  around them (only observed for requests that made some).
+
+The cost is a few counter increments per query and four histogram updates per
+request, low enough to leave on in production. Pool statistics
+(``config.db_pool``) are exported as gauges, read on each scrape.
+
+Several server processes: set ``PROMETHEUS_MULTIPROC_DIR`` to a directory
+emptied on deploy, the endpoint then aggregates all processes (pool gauges
+remain those of the process serving the scrape). The endpoint requires the
+``METRICS_TOKEN`` bearer token, it is disabled without one.
+"""
+
+import hmac
+import os
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+from typing import Final
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY
+from prometheus_client import CollectorRegistry
+from prometheus_client import Histogram
+from prometheus_client import generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from config.db_pool import database_pool_stats
+
+# Route label of requests not matching any URL pattern (404)
+UNRESOLVED_ROUTE: Final = "<unresolved>"
+# Method labels: clients send any method, other ones share a label
+HTTP_METHODS: Final = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"}
+)
+OTHER_METHOD: Final = "other"
+
+REQUEST_SECONDS_BUCKETS: Final = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+DB_SECONDS_BUCKETS: Final = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)  # fmt: skip
+DB_QUERIES_BUCKETS: Final = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+HTTP_SECONDS_BUCKETS: Final = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_SECONDS: Final = Histogram(
+    "opennutrilab_request_duration_seconds",
+    "Latency of the requests, middleware included.",
+    ["route", "method", "status"],
+    buckets=REQUEST_SECONDS_BUCKETS,
+)
+REQUEST_DB_QUERIES: Final = Histogram(
+    "opennutrilab_request_db_queries",
+    "Database queries of the requests.",
+    ["route"],
+    buckets=DB_QUERIES_BUCKETS,
+)
+REQUEST_DB_SECONDS: Final = Histogram(
+    "opennutrilab_request_db_duration_seconds",
+    "Time of the requests spent in database queries.",
+    ["route"],
+    buckets=DB_SECONDS_BUCKETS,
+)
+REQUEST_HTTP_SECONDS: Final = Histogram(
+    "opennutrilab_request_http_duration_seconds",
+    "Time of the requests spent waiting on outbound HTTP calls.",
+    ["route"],
+    buckets=HTTP_SECONDS_BUCKETS,
+)
+
+
+@dataclass
+class _RequestMetrics:
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    http_seconds: float = 0.0
+
+
+# Mutated in place: changes are seen whatever the thread or context copy
+# (sync views under ASGI) the queries run in.
+_request_metrics: ContextVar[_RequestMetrics | None] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+def _record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,  # noqa: FBT001
+    context: dict[str, Any],
+) -> Any:
+    metrics = _request_metrics.get()
+    if metrics is None:  # outside of a request (tasks, commands)
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_seconds += time.perf_counter() - start
+
+
+def _install_query_recorder(
+    sender: type[BaseDatabaseWrapper], connection: BaseDatabaseWrapper, **kwargs: Any
+) -> None:
+    # Sent again when the wrapper reconnects (or takes another pooled
+    # connection): the wrapper keeps its execute wrappers.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_recorder)
+
+
+@contextmanager
+def outbound_http() -> Iterator[None]:
+    """Count the block as waiting on an outbound HTTP call of the request."""
+    metrics = _request_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.http_seconds += time.perf_counter() - start
+
+
+def _route(request: HttpRequest) -> str:
+    match = request.resolver_match
+    if match is None:
+        return UNRESOLVED_ROUTE
+    return f"/{match.route}"
+
+
+def _method(request: HttpRequest) -> str:
+    return request.method if request.method in HTTP_METHODS else OTHER_METHOD
+
+
+def _observe(
+    request: HttpRequest, status: int, metrics: _RequestMetrics, seconds: float
+) -> None:
+    route = _route(request)
+    REQUEST_SECONDS.labels(route, _method(request), str(status)).observe(seconds)
+    REQUEST_DB_QUERIES.labels(route).observe(metrics.db_queries)
+    REQUEST_DB_SECONDS.labels(route).observe(metrics.db_seconds)
+    if metrics.http_seconds:
+        REQUEST_HTTP_SECONDS.labels(route).observe(metrics.http_seconds)
+
+
+class RequestMetricsMiddleware:
+    """Observe the latency, queries and outbound HTTP time of each request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        # Connections opened before this module was imported (e.g. by the test
+        # database setup) missed connection_created
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(type(connection), connection)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = _RequestMetrics()
+        token = _request_metrics.set(metrics)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+        finally:
+            _request_metrics.reset(token)
+            _observe(request, status, metrics, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        metrics = _RequestMetrics()
+        token = _request_metrics.set(metrics)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+        finally:
+            _request_metrics.reset(token)
+            _observe(request, status, metrics, time.perf_counter() - start)
+        return response
+
+
+class DatabasePoolCollector(Collector):
+    """Connection pools of this process (``database_pool_stats``)."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        pool_connections = GaugeMetricFamily(
+            "opennutrilab_db_pool_connections",
+            "Connections of the pool, by state.",
+            labels=["alias", "state"],
+        )
+        waiting = GaugeMetricFamily(
+            "opennutrilab_db_pool_requests_waiting",
+            "Requests waiting for a connection of the pool.",
+            labels=["alias"],
+        )
+        saturation = GaugeMetricFamily(
+            "opennutrilab_db_pool_saturation",
+            "Share of the pool maximum size in use.",
+            labels=["alias"],
+        )
+        for alias, stats in database_pool_stats().items():
+            available = stats["pool_available"]
+            pool_connections.add_metric(
+                [alias, "in_use"], stats["pool_size"] - available
+            )
+            pool_connections.add_metric([alias, "available"], available)
+            waiting.add_metric([alias], stats.get("requests_waiting", 0))
+            saturation.add_metric([alias], stats["saturation"])
+        yield from (pool_connections, waiting, saturation)
+
+
+REGISTRY.register(DatabasePoolCollector())
+
+
+def _exposition_registry() -> CollectorRegistry:
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(DatabasePoolCollector())
+    return registry
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Prometheus exposition of the metrics, for the ``METRICS_TOKEN`` bearer."""
+    token: str = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not token or not hmac.compare_digest(authorization, f"Bearer {token}"):
+        raise Http404
+    return HttpResponse(
+        generate_latest(_exposition_registry()), content_type=CONTENT_TYPE_LATEST
+    )
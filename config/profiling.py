@@ -0,0 +1,229 @@
+"""
+On-demand sampling profiles of live requests.
+
+A request is profiled when it asks for it, with either:
+
+- ``?profile=1``, from a staff user;
+- the ``X-Profile-Request`` header, holding a token signed with the secret
+  key (``manage.py profiling_token``), valid for ``PROFILE_TOKEN_MAX_AGE``.
+
+Other requests only pay for the check of the header and the query flag.
+
+While a profiled request runs (view, form construction, template render), a
+thread samples the stacks of the threads of the process every
+``PROFILE_INTERVAL`` seconds. Only stacks running project code are kept:
+idle threads are left out, sync code run in executor threads (``sync_to_async``,
+ASGI) and the event loop thread are kept, each under its thread name. Other
+requests running project code at the same time show up too.
+
+The samples are saved to the default storage as folded stacks
+(``profiles/<timestamp>-<request id>.folded``: one ``frame;frame;... count``
+line per stack), read by ``flamegraph.pl``, speedscope or inferno. The
+response gives the request id (``X-Request-ID``, taken from the request when
+set by a proxy) and the path of the profile (``X-Profile``).
+"""
+
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import FrameType
+from typing import Any
+from typing import Final
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_QUERY_PARAM: Final = "profile"
+PROFILE_HEADER: Final = "X-Profile-Request"
+# Path of the saved profile, in the default storage
+PROFILE_RESPONSE_HEADER: Final = "X-Profile"
+PROFILE_TOKEN_SALT: Final = "config.profiling"  # noqa: S105
+PROFILE_TOKEN_MAX_AGE: Final = 3600
+# Seconds between two samples
+PROFILE_INTERVAL: Final = 0.005
+PROFILES_DIR: Final = "profiles"
+REQUEST_ID_HEADER: Final = "X-Request-ID"
+REQUEST_ID: Final = re.compile(r"^[\w-]{1,64}$")
+
+
+def make_profile_token() -> str:
+    """Token of the ``X-Profile-Request`` header."""
+    return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).sign(uuid4().hex)
+
+
+def _valid_token(token: str) -> bool:
+    try:
+        signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).unsign(
+            token, max_age=PROFILE_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _frame_label(frame: FrameType, base_dir: str) -> str:
+    code = frame.f_code
+    filename = code.co_filename.removeprefix(base_dir)
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sample the stacks running project code, from a daemon thread."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._base_dir = f"{Path(settings.BASE_DIR)}/"
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def _is_project_frame(self, frame: FrameType) -> bool:
+        filename = frame.f_code.co_filename
+        return filename.startswith(self._base_dir) and "site-packages" not in filename
+
+    def _sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, leaf in sys._current_frames().items():  # noqa: SLF001
+            if ident == own:
+                continue
+            frames: list[FrameType] = []
+            frame: FrameType | None = leaf
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            if not any(self._is_project_frame(frame) for frame in frames):
+                continue
+            stack = ";".join(
+                _frame_label(frame, self._base_dir) for frame in reversed(frames)
+            )
+            self.samples[f"{names.get(ident, ident)};{stack}"] += 1
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        """The samples as folded stacks."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+def _request_id(request: HttpRequest) -> str:
+    request_id = request.headers.get(REQUEST_ID_HEADER, "")
+    return request_id if REQUEST_ID.match(request_id) else uuid4().hex
+
+
+def _save_profile(
+    request: HttpRequest, request_id: str, sampler: StackSampler, seconds: float
+) -> str:
+    name = default_storage.save(
+        f"{PROFILES_DIR}/{timezone.now():%Y%m%d-%H%M%S}-{request_id}.folded",
+        ContentFile(sampler.folded().encode()),
+    )
+    logger.info(
+        "Profiled %s %s (%s): %.3f s, %d samples, saved to %s",
+        request.method,
+        request.path,
+        request_id,
+        seconds,
+        sampler.samples.total(),
+        name,
+    )
+    return name
+
+
+def _profile_requested(request: HttpRequest) -> bool:
+    return (
+        PROFILE_HEADER in request.headers or request.GET.get(PROFILE_QUERY_PARAM) == "1"
+    )
+
+
+def _profile_allowed(request: HttpRequest, user: Any) -> bool:
+    token = request.headers.get(PROFILE_HEADER)
+    if token is not None:
+        return _valid_token(token)
+    return user.is_staff
+
+
+class ProfilingMiddleware:
+    """Profile the requests asking for it (after the authentication)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        if not _profile_requested(request) or not _profile_allowed(
+            request, request.user
+        ):
+            return self.get_response(request)
+
+        request_id = _request_id(request)
+        sampler = StackSampler()
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        seconds = time.perf_counter() - start
+        response[REQUEST_ID_HEADER] = request_id
+        response[PROFILE_RESPONSE_HEADER] = _save_profile(
+            request, request_id, sampler, seconds
+        )
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not _profile_requested(request) or not _profile_allowed(
+            request, await request.auser()
+        ):
+            return await self.get_response(request)
+
+        request_id = _request_id(request)
+        sampler = StackSampler()
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        seconds = time.perf_counter() - start
+        response[REQUEST_ID_HEADER] = request_id
+        response[PROFILE_RESPONSE_HEADER] = await sync_to_async(_save_profile)(
+            request, request_id, sampler, seconds
+        )
+        return response
@@ -0,0 +1,162 @@
+"""
+Notifications fanned out to the WebSocket clients of every uvicorn worker.
+
+Publishers (views, Celery tasks) send one message per change to a single
+Redis pub/sub channel: ``{"topics": [...], "data": {...}}``. Each worker holds
+one subscription to that channel, whatever its number of sockets, and
+``NotificationHub`` dispatches every message to the local sockets subscribed
+to at least one of its topics: a change costs one Redis publish, and one
+lookup per topic in each worker.
+
+Without ``NOTIFICATIONS_REDIS_URL`` (tests, single process), messages are
+only delivered to the sockets of the publishing process.
+
+Delivery is best effort: a publish failure is logged, not raised, and a
+client too slow to read its messages loses the oldest ones.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from functools import cache
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+
+from django.conf import settings
+
+from config.lazy_imports import lazy_import
+
+if TYPE_CHECKING:
+    import redis
+else:
+    redis = lazy_import("redis")
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_CHANNEL: Final = "opennutrilab:notifications"
+# Messages buffered per socket before the oldest are dropped
+SOCKET_QUEUE_SIZE: Final = 100
+# Seconds before subscribing again after losing the Redis connection
+RECONNECT_DELAY: Final = 1.0
+
+Message = dict[str, Any]
+
+
+@cache
+def _redis_client() -> "redis.Redis":
+    # Thread-safe (connection pool): shared by the threads of the process
+    return redis.Redis.from_url(settings.NOTIFICATIONS_REDIS_URL)
+
+
+def publish(topics: Iterable[str], data: Message) -> None:
+    """Send ``data`` to the sockets subscribed to any of ``topics``."""
+    topics = list(topics)
+    if not topics:
+        return
+    payload = json.dumps({"topics": topics, "data": data}, default=str)
+    if not settings.NOTIFICATIONS_REDIS_URL:
+        hub.dispatch_threadsafe(json.loads(payload))
+        return
+    try:
+        _redis_client().publish(NOTIFICATIONS_CHANNEL, payload)
+    except redis.RedisError:
+        logger.warning("Notification not published: %s", data, exc_info=True)
+
+
+class NotificationHub:
+    """Sockets of this process, by subscribed topic (one per process: ``hub``)."""
+
+    def __init__(self) -> None:
+        self._queues: dict[asyncio.Queue[Message], set[str]] = {}
+        self._topics: defaultdict[str, set[asyncio.Queue[Message]]] = defaultdict(set)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._listener: asyncio.Task[None] | None = None
+
+    def connect(self) -> asyncio.Queue[Message]:
+        """Register a socket, return the queue of its messages."""
+        self._loop = asyncio.get_running_loop()
+        if settings.NOTIFICATIONS_REDIS_URL and (
+            self._listener is None
+            or self._listener.done()
+            or self._listener.get_loop() is not self._loop
+        ):
+            self._listener = asyncio.create_task(self._listen())
+        queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=SOCKET_QUEUE_SIZE)
+        self._queues[queue] = set()
+        return queue
+
+    def disconnect(self, queue: asyncio.Queue[Message]) -> None:
+        self.unsubscribe(queue, self._queues.pop(queue, set()))
+
+    def subscribe(self, queue: asyncio.Queue[Message], topics: Iterable[str]) -> None:
+        for topic in topics:
+            self._queues[queue].add(topic)
+            self._topics[topic].add(queue)
+
+    def unsubscribe(self, queue: asyncio.Queue[Message], topics: Iterable[str]) -> None:
+        for topic in list(topics):
+            self._queues.get(queue, set()).discard(topic)
+            queues = self._topics.get(topic)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._topics[topic]
+
+    def topics(self, queue: asyncio.Queue[Message]) -> set[str]:
+        return set(self._queues.get(queue, ()))
+
+    def dispatch(self, message: Message) -> None:
+        """Queue a published message for the matching sockets (event loop)."""
+        matched: defaultdict[asyncio.Queue[Message], list[str]] = defaultdict(list)
+        for topic in message["topics"]:
+            for queue in self._topics.get(topic, ()):
+                matched[queue].append(topic)
+        for queue, topics in matched.items():
+            if queue.full():  # slow client: drop its oldest message
+                queue.get_nowait()
+            # Only the topics of this socket (a batch can name thousands)
+            queue.put_nowait({"topics": topics, **message["data"]})
+
+    def dispatch_threadsafe(self, message: Message) -> None:
+        """``dispatch`` from any thread (local delivery, without Redis)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # no socket ever connected to this process
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.dispatch(message)
+        else:
+            loop.call_soon_threadsafe(self.dispatch, message)
+
+    async def _listen(self) -> None:
+        """Subscribe to the channel for the life of the process."""
+        import redis.asyncio  # noqa: PLC0415
+
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(settings.NOTIFICATIONS_REDIS_URL)
+                async with client, client.pubsub() as pubsub:
+                    await pubsub.subscribe(NOTIFICATIONS_CHANNEL)
+                    async for item in pubsub.listen():
+                        if item["type"] != "message":
+                            continue
+                        try:
+                            message = json.loads(item["data"])
+                        except ValueError:
+                            logger.warning("Invalid notification: %r", item["data"])
+                            continue
+                        self.dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except (redis.RedisError, OSError):
+                logger.warning("Notifications subscription lost", exc_info=True)
+                await asyncio.sleep(RECONNECT_DELAY)
+
+
+hub = NotificationHub()
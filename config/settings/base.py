@@ -9,6 +9,8 @@ import django_stubs_ext
 import environ  # pyright: ignore[reportMissingTypeStubs]
 from django.utils.translation import gettext_lazy as _
 
+from config.db_pool import database_pool_options
+
 django_stubs_ext.monkeypatch()
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
@@ -51,7 +53,46 @@ LOCALE_PATHS = [str(BASE_DIR / "locale")]
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
-DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Views holding a request-wide transaction would keep their connection (and
+# row locks) during outbound HTTP calls (Open Food Facts, image downloads):
+# writers are atomic on their own, and views needing request-level atomicity
+# opt in with ``transaction.atomic`` (see products.views.ProductDeleteView).
+DATABASES["default"]["ATOMIC_REQUESTS"] = False
+# Connection pool of each process (see config.db_pool), sized from its
+# concurrency: uvicorn's --limit-concurrency for the web, 1 for Celery prefork
+# children (set by their start scripts). Without pool, persistent connections.
+# https://docs.djangoproject.com/en/dev/ref/databases/#connection-pool
+DATABASE_POOL = env.bool("DATABASE_POOL", default=True)
+DATABASE_POOL_CONCURRENCY = env.int(
+    "DATABASE_POOL_CONCURRENCY",
+    default=env.int("UVICORN_LIMIT_CONCURRENCY", default=20),
+)
+if DATABASE_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        **DATABASES["default"].get("OPTIONS", {}),
+        "pool": database_pool_options(
+            DATABASE_POOL_CONCURRENCY,
+            timeout=env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+        ),
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+# Optional read replica of the primary, for read-only product views and
+# exports (see config.db_router). Clients that wrote products read from the
+# primary for DATABASE_REPLICA_STICKY_SECONDS, so that they see their edits.
+if env("DATABASE_REPLICA_URL", default=""):
+    DATABASES["replica"] = {
+        **env.db("DATABASE_REPLICA_URL"),
+        "ATOMIC_REQUESTS": False,
+        "OPTIONS": {**DATABASES["default"].get("OPTIONS", {})},
+        "CONN_MAX_AGE": DATABASES["default"].get("CONN_MAX_AGE", 0),
+        "CONN_HEALTH_CHECKS": DATABASES["default"].get("CONN_HEALTH_CHECKS", False),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICA_STICKY_SECONDS = env.int("DATABASE_REPLICA_STICKY_SECONDS", default=10)
+# https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -73,6 +114,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -141,6 +183,8 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    # First: its latency includes the other middleware
+    "config.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -149,6 +193,9 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # On demand only (staff or signed header), see config.profiling
+    "config.profiling.ProfilingMiddleware",
+    "config.db_router.PrimaryStickinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -271,6 +318,10 @@ LOGGING = {
 
 REDIS_URL = env("REDIS_URL", default="redis://redis:6379/0")
 REDIS_SSL = REDIS_URL.startswith("rediss://")
+# Pub/sub of the WebSocket notifications (config.pubsub), empty: in-process only
+NOTIFICATIONS_REDIS_URL = env("NOTIFICATIONS_REDIS_URL", default=REDIS_URL)
+# Progress of the chunked catalog jobs (products.jobs), empty: in-process only
+JOBS_REDIS_URL = env("JOBS_REDIS_URL", default=REDIS_URL)
 
 # Celery
 # ------------------------------------------------------------------------------
@@ -312,6 +363,13 @@ CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-hijack-root-logger
 CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+# Product tasks are routed to the "io" (network, storage) and "cpu" (pandas,
+# NumPy) queues by their decorators, the others stay on the default queue.
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#task-default-queue
+CELERY_TASK_DEFAULT_QUEUE = "celery"
+# Long tasks (chunks of catalog jobs): a worker reserves one task at a time
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-prefetch-multiplier
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -366,3 +424,11 @@ WEBPACK_LOADER = {
 }
 # Your stuff...
 # ------------------------------------------------------------------------------
+# OpenFoodFacts API (a stand-in server can be used, e.g. benchmarks)
+OFF_API_URL = env("OFF_API_URL", default="https://world.openfoodfacts.org")
+# Calls to Open Food Facts slower than this are logged (seconds, see
+# products.openfoodfacts.telemetry)
+OFF_SLOW_CALL_SECONDS = env.float("OFF_SLOW_CALL_SECONDS", default=2.0)
+# Bearer token of the Prometheus endpoint (/metrics, see config.metrics),
+# disabled without one
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
@@ -3,6 +3,7 @@ With these settings, tests run faster.
 """
 
 from .base import *  # noqa: F403
+from .base import DATABASES
 from .base import TEMPLATES
 from .base import env
 
@@ -16,6 +17,23 @@ SECRET_KEY = env(
 # https://docs.djangoproject.com/en/dev/ref/settings/#test-runner
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
 
+# DATABASES
+# ------------------------------------------------------------------------------
+# Each test runs in a transaction of a single connection: no pool (the test
+# database replaces the configured one after the pool would be created).
+for database in DATABASES.values():
+    database.get("OPTIONS", {}).pop("pool", None)
+
+# NOTIFICATIONS
+# ------------------------------------------------------------------------------
+# Delivered to the sockets of the test process, no Redis needed
+NOTIFICATIONS_REDIS_URL = ""
+
+# JOBS
+# ------------------------------------------------------------------------------
+# Chunked job state kept in the test process, no Redis needed
+JOBS_REDIS_URL = ""
+
 # PASSWORDS
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#password-hashers
@@ -11,6 +11,7 @@ from drf_spectacular.views import SpectacularSwaggerView
 from rest_framework.authtoken.views import obtain_auth_token
 
 from config import api_ninja
+from config.metrics import metrics_view
 
 urlpatterns = [
     path("i18n/", include("django.conf.urls.i18n")),  # Language switching
@@ -48,6 +49,8 @@ urlpatterns += [
         name="api-docs",
     ),
     path("api-ninja/", api_ninja.api.urls),
+    # Prometheus scrapes
+    path("metrics", metrics_view, name="metrics"),
 ]
 
 if settings.DEBUG:
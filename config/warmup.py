@@ -0,0 +1,120 @@
+"""
+Warm-up of a web worker, before it accepts traffic (ASGI lifespan startup).
+
+The first requests of a fresh process pay one-off costs: the database
+connection (pool), pint unit parsing and formatting caches, the lazy rebuild
+of self-referencing pydantic schemas, template compilation (crispy field
+templates, form fragments) and the process-wide catalog (macronutrients,
+ingredient reference names). ``warm_up`` pays them at startup instead, step
+by step, and logs how long each step took.
+
+A failing step is logged and skipped: the worker still starts, and the
+request that needs it pays the cost as before.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from typing import Final
+
+from crispy_forms.utils import render_crispy_form
+from django.conf import settings
+from django.db import connections
+from django.utils import translation
+from quantityfield.units import ureg
+
+from products.catalog import get_ingredient_reference_names
+from products.catalog import get_macronutrients
+from products.forms import ProductForm
+from products.openfoodfacts.api_response_shema import OFFProductAPIResponseSchema
+from products.openfoodfacts.schema import OFFIngredientSchema
+from products.openfoodfacts.schema import product_schema_to_form_data
+from products.units import DEFAULT_ENERGY_UNIT
+from products.units import DEFAULT_MACRONUTRIENT_UNIT
+from products.units import ENERGY_UNIT_CHOICES_VALUES
+from products.units import VITAMIN_UNIT_CHOICES_VALUES
+
+logger = logging.getLogger(__name__)
+
+# Shaped like an Open Food Facts response: every nested schema is validated
+SAMPLE_OFF_RESPONSE: Final = {
+    "status": "success",
+    "result": {"id": "product_found", "name": "Product found"},
+    "product": {
+        "code": "0000000000000",
+        "product_name": "Warm-up",
+        "nutriments": {"energy-kj_100g": 1000.0, "fat_100g": 10.0},
+        "ingredients": [
+            {"text": "Flour", "percent": 60.0, "ingredients": [{"text": "Wheat"}]}
+        ],
+    },
+}
+
+
+def warm_database() -> None:
+    """Open the connection (with a pool, fill it to ``min_size``)."""
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def warm_units() -> None:
+    """Parse and format the units of the forms (pint caches both)."""
+    for unit in {
+        DEFAULT_ENERGY_UNIT,
+        DEFAULT_MACRONUTRIENT_UNIT,
+        *ENERGY_UNIT_CHOICES_VALUES,
+        *VITAMIN_UNIT_CHOICES_VALUES,
+    }:
+        format(ureg.Quantity(1.5, unit), "~P")
+
+
+def warm_schemas() -> None:
+    """Build the validators and JSON schemas of the Open Food Facts schemas."""
+    response = OFFProductAPIResponseSchema.model_validate(SAMPLE_OFF_RESPONSE)
+    if response.product is not None:
+        product_schema_to_form_data(response.product)
+    OFFProductAPIResponseSchema.model_json_schema()
+    OFFIngredientSchema.model_json_schema()
+
+
+def warm_catalog() -> None:
+    """Load the macronutrients and the ingredient reference names."""
+    get_macronutrients()
+    get_ingredient_reference_names()
+
+
+def warm_templates() -> None:
+    """Compile the product form templates, fragments rendered in each language."""
+    for language, _name in settings.LANGUAGES:
+        with translation.override(language):
+            render_crispy_form(ProductForm())
+
+
+WARMUP_STEPS: Final[tuple[tuple[str, Callable[[], None]], ...]] = (
+    ("database", warm_database),
+    ("units", warm_units),
+    ("schemas", warm_schemas),
+    ("catalog", warm_catalog),
+    ("templates", warm_templates),
+)
+
+
+def warm_up() -> dict[str, float]:
+    """
+    Run the warm-up steps in order.
+
+    :return: seconds taken by each step (failed steps included)
+    """
+    durations: dict[str, float] = {}
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %r failed", name)
+        durations[name] = time.perf_counter() - start
+        logger.info("Warm-up step %r took %.1f ms", name, durations[name] * 1000)
+    # Return the connections (to the pool): they belong to this thread
+    connections.close_all()
+    logger.info("Warm-up done in %.1f ms", sum(durations.values()) * 1000)
+    return durations
@@ -1,13 +1,86 @@
-async def websocket_application(scope, receive, send):
-    while True:
-        event = await receive()
+"""
+WebSocket endpoints.
+
+Besides the macronutrients chart channel, any path (``NOTIFICATIONS_WS_PATH``
+for pages) is a notification channel (``config.pubsub``): the client sends
+``{"subscribe": [topics]}`` or ``{"unsubscribe": [topics]}`` and is answered
+with its current topics (``{"subscribed": [...]}``), then receives
+``{"topics": [...], "event": ...}`` messages as changes are published.
+``ping`` is still answered by ``pong!``.
+"""
+
+import asyncio
+import json
+from typing import Any
+from typing import Final
+
+from config.pubsub import hub
+from products.notifications import is_valid_topic
+from products.websocket import MACRONUTRIENTS_CHART_PATH
+from products.websocket import macronutrients_chart_application
+
+# Topics a socket can subscribe to at once
+MAX_TOPICS: Final = 500
+
+
+def _subscription_reply(queue: asyncio.Queue[dict[str, Any]], text: str) -> str:
+    """Apply a subscription command, return the JSON answer."""
+    try:
+        command = json.loads(text)
+    except ValueError:
+        return json.dumps({"error": "Invalid JSON."})
+    if not isinstance(command, dict):
+        return json.dumps({"error": "Expected an object."})
+
+    for action in ("subscribe", "unsubscribe"):
+        topics = command.get(action, [])
+        if not isinstance(topics, list) or not all(map(is_valid_topic, topics)):
+            return json.dumps({"error": f"Invalid topics to {action}."})
+    hub.unsubscribe(queue, command.get("unsubscribe", []))
+    subscribed = hub.topics(queue) | set(command.get("subscribe", []))
+    if len(subscribed) > MAX_TOPICS:
+        return json.dumps({"error": f"At most {MAX_TOPICS} topics."})
+    hub.subscribe(queue, command.get("subscribe", []))
+    return json.dumps({"subscribed": sorted(subscribed)})
 
-        if event["type"] == "websocket.connect":
-            await send({"type": "websocket.accept"})
 
-        if event["type"] == "websocket.disconnect":
-            break
+async def notifications_application(scope, receive, send):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    queue = hub.connect()
+
+    async def forward() -> None:
+        while True:
+            message = await queue.get()
+            await send({"type": "websocket.send", "text": json.dumps(message)})
+
+    forwarder = asyncio.create_task(forward())
+    try:
+        while True:
+            event = await receive()
+
+            if event["type"] == "websocket.connect":
+                await send({"type": "websocket.accept"})
+
+            if event["type"] == "websocket.disconnect":
+                break
+
+            if event["type"] == "websocket.receive" and event.get("text"):
+                if event["text"] == "ping":
+                    await send({"type": "websocket.send", "text": "pong!"})
+                else:
+                    await send(
+                        {
+                            "type": "websocket.send",
+                            "text": _subscription_reply(queue, event["text"]),
+                        }
+                    )
+    finally:
+        forwarder.cancel()
+        hub.disconnect(queue)
+
+
+async def websocket_application(scope, receive, send):
+    if scope["path"] == MACRONUTRIENTS_CHART_PATH:
+        await macronutrients_chart_application(scope, receive, send)
+        return
 
-        if event["type"] == "websocket.receive":
-            if event["text"] == "ping":
-                await send({"type": "websocket.send", "text": "pong!"})
+    await notifications_application(scope, receive, send)
@@ -1,4 +1,8 @@
 from django.contrib import admin
+from django.db.models import QuerySet
+from django.forms import ModelForm
+from django.http import HttpRequest
+from django.utils import timezone
 
 from .models import Ingredient
 from .models import IngredientRef
@@ -7,12 +11,12 @@ from .models import Product
 from .models import ProductMacronutrient
 from .models import ProductVitamin
 from .models import Vitamin
+from .tasks import start_products_deletion
 
 # Register your models here.
 
 admin.site.register(
     [
-        Product,
         Macronutrient,
         ProductMacronutrient,
         Vitamin,
@@ -22,6 +26,24 @@ admin.site.register(
 )
 
 
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin[Product]):
+    list_display = ("barcode", "name", "nutrition_grade", "updated_at")
+    search_fields = ("barcode", "name")
+    actions = ("delete_in_background",)
+
+    @admin.action(
+        description="Delete selected products (in background)",
+        permissions=["delete"],
+    )
+    def delete_in_background(
+        self, request: HttpRequest, queryset: QuerySet[Product]
+    ) -> None:
+        # Hidden at once, purged with their related rows and images by a job
+        marked = start_products_deletion(queryset.values_list("barcode", flat=True))
+        self.message_user(request, f"{marked} products marked for deletion.")
+
+
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin[Ingredient]):
     list_display = (
@@ -32,6 +54,17 @@ class IngredientAdmin(admin.ModelAdmin[Ingredient]):
 
     ordering = ("id",)
 
+    def save_model(
+        self,
+        request: HttpRequest,
+        obj: Ingredient,
+        form: ModelForm[Ingredient],
+        change: bool,  # noqa: FBT001
+    ) -> None:
+        super().save_model(request, obj, form, change)
+        # Ingredients have no save receiver (see products.signals)
+        Product.objects.filter(pk=obj.product_id).update(updated_at=timezone.now())  # pyright: ignore[reportAttributeAccessIssue]
+
     @admin.display(description="Ingredient (hierarchical)")
     def indented_name(self, obj: Ingredient) -> str:
         indent = "— " * self.get_level(obj)
@@ -0,0 +1,94 @@
+"""
+Set-based writes of product macronutrient amounts.
+
+Shared by the product form, the API and the importers: whatever the number of
+products and nutrients, a write costs one ``INSERT ... ON CONFLICT`` for the
+present amounts, one ``DELETE`` for the cleared ones and one ``UPDATE``
+marking the products as modified (and their nutrition scores to recompute).
+"""
+
+from collections import defaultdict
+from collections.abc import Mapping
+from functools import reduce
+from operator import or_
+from typing import Any
+
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import When
+from django.utils import timezone
+from pint import Quantity
+from quantityfield.units import ureg
+
+from .models import Product
+from .models import ProductMacronutrient
+from .scoring import SCORE_INPUT_MACRONUTRIENTS
+from .units import DEFAULT_MACRONUTRIENT_UNIT
+
+# barcode -> macronutrient name -> amount (plain numbers are in grams), None
+# clears the stored amount. Macronutrients absent from the mapping are left
+# untouched.
+MacronutrientAmounts = Mapping[str, Mapping[str, Quantity | float | None]]
+
+
+def write_macronutrient_amounts(amounts: MacronutrientAmounts) -> None:
+    """Upsert present amounts and delete cleared ones for many products."""
+    upserts: list[ProductMacronutrient] = []
+    # frozenset of cleared macronutrients -> barcodes, so that products
+    # clearing the same nutrients share one clause of the DELETE
+    cleared: defaultdict[frozenset[str], list[str]] = defaultdict(list)
+    scored: list[str] = []
+
+    for barcode, product_amounts in amounts.items():
+        names: set[str] = set()
+        for name, amount in product_amounts.items():
+            if amount is None:
+                names.add(name)
+                continue
+            upserts.append(
+                ProductMacronutrient(
+                    product_id=barcode,
+                    macronutrient_id=name,
+                    amount=amount
+                    if isinstance(amount, Quantity)
+                    else ureg.Quantity(amount, DEFAULT_MACRONUTRIENT_UNIT),
+                )
+            )
+        if names:
+            cleared[frozenset(names)].append(barcode)
+        if not product_amounts.keys().isdisjoint(SCORE_INPUT_MACRONUTRIENTS):
+            scored.append(barcode)
+
+    if upserts:
+        ProductMacronutrient.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=["product", "macronutrient"],
+            update_fields=["amount"],
+        )
+
+    if cleared:
+        ProductMacronutrient.objects.filter(
+            reduce(
+                or_,
+                (
+                    Q(product_id__in=barcodes, macronutrient_id__in=names)
+                    for names, barcodes in cleared.items()
+                ),
+            )
+        ).delete()
+
+    # bulk_create() and delete() send no post_save signal: mark the products
+    # as modified, and their scores to recompute, here
+    touched = [
+        barcode for barcode, product_amounts in amounts.items() if product_amounts
+    ]
+    if touched:
+        changes: dict[str, Any] = {"updated_at": timezone.now()}
+        if scored:
+            changes["nutrition_score_stale"] = Case(
+                When(barcode__in=scored, then=True),
+                default=F("nutrition_score_stale"),
+            )
+        Product.objects.filter(barcode__in=touched).update(**changes)
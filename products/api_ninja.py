@@ -1,15 +1,182 @@
-import requests
+from collections import Counter
+from datetime import datetime
+from typing import TYPE_CHECKING
+from typing import Any
+
+from celery.result import AsyncResult
+from django.db.models import F
 from django.http import HttpRequest
 from django.http import HttpResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from ninja import Field
+from ninja import File
 from ninja import Query
 from ninja import Router
+from ninja import Schema
+from ninja.decorators import decorate_view
+from ninja.files import UploadedFile
+from ninja.security import django_auth
 
+from config.db_router import read_from_replica
+from config.lazy_imports import lazy_import
+from products.conditional import get_conditional_product
+from products.conditional import product_condition
+from products.jobs import get_job_status
+from products.models import NutritionGrade
+from products.models import Product
 from products.openfoodfacts.api_response_shema import OFFAPIErrorSchema
 from products.openfoodfacts.api_response_shema import OFFProductAPIResponseSchema
 from products.openfoodfacts.schema import MacronutrientsFormSchema
+from products.openfoodfacts.telemetry import off_call
+from products.pagination import PRODUCT_LIST_ORDERINGS
+from products.pagination import PRODUCT_LIST_PAGE_SIZE
+from products.pagination import paginate_products
+from products.pagination import resolve_product_sort
+from products.reads import PRODUCT_SCALAR_FIELDS
+from products.reads import ingredient_level
+from products.reads import parse_product_fields
+from products.reads import product_columns
+from products.reads import serialize_products
+from products.search import search_products
+from products.tasks import is_own_bulk_upload
+from products.tasks import start_bulk_upload
+from products.tasks import start_products_deletion
+from products.writes import PRODUCT_BATCH_MAX
+from products.writes import write_products
+
+if TYPE_CHECKING:
+    import requests
+else:
+    requests = lazy_import("requests")
 
 router = Router()
 
+PRODUCT_PAGE_MAX = 500
+
+SEARCH_RESULTS_DEFAULT = 20
+SEARCH_RESULTS_MAX = 100
+
+
+class BulkUploadStartedSchema(Schema):
+    task_id: str
+    status_url: str
+
+
+class BulkUploadStatusSchema(Schema):
+    state: str
+    # {"done": int, "total": int} while the import is running
+    progress: dict[str, int] | None = None
+    # {"rows": int, "imported": int, "errors": [...]} once finished
+    result: dict[str, Any] | None = None
+    error: str | None = None
+
+
+class JobStatusSchema(Schema):
+    state: str
+    # {"done": int, "total": int} chunks
+    progress: dict[str, int]
+    # {"chunks": int, "processed": int} once finished
+    result: dict[str, int] | None = None
+    error: str | None = None
+
+
+class ErrorSchema(Schema):
+    error: str
+
+
+class StoredIngredientSchema(Schema):
+    id: int
+    name: str
+    percentage: float | None = None
+    # IngredientRef name
+    reference: str | None = None
+    ingredients: list["StoredIngredientSchema"] = []
+
+
+class IngredientNodeSchema(Schema):
+    """One node of an ingredient tree, without its children."""
+
+    id: int
+    name: str
+    percentage: float | None = None
+    has_reference: bool
+    has_children: bool
+
+
+class StoredProductSchema(Schema):
+    """Stored product, with only the requested fields (see products.reads)."""
+
+    barcode: str
+    name: str | None = None
+    description: str | None = None
+    image_url: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    energy_kj: float | None = None
+    nutrition_score: int | None = None
+    nutrition_grade: str | None = None
+    # Macronutrient name -> g per 100 g
+    macronutrients: dict[str, float] | None = None
+    # Vitamin name -> mg per 100 g
+    vitamins: dict[str, float] | None = None
+    ingredients: list[StoredIngredientSchema] | None = None
+
+
+class ProductBatchSchema(Schema):
+    # ProductDocumentSchema documents, validated one by one by products.writes
+    products: list[dict[str, Any]] = Field(max_length=PRODUCT_BATCH_MAX)
+
+
+class ProductWriteResultSchema(Schema):
+    index: int
+    barcode: Any = None
+    # "created", "updated" or "invalid"
+    status: str
+    # [{"field": str, "message": str}] when invalid
+    errors: list[dict[str, str]]
+
+
+class ProductBatchResultSchema(Schema):
+    created: int
+    updated: int
+    invalid: int
+    results: list[ProductWriteResultSchema]
+
+
+class ProductDeleteSchema(Schema):
+    barcodes: list[str] = Field(min_length=1, max_length=PRODUCT_BATCH_MAX)
+
+
+class ProductDeleteResultSchema(Schema):
+    # Products not found or already marked are not counted
+    marked: int
+
+
+class ProductListParamsSchema(Schema):
+    # Comma separated product fields, see products.reads.PRODUCT_FIELDS
+    fields: str | None = None
+    # Search text (name, description, ingredients or barcode prefix)
+    q: str = ""
+    grade: str = ""
+    # Same sort keys as the product list page
+    sort: str = ""
+    cursor: str | None = None
+    limit: int = Field(default=PRODUCT_LIST_PAGE_SIZE, ge=1, le=PRODUCT_PAGE_MAX)
+
+
+class StoredProductPageSchema(Schema):
+    results: list[StoredProductSchema]
+    next_cursor: str | None = None
+
+
+class ProductSearchResultSchema(Schema):
+    barcode: str
+    name: str
+    nutrition_score: int | None
+    nutrition_grade: str
+    relevance: float
+
 
 @router.get(
     path="/off/{barcode}",
@@ -19,10 +186,12 @@ router = Router()
     },
 )
 def get_product(request: HttpRequest, response: HttpResponse, barcode: str):
-    r = requests.get(
-        f"https://world.openfoodfacts.org/api/v3/product/{barcode}.json",
-        timeout=10,
-    )
+    with off_call("api_ninja.get_product", barcode) as call:
+        r = requests.get(
+            f"https://world.openfoodfacts.org/api/v3/product/{barcode}.json",
+            timeout=10,
+        )
+        call.response(r.status_code, r.content)
 
     if r.status_code == 500:  # noqa: PLR2004
         response.status_code = 502
@@ -39,3 +208,196 @@ def get_macronutrients_form_data(
 ):
     """Return parsed macronutrient data from form input."""
     return {"macronutrients": macronutrients.dict()}
+
+
+@router.post(
+    path="bulk-upload",
+    response={202: BulkUploadStartedSchema, 400: ErrorSchema},
+)
+def start_products_bulk_upload(request: HttpRequest, file: UploadedFile = File(...)):  # noqa: B008
+    """Enqueue the import of a CSV/XLSX products sheet."""
+    try:
+        task_id = start_bulk_upload(file, request.session)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    return 202, {
+        "task_id": task_id,
+        "status_url": reverse(
+            "api-1.0.0:get_bulk_upload_status", kwargs={"task_id": task_id}
+        ),
+    }
+
+
+@router.get(
+    path="bulk-upload/{task_id}",
+    response={200: BulkUploadStatusSchema, 404: ErrorSchema},
+)
+def get_bulk_upload_status(request: HttpRequest, task_id: str):
+    """Return progress, then result (imported rows and errors), of a bulk upload."""
+    # Any task id would read the result of any Celery task
+    if not is_own_bulk_upload(request.session, task_id):
+        return 404, {"error": "Unknown bulk upload."}
+    result = AsyncResult(task_id)
+    if result.state == "PROGRESS":
+        return 200, {"state": result.state, "progress": result.info}
+    if result.successful():
+        return 200, {"state": result.state, "result": result.result}
+    if result.failed():
+        return 200, {"state": result.state, "error": str(result.result)}
+    return 200, {"state": result.state}
+
+
+@router.get(path="jobs/{job_id}", response={200: JobStatusSchema, 404: ErrorSchema})
+def get_catalog_job_status(request: HttpRequest, job_id: str):
+    """Return progress, then outcome, of a chunked catalog job."""
+    status = get_job_status(job_id)
+    if status is None:
+        return 404, {"error": "Unknown job."}
+    return 200, status
+
+
+@router.get(path="search", response=list[ProductSearchResultSchema])
+@decorate_view(read_from_replica)
+def get_products_search(
+    request: HttpRequest,
+    q: str,
+    limit: int = Query(SEARCH_RESULTS_DEFAULT, ge=1, le=SEARCH_RESULTS_MAX),
+):
+    """Search products by name, description, ingredients or barcode prefix."""
+    return list(
+        search_products(Product.objects.all(), q)
+        .order_by("-search_relevance", "barcode")
+        .values(
+            "barcode",
+            "name",
+            "nutrition_score",
+            "nutrition_grade",
+            relevance=F("search_relevance"),
+        )[:limit]
+    )
+
+
+@router.post(
+    path="batch",
+    response={200: ProductBatchResultSchema, 403: ErrorSchema},
+    auth=django_auth,  # session authentication, with its CSRF check
+)
+def write_products_batch(request: HttpRequest, batch: ProductBatchSchema):
+    """
+    Create or replace products, all valid documents in one transaction (users
+    allowed to add and change products).
+
+    Each document is shaped like ``ProductDocumentSchema``; invalid ones are
+    reported in ``results`` and skipped.
+    """
+    if not request.user.has_perms(["products.add_product", "products.change_product"]):
+        return 403, {"error": "Permission denied"}
+    results = write_products(batch.products)
+    statuses = Counter(result["status"] for result in results)
+    return 200, {
+        "created": statuses["created"],
+        "updated": statuses["updated"],
+        "invalid": statuses["invalid"],
+        "results": results,
+    }
+
+
+@router.post(
+    path="bulk-delete",
+    response={202: ProductDeleteResultSchema, 403: ErrorSchema},
+    auth=django_auth,  # session authentication, with its CSRF check
+)
+def delete_products_bulk(request: HttpRequest, batch: ProductDeleteSchema):
+    """
+    Delete products (staff): hidden at once, purged (related rows and images)
+    in the background.
+    """
+    if not request.user.is_staff:
+        return 403, {"error": "Staff only"}
+    return 202, {"marked": start_products_deletion(batch.barcodes)}
+
+
+# Declared last: "{barcode}" would otherwise shadow the paths above.
+@router.get(
+    path="/",
+    response={200: StoredProductPageSchema, 400: ErrorSchema},
+    exclude_unset=True,
+)
+@decorate_view(read_from_replica)
+def list_stored_products(request: HttpRequest, params: Query[ProductListParamsSchema]):
+    """
+    List stored products, keyset paginated (follow ``next_cursor``).
+
+    ``fields`` selects a comma separated subset of the product fields
+    (``macronutrients``, ``vitamins`` and ``ingredients`` are only included
+    when requested).
+    """
+    try:
+        selected = parse_product_fields(params.fields)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    search = params.q.strip()
+    sort = resolve_product_sort(params.sort, searching=bool(search))
+    ordering = PRODUCT_LIST_ORDERINGS[sort]
+    columns = product_columns(selected)
+    if ordering.field in PRODUCT_SCALAR_FIELDS.values():
+        # Read by the cursor of the last product
+        columns.append(ordering.field)
+
+    queryset = Product.objects.only(*columns)
+    if params.grade in NutritionGrade.values:
+        queryset = queryset.filter(nutrition_grade=params.grade)
+    if search:
+        queryset = search_products(queryset, search)
+
+    page = paginate_products(
+        queryset,
+        ordering,
+        params.cursor,
+        salt=f"products.list:{sort}",
+        page_size=params.limit,
+    )
+    return {
+        "results": serialize_products(page.object_list, selected),
+        "next_cursor": page.next_cursor,
+    }
+
+
+@router.get(path="/{barcode}/ingredients", response=list[IngredientNodeSchema])
+@decorate_view(read_from_replica)
+def get_stored_product_ingredients(
+    request: HttpRequest,
+    barcode: str,
+    parent: int | None = None,
+):
+    """
+    Return one level of the ingredient tree of a product: the children of the
+    ``parent`` ingredient, or the roots without it.
+    """
+    return ingredient_level(barcode, parent)
+
+
+@router.get(
+    path="/{barcode}",
+    response={200: StoredProductSchema, 400: ErrorSchema, 404: ErrorSchema},
+    exclude_unset=True,
+)
+# Applied in order (the last outermost): validators read from the replica too
+@decorate_view(cache_control(no_cache=True), product_condition, read_from_replica)
+def get_stored_product(
+    request: HttpRequest,
+    barcode: str,
+    fields: str | None = None,
+):
+    """Return a stored product (``fields`` as for the list)."""
+    try:
+        selected = parse_product_fields(fields)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+
+    # Already loaded by the ETag/Last-Modified validators
+    product = get_conditional_product(request, barcode)
+    if product is None:
+        return 404, {"error": "Product not found"}
+    return serialize_products([product], selected)[0]
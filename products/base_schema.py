@@ -3,6 +3,7 @@ from typing import TypeVar
 
 from ninja import Field
 from ninja import Schema
+from pydantic import ConfigDict
 
 MacronutrientsType = TypeVar("MacronutrientsType", bound="MacronutrientsSchema")
 IngredientType = TypeVar("IngredientType", bound="IngredientSchema")  # pyright: ignore[reportMissingTypeArgument]
@@ -45,3 +46,21 @@ class ProductSchema(Schema, Generic[MacronutrientsType, IngredientType]):  # noq
     energy: int | None = None
     macronutrients: MacronutrientsType | None = None
     ingredients: list[IngredientType] | None = None
+
+
+# Stored products, as written by the batch API ---------------------------------
+
+
+class ProductIngredientSchema(IngredientSchema["ProductIngredientSchema"]):
+    model_config = ConfigDict(populate_by_name=True)  # "name" or "text"
+
+    percentage: float | None = None
+
+
+ProductIngredientSchema.model_rebuild()
+
+
+class ProductDocumentSchema(
+    ProductSchema[MacronutrientsSchema, ProductIngredientSchema]
+):
+    """A whole product (energy in kJ, macronutrients in g per 100 g)."""
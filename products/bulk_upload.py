@@ -0,0 +1,261 @@
+"""
+Bulk product upload from CSV/XLSX spreadsheets.
+
+The sheet is loaded with pandas and validated column-wise with NumPy (EAN-13
+checksums, nutrient ranges), so every invalid row is reported at once. Valid
+rows are then upserted in large batches, one transaction per chunk.
+
+Expected columns: ``barcode`` and ``name`` (required), ``description``,
+``energy`` (kJ per 100 g) and one column per macronutrient (g per 100 g,
+``fat``, ``saturated_fat``, ...). Absent optional columns leave stored values
+untouched, empty cells clear them.
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import IO
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+
+import numpy as np
+from django.db import transaction
+from quantityfield.units import ureg
+
+from config.lazy_imports import lazy_import
+
+from .amounts import write_macronutrient_amounts
+from .base_schema import MacronutrientsSchema
+from .models import Product
+from .notifications import notify_products_changed
+from .search import update_search_vectors
+from .units import DEFAULT_ENERGY_UNIT
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+BULK_UPLOAD_CHUNK_SIZE: Final = 1000
+BULK_UPLOAD_EXTENSIONS: Final = (".csv", ".xlsx")
+
+REQUIRED_COLUMNS: Final = ("barcode", "name")
+MACRONUTRIENT_COLUMNS: Final = tuple(MacronutrientsSchema.model_fields)
+NUMERIC_COLUMNS: Final = ("energy", *MACRONUTRIENT_COLUMNS)
+
+NAME_MAX_LENGTH: Final = 100
+EAN13_LENGTH: Final = 13
+EAN13_WEIGHTS: Final = (1, 3) * 6
+
+# Per 100 g: no macronutrient above 100 g, no energy above pure fat (~3700 kJ)
+MACRONUTRIENT_MAX: Final = 100.0
+ENERGY_MAX: Final = 3800.0
+# Rounding on labels can make the total slightly exceed 100 g
+TOTAL_TOLERANCE: Final = 1.0
+# (sub-nutrient, parent) pairs: "of which" values cannot exceed their parent
+SUB_MACRONUTRIENTS: Final = (("saturated_fat", "fat"), ("sugars", "carbohydrates"))
+TOTAL_MACRONUTRIENTS: Final = ("fat", "carbohydrates", "fiber", "proteins")
+
+# First data row of a sheet (row 1 is the header)
+FIRST_DATA_ROW: Final = 2
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def read_sheet(file: IO[bytes], filename: str) -> "pd.DataFrame":
+    """Load a CSV/XLSX sheet, keeping every cell as text."""
+    extension = Path(filename).suffix.lower()
+    if extension == ".csv":
+        frame = pd.read_csv(file, dtype=str, keep_default_na=False)
+    elif extension == ".xlsx":
+        frame = pd.read_excel(file, dtype=str, keep_default_na=False)
+    else:
+        msg = f"Unsupported file type {extension!r}, expected one of " + ", ".join(
+            BULK_UPLOAD_EXTENSIONS
+        )
+        raise ValueError(msg)
+
+    frame.columns = frame.columns.str.strip().str.lower()
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        msg = f"Missing required columns: {', '.join(missing)}"
+        raise ValueError(msg)
+    return frame
+
+
+def ean13_is_valid(barcodes: "pd.Series") -> "np.ndarray":
+    """Vectorized EAN-13 check (format and checksum) of a column of strings."""
+    valid = (
+        barcodes.str.fullmatch(r"[0-9]{13}").fillna(value=False).to_numpy(dtype=bool)
+    ).copy()
+    if not valid.any():
+        return valid
+
+    digits = np.frombuffer(
+        "".join(barcodes[valid]).encode("ascii"), dtype=np.uint8
+    ).reshape(-1, EAN13_LENGTH).astype(np.int64) - ord("0")
+    checksum = (10 - (digits[:, :-1] @ EAN13_WEIGHTS) % 10) % 10
+    valid[valid] = checksum == digits[:, -1]
+    return valid
+
+
+def validate_sheet(
+    frame: "pd.DataFrame",
+) -> tuple["pd.DataFrame", list[dict[str, Any]]]:
+    """
+    Validate every row of a sheet at once.
+
+    :return: the valid rows (barcode, name, description and numeric columns
+        converted to floats, NaN for empty cells) and the list of errors, each
+        with its sheet ``row`` number, ``column`` and ``message``.
+    """
+    frame = frame.copy()
+    frame["barcode"] = frame["barcode"].str.strip()
+    frame["name"] = frame["name"].str.strip()
+    rows = np.arange(len(frame)) + FIRST_DATA_ROW
+    errors: list[dict[str, Any]] = []
+
+    def report(mask: "np.ndarray", column: str, message: str) -> None:
+        errors.extend(
+            {"row": int(row), "column": column, "message": message}
+            for row in rows[mask]
+        )
+
+    report(~ean13_is_valid(frame["barcode"]), "barcode", "Invalid EAN-13 barcode.")
+    report(
+        frame["barcode"].duplicated(keep=False).to_numpy(),
+        "barcode",
+        "Barcode appears more than once in the sheet.",
+    )
+    report((frame["name"] == "").to_numpy(), "name", "Name is required.")
+    report(
+        (frame["name"].str.len() > NAME_MAX_LENGTH).to_numpy(),
+        "name",
+        f"Name is longer than {NAME_MAX_LENGTH} characters.",
+    )
+
+    present = [column for column in NUMERIC_COLUMNS if column in frame.columns]
+    for column in present:
+        text = frame[column].str.strip()
+        values = pd.to_numeric(text, errors="coerce")
+        report((values.isna() & (text != "")).to_numpy(), column, "Not a number.")
+        maximum = ENERGY_MAX if column == "energy" else MACRONUTRIENT_MAX
+        report(
+            ((values < 0) | (values > maximum)).to_numpy(),
+            column,
+            f"Must be between 0 and {maximum:g}.",
+        )
+        frame[column] = values
+
+    for sub, parent in SUB_MACRONUTRIENTS:
+        if sub in present and parent in present:
+            report(
+                (frame[sub] > frame[parent]).to_numpy(),
+                sub,
+                f"Cannot exceed {parent}.",
+            )
+
+    totals = [column for column in TOTAL_MACRONUTRIENTS if column in present]
+    if totals:
+        report(
+            (
+                frame[totals].sum(axis=1) > MACRONUTRIENT_MAX + TOTAL_TOLERANCE
+            ).to_numpy(),
+            ",".join(totals),
+            f"Total exceeds {MACRONUTRIENT_MAX:g} g per 100 g.",
+        )
+
+    invalid_rows = {error["row"] for error in errors}
+    valid = frame[~np.isin(rows, list(invalid_rows))]
+    errors.sort(key=lambda error: error["row"])
+    return valid, errors
+
+
+def upsert_products(
+    frame: "pd.DataFrame",
+    chunk_size: int = BULK_UPLOAD_CHUNK_SIZE,
+    progress: ProgressCallback | None = None,
+) -> int:
+    """
+    Create or update validated rows, one transaction per chunk.
+
+    Each chunk costs one ``INSERT ... ON CONFLICT`` and one search vectors
+    ``UPDATE`` for products, then one ``INSERT ... ON CONFLICT`` and one
+    ``DELETE`` for macronutrient amounts.
+
+    :return: number of upserted products
+    """
+    # deleted_at: upserting a product marked deleted revives it
+    update_fields = ["name", "nutrition_score_stale", "updated_at", "deleted_at"]
+    update_fields += [
+        column for column in ("description", "energy") if column in frame.columns
+    ]
+    macronutrients = [
+        column for column in MACRONUTRIENT_COLUMNS if column in frame.columns
+    ]
+    records: list[dict[str, Any]] = (
+        frame.astype(object).where(frame.notna(), None).to_dict("records")
+    )
+
+    done = 0
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start : start + chunk_size]
+
+        with transaction.atomic():
+            Product.objects.bulk_create(
+                [
+                    Product(
+                        barcode=record["barcode"],
+                        name=record["name"],
+                        description=record.get("description") or "",
+                        energy=None
+                        if record.get("energy") is None
+                        else ureg.Quantity(record["energy"], DEFAULT_ENERGY_UNIT),
+                        nutrition_score_stale=True,
+                    )
+                    for record in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=["barcode"],
+                update_fields=update_fields,
+            )
+
+            update_search_vectors(record["barcode"] for record in chunk)
+            notify_products_changed(
+                (record["barcode"] for record in chunk), "products.saved"
+            )
+
+            if macronutrients:
+                write_macronutrient_amounts(
+                    {
+                        record["barcode"]: {
+                            name: record[name] for name in macronutrients
+                        }
+                        for record in chunk
+                    }
+                )
+
+        done += len(chunk)
+        if progress is not None:
+            progress(done, len(records))
+
+    return done
+
+
+def import_products_sheet(
+    file: IO[bytes],
+    filename: str,
+    chunk_size: int = BULK_UPLOAD_CHUNK_SIZE,
+    progress: ProgressCallback | None = None,
+) -> dict[str, Any]:
+    """
+    Load, validate and upsert a products sheet.
+
+    Invalid rows are skipped and reported, valid rows are imported.
+
+    :return: ``rows`` (total), ``imported`` and ``errors``
+    """
+    frame = read_sheet(file, filename)
+    valid, errors = validate_sheet(frame)
+    imported = upsert_products(valid, chunk_size=chunk_size, progress=progress)
+    return {"rows": len(frame), "imported": imported, "errors": errors}
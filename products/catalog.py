@@ -0,0 +1,122 @@
+"""
+Process-wide cache of the macronutrient catalog, of the ingredient reference
+names and of static form fragments.
+
+``Macronutrient`` and ``IngredientRef`` rows change very rarely (admin only)
+but are read by every product form. They are loaded once per process and
+reused until the catalog version, stored in the Django cache so that all
+processes share it, is bumped by their signals once the change is committed.
+Checking the version is a cache lookup, not a database query.
+
+Snapshots also expire after ``CATALOG_MAX_AGE`` seconds, so a lost version
+(cache restarted or evicted) cannot keep stale rows forever.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Final
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString
+from django.utils.translation import get_language
+
+from .models import IngredientRef
+from .models import Macronutrient
+
+CATALOG_VERSION_CACHE_KEY: Final = "products:catalog_version"
+CATALOG_MAX_AGE: Final = 300.0
+
+
+@dataclass
+class _CatalogSnapshot:
+    version: int | None = None
+    loaded_at: float = 0.0
+    macronutrients: tuple[Macronutrient, ...] = ()
+    # Lower-cased IngredientRef names, loaded on first use
+    reference_names: frozenset[str] | None = None
+    # (template name, fragment id, language) -> rendered fragment
+    fragments: dict[tuple[str, str, str | None], SafeString] = field(
+        default_factory=dict
+    )
+
+
+_snapshot = _CatalogSnapshot()
+_lock = threading.Lock()
+
+
+def get_catalog_version() -> int:
+    return cache.get_or_set(CATALOG_VERSION_CACHE_KEY, 1, timeout=None)
+
+
+def bump_catalog_version() -> None:
+    """Invalidate the catalog snapshots of every process."""
+    try:
+        cache.incr(CATALOG_VERSION_CACHE_KEY)
+    except ValueError:  # key missing (expired or cache restarted)
+        cache.set(CATALOG_VERSION_CACHE_KEY, 1, timeout=None)
+    clear_catalog_cache()
+
+
+def clear_catalog_cache() -> None:
+    """Drop the snapshot of the current process."""
+    with _lock:
+        _snapshot.version = None
+
+
+def _current_snapshot() -> _CatalogSnapshot:
+    version = get_catalog_version()
+    with _lock:
+        if (
+            _snapshot.version != version
+            or time.monotonic() - _snapshot.loaded_at > CATALOG_MAX_AGE
+        ):
+            _snapshot.macronutrients = tuple(Macronutrient.objects.all())
+            _snapshot.reference_names = None
+            _snapshot.fragments = {}
+            _snapshot.version = version
+            _snapshot.loaded_at = time.monotonic()
+        return _snapshot
+
+
+def get_macronutrients() -> tuple[Macronutrient, ...]:
+    """Return all macronutrients (ordered by ``order_index``)."""
+    return _current_snapshot().macronutrients
+
+
+def get_ingredient_reference_names() -> frozenset[str]:
+    """Return the names of the ingredient references, lower-cased."""
+    snapshot = _current_snapshot()
+    with _lock:
+        if snapshot.reference_names is None:
+            snapshot.reference_names = frozenset(
+                name.lower()
+                for name in IngredientRef.objects.values_list("name", flat=True)
+            )
+        return snapshot.reference_names
+
+
+def get_graph_container_fragment(
+    loader_id: str,
+    graph_id: str,
+    loader_text: str,
+) -> SafeString:
+    """Render ``graph_container.html`` once per graph and language."""
+    template_name = "products/components/graph_container.html"
+    snapshot = _current_snapshot()
+    key = (template_name, graph_id, get_language())
+    fragment = snapshot.fragments.get(key)
+    if fragment is None:
+        fragment = render_to_string(
+            template_name=template_name,
+            context={
+                "loader_id": loader_id,
+                "graph_id": graph_id,
+                "loader_text": loader_text,
+            },
+        )
+        with _lock:
+            snapshot.fragments[key] = fragment
+    return fragment
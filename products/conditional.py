@@ -0,0 +1,132 @@
+"""
+Conditional GET (ETag / Last-Modified) of product responses.
+
+Validators are derived from ``Product.updated_at`` only: answering a
+revalidation costs one primary key lookup, and a 304 is returned before the
+view renders anything or queries related tables. Views can reuse the product
+loaded by that lookup with ``get_conditional_product``.
+
+``product_condition`` decorates Django views and, through
+``ninja.decorators.decorate_view``, ninja operations whose URL captures the
+product primary key as ``pk`` or ``barcode``. Its validators are synchronous:
+async views load the product beforehand with ``preload_conditional_product``,
+so that they only read the request cache.
+
+Edit pages (``product_form_condition``) also embed a CSRF token and the
+macronutrient catalog: their ETag covers the CSRF secret of the client and
+the catalog version, and they have no ``Last-Modified`` (a revalidation with
+``If-Modified-Since`` alone would ignore both).
+"""
+
+import datetime as dt
+import hashlib
+from collections.abc import Awaitable
+from collections.abc import Callable
+from functools import wraps
+from typing import Any
+
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from .catalog import get_catalog_version
+from .models import Product
+
+# Query parameters whose responses do not only depend on the stored product
+# (e.g. "reset" re-fetches Open Food Facts data): no validators for them.
+UNCACHEABLE_PARAMS = frozenset({"reset"})
+
+
+def _product_pk(kwargs: dict[str, Any]) -> str | None:
+    return kwargs.get("pk") or kwargs.get("barcode")
+
+
+def _conditional_cache(request: HttpRequest) -> dict[str, Product | None]:
+    return request.__dict__.setdefault("_conditional_products", {})
+
+
+def _conditional_queryset(pk: str) -> QuerySet[Product]:
+    return Product.objects.defer("search_vector").filter(pk=pk)
+
+
+def get_conditional_product(request: HttpRequest, pk: str) -> Product | None:
+    """
+    Return the product (all columns but the search vector), loaded once per
+    request: by the validators, then reused by the view.
+    """
+    cache = _conditional_cache(request)
+    if pk not in cache:
+        cache[pk] = _conditional_queryset(pk).first()
+    return cache[pk]
+
+
+async def aget_conditional_product(request: HttpRequest, pk: str) -> Product | None:
+    """Async ``get_conditional_product``, sharing its request cache."""
+    cache = _conditional_cache(request)
+    if pk not in cache:
+        cache[pk] = await _conditional_queryset(pk).afirst()
+    return cache[pk]
+
+
+def preload_conditional_product(
+    view: Callable[..., Awaitable[HttpResponse]],
+) -> Callable[..., Awaitable[HttpResponse]]:
+    """
+    Decorate an async view, outside ``product_condition``: load the product
+    with the async ORM before the validators run.
+    """
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        pk = _product_pk(kwargs)
+        if pk is not None:
+            await aget_conditional_product(request, pk)
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def product_last_modified(
+    request: HttpRequest, *args: Any, **kwargs: Any
+) -> dt.datetime | None:
+    """Return ``updated_at`` of the requested product."""
+    if not UNCACHEABLE_PARAMS.isdisjoint(request.GET):
+        return None
+    pk = _product_pk(kwargs)
+    if pk is None:
+        return None
+    product = get_conditional_product(request, pk)
+    return None if product is None else product.updated_at
+
+
+def product_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> str | None:
+    """Return the ETag of the requested product (``None`` if it does not exist)."""
+    updated_at = product_last_modified(request, *args, **kwargs)
+    if updated_at is None:
+        return None
+    # Rendered pages are translated: the language is part of the representation
+    return f"{_product_pk(kwargs)}-{updated_at.timestamp():.6f}-{get_language()}"
+
+
+product_condition = condition(
+    etag_func=product_etag,
+    last_modified_func=product_last_modified,
+)
+
+
+def product_form_etag(request: HttpRequest, *args: Any, **kwargs: Any) -> str | None:
+    """Return the ETag of the edit page of the requested product."""
+    etag = product_etag(request, *args, **kwargs)
+    if etag is None:
+        return None
+    # Sets the CSRF secret (and its cookie) when the client has none yet: the
+    # page rendered next embeds a token of this secret.
+    get_token(request)
+    csrf = hashlib.sha256(request.META["CSRF_COOKIE"].encode()).hexdigest()[:16]
+    return f"{etag}-{get_catalog_version()}-{csrf}"
+
+
+product_form_condition = condition(etag_func=product_form_etag)
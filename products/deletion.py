@@ -0,0 +1,86 @@
+"""
+Bulk deletion of products: mark now, purge in the background.
+
+Deleting a product through the ORM collects its ingredients (self-referencing
+tree), macronutrients and vitamins, sends a signal per product and deletes its
+image inline: for thousands of products, a long request holding locks on all
+of them. Instead:
+
+- ``mark_products_deleted`` sets ``Product.deleted_at`` (one ``UPDATE``): the
+  default manager hides the products at once;
+- ``purge_deleted_products`` (Celery job, enqueued on commit) deletes them by
+  batches, each batch in its own short transaction with one ``DELETE`` per
+  table (foreign keys are checked at commit, so the order does not matter),
+  and without loading the rows;
+- image files are deleted afterwards by another job, once the rows are gone.
+
+Saving a marked product again before the purge (form, upserts) revives it.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+from typing import Final
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Ingredient
+from .models import Product
+from .models import ProductMacronutrient
+from .models import ProductVitamin
+from .notifications import notify_products_changed
+
+PURGE_BATCH_SIZE: Final = 500
+
+
+def mark_products_deleted(barcodes: Iterable[str]) -> int:
+    """
+    Hide products at once (see ``products.tasks.start_products_deletion``).
+
+    :return: number of products marked (already marked ones are not counted)
+    """
+    barcodes = list(barcodes)
+    now = timezone.now()
+    marked = Product.objects.filter(barcode__in=barcodes).update(
+        deleted_at=now, updated_at=now
+    )
+    if marked:
+        notify_products_changed(barcodes, "products.deleted")
+    return marked
+
+
+def purge_deleted_products(batch_size: int = PURGE_BATCH_SIZE) -> dict[str, Any]:
+    """
+    Delete the marked products with their related rows, by batches.
+
+    Batches are locked with ``SKIP LOCKED``: concurrent purges share the work.
+    Image files are not deleted here.
+
+    :return: ``{"products": int, "images": [storage names]}``
+    """
+    purged = 0
+    images: list[str] = []
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Product.all_objects.filter(deleted_at__isnull=False)
+                .select_for_update(skip_locked=True)
+                .order_by("barcode")
+                .values_list("barcode", "image")[:batch_size]
+            )
+            if not batch:
+                return {"products": purged, "images": images}
+
+            barcodes = [barcode for barcode, _image in batch]
+            # Single statements, no collection nor signals (the ingredient
+            # tree goes at once: its parents are in the same DELETE).
+            for queryset in (
+                Ingredient.objects.filter(product_id__in=barcodes),
+                ProductMacronutrient.objects.filter(product_id__in=barcodes),
+                ProductVitamin.objects.filter(product_id__in=barcodes),
+                Product.all_objects.filter(barcode__in=barcodes),
+            ):
+                queryset._raw_delete(queryset.db)  # noqa: SLF001
+
+        purged += len(batch)
+        images += [image for _barcode, image in batch if image]
@@ -0,0 +1,237 @@
+"""
+Columnar (Parquet) export of the product catalog.
+
+Products are streamed with a server-side cursor and processed chunk by chunk:
+for each chunk, related rows are loaded with one query per table and written
+as one Parquet part per table, so memory stays bounded by the chunk size
+whatever the catalog size.
+
+Layout of the output directory::
+
+    products/part-00000.parquet
+    product_macronutrients/part-00000.parquet
+    product_vitamins/part-00000.parquet
+    ingredients/part-00000.parquet
+
+Quantities are exported as float magnitudes in base units (kJ, g, mg) and the
+ingredient tree is flattened with the ``path`` and ``depth`` of each node.
+"""
+
+import logging
+import time
+from collections.abc import Sequence
+from itertools import batched
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+
+from config.lazy_imports import lazy_import
+
+from .models import Ingredient
+from .models import Product
+from .models import ProductMacronutrient
+from .models import ProductVitamin
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from django.db.models import QuerySet
+else:
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_SIZE: Final = 5000
+
+# Separator between ingredient names in the flattened ``path`` column.
+INGREDIENT_PATH_SEPARATOR: Final = " > "
+
+PRODUCT_COLUMNS: Final = [
+    "barcode",
+    "name",
+    "description",
+    "image",
+    "created_at",
+    "energy_kj",
+    "nutrition_score",
+    "nutrition_grade",
+]
+MACRONUTRIENT_COLUMNS: Final = ["barcode", "macronutrient", "amount_g"]
+VITAMIN_COLUMNS: Final = ["barcode", "vitamin", "amount_mg"]
+INGREDIENT_COLUMNS: Final = [
+    "id",
+    "barcode",
+    "parent_id",
+    "name",
+    "percentage",
+    "reference_id",
+    "depth",
+    "path",
+]
+
+
+def flatten_ingredients(rows: list[tuple[Any, ...]]) -> "pd.DataFrame":
+    """
+    Add ``depth`` and ``path`` to ingredient rows.
+
+    :param rows: ``(id, barcode, parent_id, name, percentage, reference_id)``
+        tuples, containing every ingredient of the products they belong to.
+    """
+    by_id: dict[int, tuple[Any, ...]] = {row[0]: row for row in rows}
+    resolved: dict[int, tuple[int, str]] = {}
+
+    def resolve(ingredient_id: int) -> tuple[int, str]:
+        # Walk up to the first resolved ancestor (or the root), then resolve
+        # the chain downwards, without recursion.
+        chain: list[int] = []
+        current: int | None = ingredient_id
+        while current is not None and current not in resolved:
+            chain.append(current)
+            current = by_id[current][2]
+        for node_id in reversed(chain):
+            parent_id = by_id[node_id][2]
+            name = by_id[node_id][3]
+            if parent_id is None:
+                resolved[node_id] = (0, name)
+            else:
+                parent_depth, parent_path = resolved[parent_id]
+                resolved[node_id] = (
+                    parent_depth + 1,
+                    f"{parent_path}{INGREDIENT_PATH_SEPARATOR}{name}",
+                )
+        return resolved[ingredient_id]
+
+    return pd.DataFrame.from_records(
+        [(*row, *resolve(row[0])) for row in rows],
+        columns=INGREDIENT_COLUMNS,
+    )
+
+
+def _write_part(frame: "pd.DataFrame", output_dir: Path, table: str, part: int) -> None:
+    table_dir = output_dir / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+    frame.to_parquet(table_dir / f"part-{part:05d}.parquet", index=False)
+
+
+def _product_rows(
+    products: "QuerySet[Product]",
+) -> "QuerySet[Product, tuple[Any, ...]]":
+    return products.order_by("barcode").values_list(
+        "barcode",
+        "name",
+        "description",
+        "image",
+        "created_at",
+        Cast("energy", output_field=FloatField()),
+        "nutrition_score",
+        "nutrition_grade",
+    )
+
+
+def export_catalog_part(
+    product_rows: Sequence[tuple[Any, ...]], output_dir: Path, part: int
+) -> dict[str, int]:
+    """
+    Write one Parquet part per table for a chunk of products.
+
+    Parts are overwritten: exporting a chunk again gives the same files.
+
+    :return: rows written per table
+    """
+    barcodes = [row[0] for row in product_rows]
+
+    tables: dict[str, pd.DataFrame] = {
+        "products": pd.DataFrame.from_records(product_rows, columns=PRODUCT_COLUMNS),
+        "product_macronutrients": pd.DataFrame.from_records(
+            ProductMacronutrient.objects.filter(product_id__in=barcodes)
+            .order_by("product_id", "macronutrient_id")
+            .values_list(
+                "product_id",
+                "macronutrient_id",
+                Cast("amount", output_field=FloatField()),
+            ),
+            columns=MACRONUTRIENT_COLUMNS,
+        ),
+        "product_vitamins": pd.DataFrame.from_records(
+            ProductVitamin.objects.filter(product_id__in=barcodes)
+            .order_by("product_id", "vitamin_id")
+            .values_list(
+                "product_id",
+                "vitamin_id",
+                Cast("amount", output_field=FloatField()),
+            ),
+            columns=VITAMIN_COLUMNS,
+        ),
+        "ingredients": flatten_ingredients(
+            list(
+                Ingredient.objects.filter(product_id__in=barcodes)
+                .order_by("product_id", "id")
+                .values_list(
+                    "id",
+                    "product_id",
+                    "parent_id",
+                    "name",
+                    "percentage",
+                    "reference_id",
+                )
+            )
+        ),
+    }
+
+    for table, frame in tables.items():
+        _write_part(frame, output_dir, table, part)
+    return {table: len(frame) for table, frame in tables.items()}
+
+
+def export_products_part(
+    products: "QuerySet[Product]", output_dir: Path, part: int
+) -> int:
+    """
+    Export a chunk of products as part ``part`` (chunked export job).
+
+    :return: number of products exported
+    """
+    rows = export_catalog_part(list(_product_rows(products)), output_dir, part)
+    return rows["products"]
+
+
+def export_catalog(
+    output_dir: Path,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> dict[str, Any]:
+    """
+    Export the catalog as partitioned Parquet files in ``output_dir``.
+
+    :return: export statistics (rows per table, duration and throughput)
+    """
+    started = time.perf_counter()
+    rows: dict[str, int] = {
+        "products": 0,
+        "product_macronutrients": 0,
+        "product_vitamins": 0,
+        "ingredients": 0,
+    }
+
+    products = _product_rows(Product.objects.all()).iterator(chunk_size=chunk_size)
+    for part, product_rows in enumerate(batched(products, chunk_size)):
+        for table, count in export_catalog_part(product_rows, output_dir, part).items():
+            rows[table] += count
+
+        logger.info(
+            "Catalog export: part %d written (%d products so far)",
+            part,
+            rows["products"],
+        )
+
+    duration = time.perf_counter() - started
+    stats: dict[str, Any] = {
+        "output_dir": str(output_dir),
+        "rows": rows,
+        "duration_s": round(duration, 3),
+        "products_per_s": round(rows["products"] / duration, 1) if duration else 0.0,
+    }
+    logger.info("Catalog export finished: %s", stats)
+    return stats
@@ -1,8 +1,6 @@
-import io
 from typing import TYPE_CHECKING
 from typing import Any
 
-import requests
 from crispy_bootstrap5.bootstrap5 import BS5Accordion
 from crispy_bootstrap5.bootstrap5 import FloatingField
 
@@ -19,26 +17,36 @@ from crispy_forms.layout import Layout
 from crispy_forms.layout import Row
 from crispy_forms.layout import Submit
 from django import forms
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.template.loader import render_to_string
+from django.core.validators import FileExtensionValidator
+from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from quantityfield.fields import QuantityFormField
 
+from config.lazy_imports import lazy_import
 from opennutrilab.crispy_bootstrap_extended.layouts import AccordionGroupExtended
+from products.openfoodfacts.telemetry import off_call
 from products.openfoodfacts.utils import save_ingredients_from_schema
 
+from .amounts import write_macronutrient_amounts
+from .bulk_upload import BULK_UPLOAD_EXTENSIONS
+from .catalog import get_graph_container_fragment
+from .catalog import get_macronutrients
 from .models import Macronutrient
 from .models import Product
 from .models import ProductMacronutrient
 
 if TYPE_CHECKING:
+    import requests
     from django.forms.widgets import Widget
     from django.utils.safestring import SafeText
     from pint import Quantity
 
     from products.openfoodfacts.schema import OFFIngredientSchema
+else:
+    requests = lazy_import("requests")
 
 
 class ProductForm(forms.ModelForm):
@@ -74,23 +82,22 @@ class ProductForm(forms.ModelForm):
             self.extra_data.get("fetched_image_url") if self.extra_data else None
         )
 
-        # Configure Graph container template
-        macronutrients_graph_container_template: SafeText = render_to_string(
-            template_name="products/components/graph_container.html",
-            context={
-                "loader_id": "macronutrients_graph_loader",
-                "graph_id": "macronutrients_graph",
-                "loader_text": _("Loading macronutrients graph..."),
-            },
+        # Macronutrient catalog, cached process-wide (see products.catalog)
+        self.macronutrients: tuple[Macronutrient, ...] = get_macronutrients()
+
+        # Configure Graph container template (rendered once per process)
+        macronutrients_graph_container_template: SafeText = (
+            get_graph_container_fragment(
+                loader_id="macronutrients_graph_loader",
+                graph_id="macronutrients_graph",
+                loader_text=_("Loading macronutrients graph..."),
+            )
         )
 
-        ingredients_table_container_template: SafeText = render_to_string(
-            template_name="products/components/graph_container.html",
-            context={
-                "loader_id": "ingredients_graph_loader",
-                "graph_id": "ingredients_table",
-                "loader_text": _("Loading ingredients table..."),
-            },
+        ingredients_table_container_template: SafeText = get_graph_container_fragment(
+            loader_id="ingredients_graph_loader",
+            graph_id="ingredients_table",
+            loader_text=_("Loading ingredients table..."),
         )
 
         # --------------------------------------------------------------------
@@ -215,7 +222,17 @@ class ProductForm(forms.ModelForm):
         _("Fiber")
         _("Proteins")
 
-        for macronutrient in Macronutrient.objects.all():
+        # Prefill all amounts of an existing product with a single query
+        initial_amounts: dict[str, Quantity] = {}
+        if self.instance and self.instance.pk:
+            initial_amounts = dict(
+                ProductMacronutrient.objects.filter(
+                    product=self.instance,
+                    amount__isnull=False,
+                ).values_list("macronutrient_id", "amount")
+            )
+
+        for macronutrient in self.macronutrients:
             form_field: QuantityFormField = ProductMacronutrient._meta.get_field(  # noqa: SLF001
                 field_name="amount",
             ).formfield(
@@ -223,17 +240,9 @@ class ProductForm(forms.ModelForm):
             )
             form_field.label = _(str(macronutrient))
 
-            if self.instance and self.instance.pk:
-                amount_value: Quantity | None = (
-                    ProductMacronutrient.objects.filter(
-                        product=self.instance,
-                        macronutrient=macronutrient,
-                    )
-                    .values_list("amount", flat=True)
-                    .first()
-                )
-                if amount_value is not None:
-                    form_field.initial = amount_value
+            amount_value: Quantity | None = initial_amounts.get(macronutrient.name)
+            if amount_value is not None:
+                form_field.initial = amount_value
 
             self.fields[macronutrient.name_in_form] = form_field
 
@@ -248,7 +257,7 @@ class ProductForm(forms.ModelForm):
                 text="",
                 css_class="plot-input",
             )
-            for m in Macronutrient.objects.all()
+            for m in self.macronutrients
         ]
         return layout_fields
 
@@ -274,56 +283,91 @@ class ProductForm(forms.ModelForm):
     def save(self, commit: bool = True):  # noqa: FBT001, FBT002
         # Save Product object without committing
         product: Product = super().save(commit=False)
+        # Re-creating a product marked deleted (not purged yet) revives it
+        product.deleted_at = None
 
-        # Assign fetched image if needed
+        # Network first (image download and storage upload), outside of any
+        # transaction: no connection nor row lock is held while waiting.
         fetched_image_url = getattr(self, "extra_data", {}).get("fetched_image_url")
         if fetched_image_url and not self.cleaned_data.get("image"):
-            resp = requests.get(fetched_image_url, timeout=10)
+            with off_call("image_download", self.cleaned_data["barcode"]) as call:
+                resp = requests.get(fetched_image_url, timeout=10)
+                call.response(resp.status_code, resp.content)
             resp.raise_for_status()
             filename = f"{self.cleaned_data['barcode']}.jpg"
             path = f"images/products/{filename}"
             if default_storage.exists(path):
                 default_storage.delete(path)
 
-            product.image = InMemoryUploadedFile(  # pyright: ignore[reportAttributeAccessIssue]
-                io.BytesIO(resp.content),
-                field_name="image",
-                name=filename,
-                content_type="image/jpeg",
-                size=len(resp.content),
-                charset=None,
-            )
-
-        # Handle macronutrients
-        for macronutrient in Macronutrient.objects.all():
-            field_name = macronutrient.name_in_form
-            value: Quantity | None = self.cleaned_data.get(field_name)
-            if value:
-                ProductMacronutrient.objects.update_or_create(
-                    product=product,
-                    macronutrient=macronutrient,
-                    defaults={"amount": value},
-                )
-            else:
-                ProductMacronutrient.objects.filter(
-                    product=product,
-                    macronutrient=macronutrient,
-                ).delete()
+            product.image.save(filename, ContentFile(resp.content), save=False)
 
         ingredients_schema: list[OFFIngredientSchema] | None = (
             self.extra_data.get("ingredients") if hasattr(self, "extra_data") else None
         )
 
-        if ingredients_schema:
-            product.ingredients.all().delete()
-
-            save_ingredients_from_schema(
-                ingredients_schema,
-                product=product,
-                parent=None,
+        # Then only the database writes, atomically. No savepoint when nested:
+        # an error already rolls back the enclosing block.
+        with transaction.atomic(savepoint=False):
+            # Handle macronutrients (one upsert and one delete for all of them)
+            write_macronutrient_amounts(
+                {
+                    product.pk: {
+                        macronutrient.name: self.cleaned_data.get(
+                            macronutrient.name_in_form
+                        )
+                        or None
+                        for macronutrient in self.macronutrients
+                    }
+                }
             )
 
-        if commit:
-            product.save()
+            if ingredients_schema:
+                product.ingredients.all().delete()
+
+                save_ingredients_from_schema(
+                    ingredients_schema,
+                    product=product,
+                    parent=None,
+                )
+
+            if commit:
+                product.save()
 
         return product
+
+
+class ProductBulkUploadForm(forms.Form):
+    file = forms.FileField(
+        label=_("Spreadsheet"),
+        help_text=_(
+            "CSV or XLSX file with barcode and name columns, optionally "
+            "description, energy (kJ) and macronutrients (g per 100g)."
+        ),
+        validators=[
+            FileExtensionValidator(
+                allowed_extensions=[
+                    extension.lstrip(".") for extension in BULK_UPLOAD_EXTENSIONS
+                ]
+            )
+        ],
+    )
+
+    def __init__(
+        self,
+        *args,  # pyright: ignore[reportMissingParameterType, reportUnknownParameterType]
+        **kwargs,  # pyright: ignore[reportMissingParameterType, reportUnknownParameterType]
+    ):
+        super().__init__(*args, **kwargs)  # pyright: ignore[reportUnknownArgumentType]
+        self.helper = FormHelper()
+        self.helper.form_id = "product-bulk-upload-form"
+        self.helper.layout = Layout(
+            Field("file"),
+            FormActions(
+                Submit(name=_("upload"), value=_("Upload"), css_class="btn-primary"),
+                HTML(
+                    f'<a class="btn btn-secondary ms-2" '
+                    f'href="{reverse("list_products")}">' + _("Cancel") + "</a>",
+                ),
+                css_class="mt-3",  # Add margin top
+            ),
+        )
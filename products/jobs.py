@@ -0,0 +1,350 @@
+"""
+Catalog jobs fanned out to Celery workers, chunk by chunk.
+
+A job (rescoring, export, ...) splits the barcode keyspace into consecutive
+ranges of ``chunk_size`` products, read with one scan of the primary key. The
+first range is open below and the last one above, so products created after
+the split still belong to exactly one chunk. All chunks are dispatched at once
+as a chord, whose callback records the outcome of the job. For each kind of
+job:
+
+- the queue of its chunk task: ``io`` for chunks waiting on the network (Open
+  Food Facts, storage), served by a threads pool; ``cpu`` for pandas/NumPy
+  chunks, served by prefork (one process per core);
+- ``rate_limit`` of its chunk task: Celery limit, per worker;
+- ``max_concurrency``: chunks of one job running at once over all workers. A
+  chunk over the cap is retried after ``SLOT_RETRY_DELAY`` (leases expire
+  with the task time limit, a killed worker does not hold its slot forever).
+
+Chunks must be idempotent: they are acknowledged once done (a chunk whose
+worker died is delivered again) and retried on database errors. The chunks
+done are recorded with the progress of the job, so a chunk delivered again
+after completing is skipped.
+
+Job state lives in Redis (``JOBS_REDIS_URL``), for a week. Without it
+(tests, single process), it lives in the process.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from itertools import batched
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+from uuid import uuid4
+
+from celery import Task
+from celery import chord
+from django.conf import settings
+from django.db import InterfaceError
+from django.db import OperationalError
+
+from config.lazy_imports import lazy_import
+
+from .notifications import notify_job
+
+if TYPE_CHECKING:
+    import redis
+    from django.db.models import QuerySet
+
+    from .models import Product
+else:
+    redis = lazy_import("redis")
+
+logger = logging.getLogger(__name__)
+
+IO_QUEUE: Final = "io"
+CPU_QUEUE: Final = "cpu"
+
+JOB_KEY_PREFIX: Final = "opennutrilab:jobs"
+JOB_STATE_TTL: Final = 7 * 24 * 3600
+# Seconds before a chunk over the concurrency cap of its job tries again
+SLOT_RETRY_DELAY: Final = 5
+CHUNK_MAX_RETRIES: Final = 5
+
+# Barcodes after which (exclusive) and until which (inclusive, None: no upper
+# bound) a chunk runs
+BarcodeRange = tuple[str, str | None]
+ChunkRunner = Callable[["QuerySet[Product]", int, dict[str, Any]], int]
+
+
+def split_barcode_ranges(
+    queryset: "QuerySet[Product]", chunk_size: int
+) -> list[BarcodeRange]:
+    """Split the products of ``queryset`` into ranges of ``chunk_size`` products."""
+    barcodes = (
+        queryset.order_by("barcode")
+        .values_list("barcode", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    ranges: list[BarcodeRange] = []
+    after = ""
+    for chunk in batched(barcodes, chunk_size):
+        ranges.append((after, chunk[-1]))
+        after = chunk[-1]
+    if ranges:
+        ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def filter_barcode_range(
+    queryset: "QuerySet[Product]", barcode_range: BarcodeRange
+) -> "QuerySet[Product]":
+    after, until = barcode_range
+    queryset = queryset.filter(barcode__gt=after)
+    if until is not None:
+        queryset = queryset.filter(barcode__lte=until)
+    return queryset
+
+
+class _RedisJobStore:
+    def __init__(self, url: str) -> None:
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+
+    def start(self, job_id: str, state: dict[str, Any]) -> None:
+        key = f"{JOB_KEY_PREFIX}:{job_id}"
+        with self._client.pipeline() as pipe:
+            pipe.hset(key, mapping=state)
+            pipe.expire(key, JOB_STATE_TTL)
+            pipe.execute()
+
+    def get(self, job_id: str) -> dict[str, str]:
+        return self._client.hgetall(f"{JOB_KEY_PREFIX}:{job_id}")  # pyright: ignore[reportReturnType]
+
+    def update(self, job_id: str, state: dict[str, Any]) -> None:
+        self._client.hset(f"{JOB_KEY_PREFIX}:{job_id}", mapping=state)
+
+    def chunk_done(self, job_id: str, index: int, processed: int) -> bool:
+        key = f"{JOB_KEY_PREFIX}:{job_id}"
+        if not self._client.sadd(f"{key}:chunks", index):
+            return False
+        with self._client.pipeline() as pipe:
+            pipe.expire(f"{key}:chunks", JOB_STATE_TTL)
+            pipe.hincrby(key, "done", 1)
+            pipe.hincrby(key, "processed", processed)
+            pipe.execute()
+        return True
+
+    def is_chunk_done(self, job_id: str, index: int) -> bool:
+        return bool(self._client.sismember(f"{JOB_KEY_PREFIX}:{job_id}:chunks", index))
+
+    def acquire_slot(self, job_id: str, index: int, limit: int) -> bool:
+        key = f"{JOB_KEY_PREFIX}:{job_id}:slots"
+        now = time.time()
+        with self._client.pipeline() as pipe:
+            pipe.zremrangebyscore(key, "-inf", now)
+            pipe.zadd(key, {str(index): now + settings.CELERY_TASK_TIME_LIMIT})
+            pipe.expire(key, JOB_STATE_TTL)
+            pipe.zcard(key)
+            *_, running = pipe.execute()
+        if running <= limit:
+            return True
+        self.release_slot(job_id, index)
+        return False
+
+    def release_slot(self, job_id: str, index: int) -> None:
+        self._client.zrem(f"{JOB_KEY_PREFIX}:{job_id}:slots", str(index))
+
+
+class _LocalJobStore:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._states: dict[str, dict[str, str]] = {}
+        self._chunks: dict[str, set[int]] = {}
+        self._slots: dict[str, set[int]] = {}
+
+    def start(self, job_id: str, state: dict[str, Any]) -> None:
+        with self._lock:
+            self._states[job_id] = {key: str(value) for key, value in state.items()}
+            self._chunks[job_id] = set()
+            self._slots[job_id] = set()
+
+    def get(self, job_id: str) -> dict[str, str]:
+        with self._lock:
+            return dict(self._states.get(job_id, {}))
+
+    def update(self, job_id: str, state: dict[str, Any]) -> None:
+        with self._lock:
+            self._states[job_id].update(
+                {key: str(value) for key, value in state.items()}
+            )
+
+    def chunk_done(self, job_id: str, index: int, processed: int) -> bool:
+        with self._lock:
+            if index in self._chunks[job_id]:
+                return False
+            self._chunks[job_id].add(index)
+            state = self._states[job_id]
+            state["done"] = str(int(state["done"]) + 1)
+            state["processed"] = str(int(state["processed"]) + processed)
+            return True
+
+    def is_chunk_done(self, job_id: str, index: int) -> bool:
+        with self._lock:
+            return index in self._chunks.get(job_id, set())
+
+    def acquire_slot(self, job_id: str, index: int, limit: int) -> bool:
+        with self._lock:
+            slots = self._slots[job_id]
+            if len(slots - {index}) >= limit:
+                return False
+            slots.add(index)
+            return True
+
+    def release_slot(self, job_id: str, index: int) -> None:
+        with self._lock:
+            self._slots[job_id].discard(index)
+
+
+@cache
+def get_job_store() -> _RedisJobStore | _LocalJobStore:
+    if settings.JOBS_REDIS_URL:
+        return _RedisJobStore(settings.JOBS_REDIS_URL)
+    return _LocalJobStore()
+
+
+@dataclass(frozen=True)
+class ChunkedJob:
+    """
+    A kind of catalog job.
+
+    :param chunk_task: task of the chunks, calling ``run_chunk``, see ``ChunkTask``
+    :param scope: products the job covers, from the job options
+    :param run: processes the products of a chunk (within the scope), given
+        with the chunk index and the job options, returns how many it processed
+    """
+
+    name: str
+    chunk_task: Task
+    scope: Callable[[dict[str, Any]], "QuerySet[Product]"]
+    run: ChunkRunner
+    chunk_size: int
+    max_concurrency: int
+
+    def run_chunk(
+        self,
+        job_id: str,
+        index: int,
+        barcode_range: BarcodeRange,
+        options: dict[str, Any],
+    ) -> int:
+        """
+        Run one chunk of a job (from its chunk task), once.
+
+        :return: products processed (0 for a chunk already done)
+        """
+        store = get_job_store()
+        if store.is_chunk_done(job_id, index):
+            return 0
+        if not store.acquire_slot(job_id, index, self.max_concurrency):
+            raise self.chunk_task.retry(countdown=SLOT_RETRY_DELAY, max_retries=None)
+        try:
+            queryset = filter_barcode_range(self.scope(options), barcode_range)
+            processed = self.run(queryset, index, options)
+        finally:
+            store.release_slot(job_id, index)
+
+        if store.chunk_done(job_id, index, processed):
+            state = store.get(job_id)
+            notify_job(
+                job_id,
+                "PROGRESS",
+                progress={"done": int(state["done"]), "total": int(state["total"])},
+            )
+        return processed
+
+
+def get_job_status(job_id: str) -> dict[str, Any] | None:
+    """
+    Status of a job, shaped like the status of a bulk upload.
+
+    :return: ``None`` for an unknown (or expired) job
+    """
+    state = get_job_store().get(job_id)
+    if not state:
+        return None
+    status: dict[str, Any] = {
+        "state": state["state"],
+        "progress": {"done": int(state["done"]), "total": int(state["total"])},
+    }
+    if state["state"] == "SUCCESS":
+        status["result"] = {
+            "chunks": int(state["total"]),
+            "processed": int(state["processed"]),
+        }
+    elif state.get("error"):
+        status["error"] = state["error"]
+    return status
+
+
+def start_chunked_job(
+    job: ChunkedJob, options: dict[str, Any], finish_task: Task
+) -> str:
+    """
+    Split a job into chunks and dispatch them, return the job id.
+
+    :param options: JSON-serializable options of the job, given to its scope
+        and to each chunk
+    :param finish_task: chord callback, see ``finish_chunked_job``
+    """
+    ranges = split_barcode_ranges(job.scope(options), job.chunk_size)
+    job_id = uuid4().hex
+    get_job_store().start(
+        job_id,
+        {
+            "name": job.name,
+            "state": "PROGRESS" if ranges else "SUCCESS",
+            "total": len(ranges),
+            "done": 0,
+            "processed": 0,
+        },
+    )
+    logger.info("Job %s (%s): %d chunks", job_id, job.name, len(ranges))
+    if ranges:
+        chord(
+            job.chunk_task.s(job_id, index, barcode_range, options)
+            for index, barcode_range in enumerate(ranges)
+        )(finish_task.s(job_id))
+    return job_id
+
+
+class ChunkTask(Task):
+    """
+    Base of the chunk tasks: they take ``(job_id, index, barcode_range,
+    options)`` and return ``ChunkedJob.run_chunk`` of their job.
+
+    Acknowledged once done, retried on database errors (connection lost,
+    deadlock, serialization failure), the job marked failed once out of
+    retries.
+    """
+
+    acks_late = True
+    reject_on_worker_lost = True
+    autoretry_for = (OperationalError, InterfaceError)
+    retry_backoff = True
+    max_retries = CHUNK_MAX_RETRIES
+
+    def on_failure(
+        self,
+        exc: Exception,
+        task_id: str,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        einfo: Any,
+    ) -> None:
+        job_id = args[0]
+        get_job_store().update(job_id, {"state": "FAILURE", "error": str(exc)})
+        notify_job(job_id, "FAILURE", error=str(exc))
+
+
+def finish_chunked_job(job_id: str) -> dict[str, Any]:
+    """Record the success of a job once all its chunks are done."""
+    store = get_job_store()
+    store.update(job_id, {"state": "SUCCESS"})
+    status = get_job_status(job_id) or {}
+    notify_job(job_id, "SUCCESS", result=status.get("result"))
+    return status
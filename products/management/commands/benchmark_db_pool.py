@@ -0,0 +1,164 @@
+"""
+Requests/sec of the database access of a request, with and without pool.
+
+Each simulated request, as Django serves them: get a connection, load a page
+of the product list, then release the connection at the end of the request
+(closed without pool, returned to the pool with it). Threads play concurrent
+requests of one process.
+"""
+
+import copy
+import json
+import statistics
+import threading
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.management.base import CommandParser
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.utils import load_backend
+
+from config.db_pool import database_pool_options
+from config.db_pool import pool_stats
+from products.models import Product
+from products.pagination import PRODUCT_LIST_PAGE_SIZE
+from products.views import PRODUCT_LIST_FIELDS
+
+
+def _connection(alias: str, settings_dict: dict[str, Any]) -> BaseDatabaseWrapper:
+    """
+    A connection of the benchmark, set for the current thread only: the
+    configured databases (``connections.settings``) are left alone.
+    """
+    backend = load_backend(settings_dict["ENGINE"])
+    return backend.DatabaseWrapper(settings_dict, alias)
+
+
+def _request(alias: str) -> float:
+    start = time.perf_counter()
+    list(
+        Product.objects.using(alias).only(*PRODUCT_LIST_FIELDS)[:PRODUCT_LIST_PAGE_SIZE]
+    )
+    # End of the request (django.db.close_old_connections with CONN_MAX_AGE=0)
+    connections[alias].close()
+    return time.perf_counter() - start
+
+
+def _run(
+    alias: str, settings_dict: dict[str, Any], threads: int, requests: int
+) -> dict[str, Any]:
+    durations: list[float] = []
+    errors: list[Exception] = []
+    lock = threading.Lock()
+
+    def worker(count: int) -> None:
+        connections[alias] = _connection(alias, settings_dict)
+        try:
+            own = [_request(alias) for _ in range(count)]
+        except Exception as e:  # noqa: BLE001 (raised again by the main thread)
+            with lock:
+                errors.append(e)
+            return
+        with lock:
+            durations.extend(own)
+
+    workers = [
+        threading.Thread(target=worker, args=(requests // threads,))
+        for _ in range(threads)
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    if not durations:
+        msg = f"No request completed on {alias}."
+        raise CommandError(msg)
+
+    quantiles = statistics.quantiles(durations, n=20) if len(durations) > 1 else []
+    return {
+        "requests": len(durations),
+        "requests_per_second": len(durations) / elapsed,
+        "latency_ms_median": statistics.median(durations) * 1000,
+        "latency_ms_p95": (quantiles[-1] if quantiles else durations[0]) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the database access of requests with and without the "
+        "connection pool."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.DATABASE_POOL_CONCURRENCY,
+            help="Concurrent requests (default: DATABASE_POOL_CONCURRENCY).",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Requests per mode, split between the threads.",
+        )
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=None,
+            help="Maximum pool size (default: sized from --threads).",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        threads: int = max(1, min(options["threads"], options["requests"]))
+        base = copy.deepcopy(connections.settings[DEFAULT_DB_ALIAS])
+        base["OPTIONS"].pop("pool", None)
+        base["CONN_MAX_AGE"] = 0
+
+        results: dict[str, Any] = {}
+        for mode in ("without_pool", "with_pool"):
+            alias = f"benchmark_{mode}"
+            settings_dict = copy.deepcopy(base)
+            if mode == "with_pool":
+                settings_dict["OPTIONS"]["pool"] = database_pool_options(
+                    options["pool_size"] or threads
+                )
+            # The pool is shared by the connections of the alias, of all threads
+            connection = _connection(alias, settings_dict)
+            try:
+                results[mode] = _run(alias, settings_dict, threads, options["requests"])
+                if mode == "with_pool":
+                    results[mode]["pool"] = pool_stats(connection.pool)  # pyright: ignore[reportAttributeAccessIssue]
+            finally:
+                if mode == "with_pool":
+                    connection.close_pool()  # pyright: ignore[reportAttributeAccessIssue]
+        results["speedup"] = (
+            results["with_pool"]["requests_per_second"]
+            / results["without_pool"]["requests_per_second"]
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2, default=str))
+            return
+        for mode in ("without_pool", "with_pool"):
+            result = results[mode]
+            self.stdout.write(
+                f"{mode:>12}: {result['requests_per_second']:8.1f} req/s, "
+                f"median {result['latency_ms_median']:.2f} ms, "
+                f"p95 {result['latency_ms_p95']:.2f} ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Pool speedup: x{results['speedup']:.2f}")
+        )
@@ -0,0 +1,340 @@
+"""
+Time and query count of the hot paths of the products app, on a synthetic
+catalog, comparable from one commit to the next.
+
+The catalog is generated with the test factories (``products.tests.factories``,
+seeded: the same products on every run) and written with the batch API, in a
+throwaway test database (``--keepdb`` keeps it between runs, topped up to the
+largest ``--products``). For each catalog size, then each ingredient tree
+depth, a product with a tree of that depth is written and every case runs on
+it: warm-up, then ``--repeat`` timed calls. Cases writing to the database are
+rolled back after each call.
+
+``--output`` saves the results as JSON, ``--compare`` prints the change of
+each case against a previous output. Needs the development requirements
+(factory_boy).
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from typing import Final
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+from django.db import connection
+from django.db import transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import setup_databases
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_databases
+from django.test.utils import teardown_test_environment
+from django.urls import reverse
+from factory.random import reseed_random
+
+from products.catalog import get_macronutrients
+from products.forms import ProductForm
+from products.models import Product
+from products.openfoodfacts.schema import OFFIngredientSchema
+from products.openfoodfacts.utils import get_schema_from_ingredients
+from products.openfoodfacts.utils import parse_product_response
+from products.openfoodfacts.utils import save_ingredients_from_schema
+from products.tests.factories import SYNTHETIC_BARCODE_PREFIX
+from products.tests.factories import ProductDocumentFactory
+from products.tests.factories import ean13
+from products.tests.factories import ingredient_tree
+from products.tests.factories import off_product_response
+from products.writes import PRODUCT_BATCH_MAX
+from products.writes import write_products
+
+SEED: Final = "opennutrilab-benchmarks"
+# Barcode numbers of the benchmarked products, after those of the catalog
+TARGET_NUMBER: Final = 999_999_000
+EMPTY_TARGET_NUMBER: Final = 999_999_999
+
+# (case, catalog size, ingredient tree depth)
+ResultKey = tuple[str, int, int]
+
+
+def _generate_catalog(size: int, stdout: Any) -> None:
+    """Top the synthetic catalog up to ``size`` products."""
+    synthetic = Product.objects.filter(barcode__startswith=SYNTHETIC_BARCODE_PREFIX)
+    existing = synthetic.exclude(barcode__gte=ean13(TARGET_NUMBER)).count()
+    if existing >= size:
+        return
+    stdout.write(f"Generating {size - existing} products...")
+    # Barcodes numbered from the existing count (a --keepdb catalog is topped
+    # up, not rewritten)
+    for start in range(existing, size, PRODUCT_BATCH_MAX):
+        stop = min(start + PRODUCT_BATCH_MAX, size)
+        write_products(
+            [
+                ProductDocumentFactory.build(barcode=ean13(number))
+                for number in range(start, stop)
+            ]
+        )
+
+
+@contextmanager
+def _rolled_back() -> Iterator[None]:
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def _measure(func: Callable[[], object], repeat: int) -> dict[str, Any]:
+    func()  # warm-up: caches, templates, prepared statements
+    durations: list[float] = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+        queries = len(captured)
+    quantiles = statistics.quantiles(durations, n=20) if len(durations) > 1 else []
+    return {
+        "latency_ms_median": statistics.median(durations) * 1000,
+        "latency_ms_p95": (quantiles[-1] if quantiles else durations[0]) * 1000,
+        "latency_ms_min": min(durations) * 1000,
+        "queries": queries,
+    }
+
+
+def _form_data(document: dict[str, Any]) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "barcode": document["barcode"],
+        "name": document["name"],
+        "description": document["description"],
+        "energy_0": document["energy"],
+        "energy_1": "kJ",
+    }
+    for macronutrient in get_macronutrients():
+        amount = document["macronutrients"].get(macronutrient.name)
+        data[f"{macronutrient.name_in_form}_0"] = "" if amount is None else amount
+        data[f"{macronutrient.name_in_form}_1"] = "g"
+    return data
+
+
+def _cases(depth: int, breadth: int) -> dict[str, Callable[[], object]]:
+    """The benchmarked calls, on a product with a tree of ``depth`` levels."""
+    document = ProductDocumentFactory.build(
+        barcode=ean13(TARGET_NUMBER + depth),
+        ingredients=ingredient_tree(depth, breadth),
+    )
+    write_products([document])
+    product = Product.objects.get(pk=document["barcode"])
+    empty_document = ProductDocumentFactory.build(
+        barcode=ean13(EMPTY_TARGET_NUMBER), ingredients=None
+    )
+    write_products([empty_document])
+    empty_product = Product.objects.get(pk=empty_document["barcode"])
+
+    off_response = off_product_response(document)
+    schema = [
+        OFFIngredientSchema.model_validate(ingredient)
+        for ingredient in off_response["product"]["ingredients"]
+    ]
+    barcode = document["barcode"]
+    search = document["name"].split()[0].strip(".")
+    client = Client()
+
+    def save_ingredients() -> None:
+        with _rolled_back():
+            save_ingredients_from_schema(schema, empty_product)
+
+    def save_form() -> None:
+        with _rolled_back():
+            form = ProductForm(
+                data=_form_data(empty_document),
+                instance=empty_product,
+                extra_data={"ingredients": schema},
+            )
+            if not form.is_valid():
+                raise ValueError(form.errors.as_json())
+            form.save()
+
+    def get(path: str, **query: str) -> Callable[[], object]:
+        def request() -> None:
+            response = client.get(path, query)
+            if response.status_code != 200:  # noqa: PLR2004
+                msg = f"GET {path} {query}: {response.status_code}"
+                raise RuntimeError(msg)
+
+        return request
+
+    api_product = reverse("api-1.0.0:get_stored_product", kwargs={"barcode": barcode})
+    return {
+        "off.parse_product_response": lambda: parse_product_response(
+            barcode, off_response
+        ),
+        "off.save_ingredients_from_schema": save_ingredients,
+        "off.get_schema_from_ingredients": lambda: get_schema_from_ingredients(product),
+        "form.init": lambda: ProductForm(instance=product),
+        "form.save": save_form,
+        "view.list": get(reverse("list_products")),
+        "view.list_json": get(reverse("list_products"), format="json"),
+        "view.list_search": get(reverse("list_products"), q=search),
+        "api.list": get(reverse("api-1.0.0:list_stored_products")),
+        "api.search": get(reverse("api-1.0.0:get_products_search"), q=search),
+        "api.product": get(api_product, fields="barcode,name,ingredients"),
+        "api.ingredients": get(
+            reverse(
+                "api-1.0.0:get_stored_product_ingredients", kwargs={"barcode": barcode}
+            )
+        ),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],  # noqa: S607
+            capture_output=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _result_key(result: dict[str, Any]) -> ResultKey:
+    return (result["case"], result["products"], result["depth"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot paths of the products app (Open Food Facts parsing, "
+        "ingredient trees, product form, list views, API) on a synthetic catalog."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--products",
+            type=int,
+            nargs="+",
+            default=[1000],
+            help="Catalog sizes, e.g. --products 1000 100000.",
+        )
+        parser.add_argument(
+            "--depths",
+            type=int,
+            nargs="+",
+            default=[1, 3, 6],
+            help="Ingredient tree depths of the benchmarked product.",
+        )
+        parser.add_argument(
+            "--breadth",
+            type=int,
+            default=2,
+            help="Ingredients per node of the benchmarked trees.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed calls per case."
+        )
+        parser.add_argument(
+            "--cases",
+            nargs="+",
+            default=None,
+            help="Only the cases starting with these prefixes (e.g. api. form.).",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database (and its catalog) for the next runs.",
+        )
+        parser.add_argument(
+            "--current-db",
+            action="store_true",
+            help="Run in the current database, everything rolled back at the end.",
+        )
+        parser.add_argument("--output", help="Save the results to this JSON file.")
+        parser.add_argument(
+            "--compare", help="Compare with the results saved in this JSON file."
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["current_db"]:
+            with _rolled_back():
+                results = self._run(options)
+        else:
+            setup_test_environment()
+            old_config = setup_databases(
+                verbosity=0, interactive=False, keepdb=options["keepdb"]
+            )
+            try:
+                results = self._run(options)
+            finally:
+                teardown_databases(old_config, verbosity=0, keepdb=options["keepdb"])
+                teardown_test_environment()
+
+        report: dict[str, Any] = {
+            "commit": _git_commit(),
+            "created_at": datetime.now(tz=UTC).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": max(1, options["repeat"]),
+            "results": results,
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+        baseline: dict[ResultKey, dict[str, Any]] = {}
+        if options["compare"]:
+            saved = json.loads(Path(options["compare"]).read_text())
+            baseline = {_result_key(result): result for result in saved["results"]}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for result in results:
+            line = (
+                f"{result['case']:<34} {result['products']:>7} products, "
+                f"depth {result['depth']}: median "
+                f"{result['latency_ms_median']:8.2f} ms, p95 "
+                f"{result['latency_ms_p95']:8.2f} ms, {result['queries']:4} queries"
+            )
+            before = baseline.get(_result_key(result))
+            if before:
+                change = result["latency_ms_median"] / before["latency_ms_median"] - 1
+                line += f" ({change:+.0%}, {result['queries'] - before['queries']:+})"
+            self.stdout.write(line)
+
+    def _run(self, options: dict[str, Any]) -> list[dict[str, Any]]:
+        repeat = max(1, options["repeat"])
+        prefixes = tuple(options["cases"] or ("",))
+        reseed_random(SEED)
+
+        results: list[dict[str, Any]] = []
+        for size in sorted(options["products"]):
+            _generate_catalog(size, self.stdout)
+            for depth in options["depths"]:
+                for case, func in _cases(depth, options["breadth"]).items():
+                    if not case.startswith(prefixes):
+                        continue
+                    results.append(
+                        {
+                            "case": case,
+                            "products": size,
+                            "depth": depth,
+                            **_measure(func, repeat),
+                        }
+                    )
+        return results
@@ -0,0 +1,73 @@
+"""
+Import time of the entry points of the project: what ``django.setup()``
+costs every process (management commands, Celery workers, web workers, test
+runs), then what each entry point adds on top of it.
+
+Pandas, pyarrow, the HTTP and Redis clients are imported lazily (see
+``config.lazy_imports``): they should only show up once used, not here.
+NumPy does, imported by pint for the quantity fields of the models.
+"""
+
+import json
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from config.importtime import ENTRY_POINTS
+from config.importtime import measure_imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the import time of the entry points (python -X importtime), "
+        "each in a fresh interpreter, with the heaviest packages they import."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "entry_points",
+            nargs="*",
+            default=ENTRY_POINTS,
+            help="Modules to import (default: the entry points of the project).",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=3,
+            help="Imports per entry point, the fastest one is kept.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=5, help="Heaviest packages listed."
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        runs: int = max(1, options["runs"])
+        results: dict[str, Any] = {}
+        for entry_point in options["entry_points"]:
+            times = min(
+                (measure_imports(entry_point) for _ in range(runs)),
+                key=lambda times: times.total_us,
+            )
+            results[entry_point] = {
+                "total_ms": times.total_us / 1000,
+                "modules": len(times.self_us),
+                "packages_ms": {
+                    package: us / 1000
+                    for package, us in times.by_package().most_common(options["top"])
+                },
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for entry_point, result in results.items():
+            self.stdout.write(
+                f"{entry_point:<20} {result['total_ms']:8.1f} ms, "
+                f"{result['modules']} modules"
+            )
+            for package, ms in result["packages_ms"].items():
+                self.stdout.write(f"    {package:<24} {ms:8.1f} ms")
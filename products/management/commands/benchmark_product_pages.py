@@ -0,0 +1,210 @@
+"""
+Concurrent loads of the create page prefilled from Open Food Facts, sync
+baseline against the async view.
+
+Open Food Facts is played by a local stand-in server answering after
+``--delay`` seconds. The sync baseline holds a worker thread while it waits:
+concurrent loads beyond ``--threads`` queue behind each other. The async view
+only awaits, so loads of one event loop overlap whatever their number. The
+sync baseline (``_sync_create_page``) builds the same page with the blocking
+client and reads.
+"""
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+from django.db import connections
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.test import AsyncRequestFactory
+from django.test import RequestFactory
+from django.test import override_settings
+from django.urls import reverse
+
+from products.forms import ProductForm
+from products.openfoodfacts.utils import fetch_product
+from products.views import ProductCreateAsyncView
+from products.views import prepare_product_form_data
+
+BARCODE = "3229820794556"
+
+
+def _stand_in_server(delay: float) -> ThreadingHTTPServer:
+    """Serve the sample OFF product of ``BARCODE`` after ``delay`` seconds."""
+    sample = json.loads(
+        (
+            Path(settings.BASE_DIR) / "products" / "tests" / "data" / f"{BARCODE}.json"
+        ).read_bytes()
+    )
+    # The sample is a v0 response: served in the v3 envelope fetch_product reads
+    payload = json.dumps(
+        {
+            "status": "success",
+            "result": {
+                "id": "product_found",
+                "name": "Product found",
+                "lc_name": "Product found",
+            },
+            "product": sample["product"],
+        }
+    ).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _summary(durations: list[float], elapsed: float) -> dict[str, Any]:
+    quantiles = statistics.quantiles(durations, n=20) if len(durations) > 1 else []
+    return {
+        "requests": len(durations),
+        "requests_per_second": len(durations) / elapsed,
+        "latency_ms_median": statistics.median(durations) * 1000,
+        "latency_ms_p95": (quantiles[-1] if quantiles else durations[0]) * 1000,
+    }
+
+
+def _sync_create_page(request: HttpRequest) -> HttpResponse:
+    """The prefilled create page, fetched and read synchronously."""
+    fetched_product = fetch_product(query_barcode=request.GET["barcode"])
+    initial, extra_data = prepare_product_form_data(fetched_product=fetched_product)
+    view = ProductCreateAsyncView()
+    view.setup(request)
+    return view.render_form(
+        ProductForm(initial=initial, extra_data=extra_data), product=None
+    )
+
+
+def _run_sync(path: str, threads: int, requests: int) -> dict[str, Any]:
+    factory = RequestFactory()
+
+    def load(_: int) -> float:
+        start = time.perf_counter()
+        response = _sync_create_page(factory.get(path))
+        if isinstance(response, TemplateResponse):
+            response.render()
+        connections.close_all()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        durations = list(executor.map(load, range(requests)))
+    return _summary(durations, time.perf_counter() - start)
+
+
+def _run_async(path: str, concurrency: int, requests: int) -> dict[str, Any]:
+    view = ProductCreateAsyncView.as_view()
+    factory = AsyncRequestFactory()
+
+    async def load(semaphore: asyncio.Semaphore) -> float:
+        async with semaphore:
+            start = time.perf_counter()
+            # One context per request, as the ASGI handler does
+            async with ThreadSensitiveContext():
+                response = await view(factory.get(path))
+                if isinstance(response, TemplateResponse):
+                    await sync_to_async(response.render)()
+            return time.perf_counter() - start
+
+    async def run() -> dict[str, Any]:
+        semaphore = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        durations = await asyncio.gather(*(load(semaphore) for _ in range(requests)))
+        return _summary(list(durations), time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent loads of the prefilled create page, sync baseline "
+        "against async view, with a slow stand-in Open Food Facts server."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Concurrent page loads.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=10,
+            help="Worker threads serving the sync baseline.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Page loads per mode."
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.5,
+            help="Response time of the stand-in server, in seconds.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print results as JSON."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        requests: int = max(1, options["requests"])
+        threads = max(1, min(options["threads"], options["concurrency"]))
+        path = f"{reverse('create_product')}?barcode={BARCODE}"
+
+        server = _stand_in_server(options["delay"])
+        host, port = server.server_address[:2]
+        try:
+            with override_settings(OFF_API_URL=f"http://{host!s}:{port}"):
+                results: dict[str, Any] = {
+                    "sync": _run_sync(path, threads, requests),
+                    "async": _run_async(path, options["concurrency"], requests),
+                }
+        finally:
+            server.shutdown()
+            server.server_close()
+        results["speedup"] = (
+            results["async"]["requests_per_second"]
+            / results["sync"]["requests_per_second"]
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for mode in ("sync", "async"):
+            result = results[mode]
+            self.stdout.write(
+                f"{mode:>5}: {result['requests_per_second']:8.1f} req/s, "
+                f"median {result['latency_ms_median']:.0f} ms, "
+                f"p95 {result['latency_ms_p95']:.0f} ms"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Async speedup: x{results['speedup']:.2f}")
+        )
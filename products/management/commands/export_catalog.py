@@ -0,0 +1,34 @@
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from products.export import EXPORT_CHUNK_SIZE
+from products.export import export_catalog
+
+
+class Command(BaseCommand):
+    help = "Export the product catalog as partitioned Parquet files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("output_dir", type=Path, help="Output directory.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Number of products per Parquet part.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stats = export_catalog(
+            output_dir=options["output_dir"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {stats['rows']['products']} products to "
+                f"{stats['output_dir']} in {stats['duration_s']}s "
+                f"({stats['products_per_s']} products/s)."
+            )
+        )
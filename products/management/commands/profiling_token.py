@@ -0,0 +1,15 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from config.profiling import PROFILE_HEADER
+from config.profiling import PROFILE_TOKEN_MAX_AGE
+from config.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print a header asking for the profile of a request (see config.profiling)."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.stdout.write(f"{PROFILE_HEADER}: {make_profile_token()}")
+        self.stderr.write(f"Valid for {PROFILE_TOKEN_MAX_AGE // 60} minutes.")
@@ -0,0 +1,23 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from products.search import SEARCH_CHUNK_SIZE
+from products.search import rebuild_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recompute the full-text search vectors of every product."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=SEARCH_CHUNK_SIZE,
+            help="Number of products updated per transaction.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        updated = rebuild_search_vectors(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} search vectors."))
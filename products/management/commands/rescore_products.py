@@ -0,0 +1,21 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+
+from products.scoring import rescore_products
+
+
+class Command(BaseCommand):
+    help = "Recompute stored nutrition scores of products."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rescore the whole catalog instead of only stale products.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rescored = rescore_products(only_stale=not options["all"])
+        self.stdout.write(self.style.SUCCESS(f"Rescored {rescored} products."))
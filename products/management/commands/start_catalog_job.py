@@ -0,0 +1,42 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandParser
+from django.urls import reverse
+
+from products.tasks import CHUNKED_JOBS
+from products.tasks import start_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a catalog job fanned out to the Celery workers, chunk by chunk "
+        "(rescore, export or resync from Open Food Facts)."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("job", choices=sorted(CHUNKED_JOBS), help="Job to start.")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="rescore: the whole catalog instead of only stale products.",
+        )
+        parser.add_argument(
+            "--output-dir",
+            help="export: output directory (default: MEDIA_ROOT/exports/<timestamp>).",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        job_options: dict[str, Any] = {}
+        if options["job"] == "rescore":
+            job_options["only_stale"] = not options["all"]
+        elif options["job"] == "export" and options["output_dir"]:
+            job_options["output_dir"] = options["output_dir"]
+
+        job_id = start_job(options["job"], **job_options)
+        status_url = reverse(
+            "api-1.0.0:get_catalog_job_status", kwargs={"job_id": job_id}
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Job {job_id} started, status: {status_url}")
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_remove_ingredient_unique_ingredient_per_parent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='nutrition_grade',
+            field=models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C'), ('D', 'D'), ('E', 'E')], default='', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='nutrition_score',
+            field=models.SmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='nutrition_score_stale',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['nutrition_score'], name='product_nutrition_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['nutrition_grade'], name='product_nutrition_grade_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('nutrition_score_stale', True)), fields=['nutrition_score_stale'], name='product_score_stale_idx'),
+        ),
+    ]
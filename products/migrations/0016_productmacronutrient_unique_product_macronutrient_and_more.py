@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def delete_duplicate_amounts(apps, schema_editor):
+    # The unicity constraints were declared outside Meta and never created:
+    # keep only the latest row of each (product, nutrient) pair.
+    for model_name, nutrient_field in (
+        ("ProductMacronutrient", "macronutrient"),
+        ("ProductVitamin", "vitamin"),
+    ):
+        Model = apps.get_model("products", model_name)
+        latest_ids = (
+            Model.objects.values("product", nutrient_field)
+            .annotate(latest_id=models.Max("id"))
+            .values_list("latest_id", flat=True)
+        )
+        Model.objects.exclude(id__in=list(latest_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_product_nutrition_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_amounts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productmacronutrient',
+            constraint=models.UniqueConstraint(fields=('product', 'macronutrient'), name='unique_product_macronutrient'),
+        ),
+        migrations.AddConstraint(
+            model_name='productvitamin',
+            constraint=models.UniqueConstraint(fields=('product', 'vitamin'), name='unique_product_vitamin'),
+        ),
+    ]
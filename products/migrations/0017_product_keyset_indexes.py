@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-19 11:40
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_productmacronutrient_unique_product_macronutrient_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_nutrition_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'barcode'], name='product_created_at_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'barcode'], name='product_name_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['nutrition_score', 'barcode'], name='product_score_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('nutrition_score'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('barcode'), descending=True), name='product_score_desc_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+def fill_search_vectors(apps, schema_editor):
+    # Same expression as products.search.product_search_vector()
+    from django.contrib.postgres.aggregates import StringAgg
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import OuterRef
+    from django.db.models import Subquery
+
+    Ingredient = apps.get_model("products", "Ingredient")
+    Product = apps.get_model("products", "Product")
+    ingredient_names = Subquery(
+        Ingredient.objects.filter(product=OuterRef("pk"))
+        .order_by()
+        .values("product")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    Product.objects.update(
+        search_vector=SearchVector("name", weight="A", config="simple")
+        + SearchVector("description", weight="B", config="simple")
+        + SearchVector(ingredient_names, weight="C", config="simple")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_product_keyset_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='product_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -3,7 +3,10 @@ from typing import Any
 from typing import final
 from typing import override
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F
 from django.db.models import UniqueConstraint
 from django.db.models.functions import Lower
 from django.db.models.functions import Upper
@@ -167,6 +170,22 @@ class Ingredient(models.Model):
         return label
 
 
+class NutritionGrade(models.TextChoices):
+    A = "A", "A"
+    B = "B", "B"
+    C = "C", "C"
+    D = "D", "D"
+    E = "E", "E"
+
+
+class ProductManager(models.Manager["Product"]):
+    """Products not marked deleted (see products.deletion)."""
+
+    @override
+    def get_queryset(self) -> models.QuerySet["Product"]:
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 @final
 class Product(models.Model):
     barcode = EAN13Field(primary_key=True)
@@ -174,6 +193,39 @@ class Product(models.Model):
     image = models.ImageField(upload_to="images/products/", null=True, blank=True)
     description = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last change of the product or of its macronutrients, vitamins, ingredients
+    # or score: source of the ETag/Last-Modified of product responses. Writers
+    # bypassing Product.save() (bulk and queryset updates) set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # ------------------------------------------------------------------------
+    # Nutrition score (Nutri-Score style) ------------------------------------
+    # ------------------------------------------------------------------------
+    # Computed in batch by products.scoring and stored here so list views can
+    # sort and filter on it without computing anything per request.
+    nutrition_score = models.SmallIntegerField(null=True, blank=True)
+    nutrition_grade = models.CharField(
+        max_length=1,
+        choices=NutritionGrade.choices,
+        blank=True,
+        default="",
+    )
+    # Set whenever a score input (energy or a scored macronutrient) changes, so
+    # the scorer only recomputes the products that need it.
+    nutrition_score_stale = models.BooleanField(default=True)
+
+    # ------------------------------------------------------------------------
+    # Search -----------------------------------------------------------------
+    # ------------------------------------------------------------------------
+    # Name, description and ingredient names, maintained by products.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # ------------------------------------------------------------------------
+    # Deletion ---------------------------------------------------------------
+    # ------------------------------------------------------------------------
+    # Marked products are hidden at once (default manager), then purged with
+    # their related rows and image by a background job (products.deletion).
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     # ------------------------------------------------------------------------
     # Nutritional values -----------------------------------------------------
@@ -200,9 +252,60 @@ class Product(models.Model):
     )
     # ------------------------------------------------------------------------
 
+    # Default manager: products marked deleted are hidden
+    objects = ProductManager()
+    # Marked products included
+    all_objects = models.Manager()  # noqa: DJ012
+
     if TYPE_CHECKING:
         ingredients: models.QuerySet["Ingredient"]
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the product list: (sort key, barcode)
+            models.Index(
+                fields=["created_at", "barcode"],
+                name="product_created_at_keyset_idx",
+            ),
+            models.Index(
+                fields=["name", "barcode"],
+                name="product_name_keyset_idx",
+            ),
+            models.Index(
+                fields=["nutrition_score", "barcode"],
+                name="product_score_keyset_idx",
+            ),
+            # Descending scores with nulls last cannot use a backward scan of
+            # the index above (it would list nulls first).
+            models.Index(
+                F("nutrition_score").desc(nulls_last=True),
+                F("barcode").desc(),
+                name="product_score_desc_keyset_idx",
+            ),
+            # Full-text and typo tolerant (pg_trgm) search
+            GinIndex(fields=["search_vector"], name="product_search_vector_idx"),
+            GinIndex(
+                fields=["name"],
+                opclasses=["gin_trgm_ops"],
+                name="product_name_trgm_idx",
+            ),
+            models.Index(
+                fields=["nutrition_grade"],
+                name="product_nutrition_grade_idx",
+            ),
+            models.Index(
+                fields=["nutrition_score_stale"],
+                condition=models.Q(nutrition_score_stale=True),
+                name="product_score_stale_idx",
+            ),
+            # Products waiting for the purge job
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="product_deleted_idx",
+            ),
+        ]
+
     @override
     def __str__(self) -> str:
         label: str = self.name.replace("_", " ").title()
@@ -222,16 +325,15 @@ class ProductVitamin(models.Model):
         null=True,
     )  # pyright: ignore[reportCallIssue]
 
-    # For this manually created intermediate table (with "through") I need to add
-    # the unicity constraint because Django not doing it :(
-    constraints = [
-        models.UniqueConstraint(
-            fields=["product", "vitamin"], name="unique_product_vitamin"
-        ),
-    ]
-
     @final
     class Meta:
+        # For this manually created intermediate table (with "through") I need to
+        # add the unicity constraint because Django not doing it :(
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "vitamin"], name="unique_product_vitamin"
+            ),
+        ]
         verbose_name = "Product Vitamin"
         verbose_name_plural = "Product Vitamins"
         ordering = ["product", "vitamin"]
@@ -247,17 +349,17 @@ class ProductMacronutrient(models.Model):
     macronutrient = models.ForeignKey(Macronutrient, on_delete=models.CASCADE)
     amount = QuantityField(base_units=DEFAULT_MACRONUTRIENT_UNIT, null=True)  # pyright: ignore[reportCallIssue]
 
-    # For this manually created intermediate table (with "through") I need to add
-    # the unicity constraint because Django not doing it :(
-    constraints = [
-        models.UniqueConstraint(
-            fields=["product", "macronutrient"],
-            name="unique_product_macronutrient",
-        ),
-    ]
-
     @final
     class Meta:
+        # For this manually created intermediate table (with "through") I need to
+        # add the unicity constraint because Django not doing it :(
+        # It is also the conflict target of the amounts upsert.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "macronutrient"],
+                name="unique_product_macronutrient",
+            ),
+        ]
         verbose_name = "Product Macronutrient"
         verbose_name_plural = "Product Macronutrients"
         ordering = ["product", "macronutrient"]
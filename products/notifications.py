@@ -0,0 +1,65 @@
+"""
+Product notifications pushed to WebSocket subscribers (see ``config.pubsub``).
+
+Topics a client can subscribe to:
+
+- ``catalog``: any product change, with the number of products changed;
+- ``product:<barcode>``: changes of one product;
+- ``job:<task id>``: progress and outcome of a background job, shaped like
+  the bulk upload status (``state``, ``progress``, ``result``, ``error``).
+
+Product changes are published once their transaction commits, one message
+per write (a form save, a batch, a chunk of an import), never per product.
+"""
+
+import re
+from collections.abc import Iterable
+from functools import partial
+from typing import Any
+from typing import Final
+
+from django.db import transaction
+
+from config.pubsub import publish
+
+NOTIFICATIONS_WS_PATH: Final = "/ws/notifications/"
+CATALOG_TOPIC: Final = "catalog"
+TOPIC_PATTERN: Final = re.compile(
+    r"catalog|product:[0-9A-Za-z]{1,32}|job:[0-9A-Za-z-]{1,64}"
+)
+
+
+def product_topic(barcode: str) -> str:
+    return f"product:{barcode}"
+
+
+def job_topic(task_id: str) -> str:
+    return f"job:{task_id}"
+
+
+def is_valid_topic(topic: Any) -> bool:
+    return isinstance(topic, str) and TOPIC_PATTERN.fullmatch(topic) is not None
+
+
+def notify_products_changed(barcodes: Iterable[str], event: str) -> None:
+    """
+    Publish a change of products once the current transaction commits.
+
+    :param event: ``products.saved``, ``products.deleted`` or
+        ``products.rescored``
+    """
+    topics = [product_topic(barcode) for barcode in dict.fromkeys(barcodes)]
+    if not topics:
+        return
+    transaction.on_commit(
+        partial(
+            publish,
+            [CATALOG_TOPIC, *topics],
+            {"event": event, "count": len(topics)},
+        )
+    )
+
+
+def notify_job(task_id: str, state: str, **status: Any) -> None:
+    """Publish the status of a background job, at once."""
+    publish([job_topic(task_id)], {"event": "job", "state": state, **status})
@@ -0,0 +1,124 @@
+"""
+Telemetry of the calls to Open Food Facts, exposed with the request metrics
+(``config.metrics``).
+
+Each call is tagged by its call site (``fetch_product``, ``afetch_product``,
+``api_ninja.get_product``, ``image_download``) and observed in:
+
+- its latency, by outcome: ``200``, ``404``, other status classes (``5xx``,
+  ...), ``timeout`` or ``error`` (connection failure);
+- the size of the response body;
+- the time spent validating it (pydantic), where the client validates it.
+
+Calls slower than ``OFF_SLOW_CALL_SECONDS`` are logged with their barcode.
+Set against the request latency (``opennutrilab_request_duration_seconds``),
+this tells whether a slow create page waited on Open Food Facts or on us.
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Final
+
+from django.conf import settings
+from prometheus_client import Histogram
+
+from config.lazy_imports import lazy_import
+from config.metrics import outbound_http
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
+else:
+    httpx = lazy_import("httpx")
+    requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+OFF_SECONDS_BUCKETS: Final = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+# 1 KiB to 4 MiB (product JSON: a few KiB, images: up to a few hundred)
+OFF_BYTES_BUCKETS: Final = tuple(1024 * 4**n for n in range(7))
+OFF_VALIDATION_SECONDS_BUCKETS: Final = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+)  # fmt: skip
+
+OFF_CALL_SECONDS: Final = Histogram(
+    "opennutrilab_off_call_duration_seconds",
+    "Latency of the calls to Open Food Facts, by call site and outcome.",
+    ["call_site", "outcome"],
+    buckets=OFF_SECONDS_BUCKETS,
+)
+OFF_RESPONSE_BYTES: Final = Histogram(
+    "opennutrilab_off_response_bytes",
+    "Size of the Open Food Facts response bodies.",
+    ["call_site"],
+    buckets=OFF_BYTES_BUCKETS,
+)
+OFF_VALIDATION_SECONDS: Final = Histogram(
+    "opennutrilab_off_validation_duration_seconds",
+    "Time spent validating the Open Food Facts responses.",
+    ["call_site"],
+    buckets=OFF_VALIDATION_SECONDS_BUCKETS,
+)
+
+
+def _outcome(status_code: int) -> str:
+    if status_code in (200, 404):
+        return str(status_code)
+    return f"{status_code // 100}xx"
+
+
+@dataclass
+class OFFCall:
+    """A call in progress, see ``off_call``."""
+
+    call_site: str
+    barcode: str
+    # Until a response is received
+    outcome: str = "error"
+
+    def response(self, status_code: int, body: bytes) -> None:
+        """Record the response received (before checking its status)."""
+        self.outcome = _outcome(status_code)
+        OFF_RESPONSE_BYTES.labels(self.call_site).observe(len(body))
+
+
+@contextmanager
+def off_call(call_site: str, barcode: str) -> Iterator[OFFCall]:
+    """
+    Observe the call to Open Food Facts made in the block (and count it as
+    outbound HTTP time of the request). The block records the response with
+    ``OFFCall.response``, or raises.
+    """
+    call = OFFCall(call_site, barcode)
+    start = time.perf_counter()
+    try:
+        with outbound_http():
+            yield call
+    except (requests.Timeout, httpx.TimeoutException):
+        call.outcome = "timeout"
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        OFF_CALL_SECONDS.labels(call_site, call.outcome).observe(seconds)
+        if seconds >= settings.OFF_SLOW_CALL_SECONDS:
+            logger.warning(
+                "Slow Open Food Facts call (%s) for %s: %.2f s, %s",
+                call_site,
+                barcode,
+                seconds,
+                call.outcome,
+            )
+
+
+@contextmanager
+def off_validation(call_site: str) -> Iterator[None]:
+    """Observe the validation of an Open Food Facts response done in the block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        OFF_VALIDATION_SECONDS.labels(call_site).observe(time.perf_counter() - start)
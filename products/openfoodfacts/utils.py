@@ -1,24 +1,41 @@
 import json
+import logging
+from collections.abc import Iterable
+from collections.abc import Set as AbstractSet
 from pathlib import Path
 from typing import TYPE_CHECKING
 from typing import Any
 
-import requests
 from django.conf import settings
+from django.utils import timezone
 from ninja.errors import HttpError
 from pydantic import ValidationError
 
+from config.lazy_imports import lazy_import
 from products.models import Ingredient
 from products.models import IngredientRef
 from products.models import Product
 from products.openfoodfacts.api_response_shema import OFFProductAPIResponseSchema
 from products.openfoodfacts.api_response_shema import StatusEnum
+from products.writes import write_products
 
 from .schema import OFFIngredientSchema
 from .schema import OFFProductSchema
+from .telemetry import off_call
+from .telemetry import off_validation
 
 if TYPE_CHECKING:
+    import httpx
+    import requests
     from django.db.models.query import QuerySet
+else:
+    httpx = lazy_import("httpx")
+    requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+# Seconds, connection and read
+OFF_TIMEOUT = 5
 
 
 def fetch_local_product(
@@ -46,35 +63,12 @@ def fetch_local_product(
     return product
 
 
-def fetch_product(query_barcode: str):
-    """
-    Fetch product data from OpenFoodFacts API for a given barcode.
-    """
-    url = f"https://world.openfoodfacts.org/api/v3/product/{query_barcode}.json"
+def _product_url(query_barcode: str) -> str:
+    return f"{settings.OFF_API_URL}/api/v3/product/{query_barcode}.json"
 
-    try:
-        response = requests.get(url, timeout=5, allow_redirects=True)
-        response.raise_for_status()
-    except requests.HTTPError as e:
-        raise HttpError(
-            status_code=502,  # Bad Gateway → API externe en erreur
-            message=f"External API returned an error: {e}",
-        ) from e
-    except requests.RequestException as e:
-        raise HttpError(
-            status_code=503,  # Service Unavailable → connexion impossible
-            message=f"External API unreachable: {e}",
-        ) from e
-
-    # JSON parsing
-    try:
-        data = response.json()
-    except ValueError as e:
-        raise HttpError(
-            status_code=502,
-            message=f"Invalid JSON received from external API: {e}",
-        ) from e
 
+def parse_product_response(query_barcode: str, data: Any) -> OFFProductSchema:
+    """Validate the JSON of an OFF product response (see ``fetch_product``)."""
     # Validation Pydantic
     try:
         # We keep it in case if we need later more than one alias for one field:
@@ -122,6 +116,101 @@ def fetch_product(query_barcode: str):
     return product
 
 
+def fetch_product(query_barcode: str):
+    """
+    Fetch product data from OpenFoodFacts API for a given barcode.
+    """
+    try:
+        with off_call("fetch_product", query_barcode) as call:
+            response = requests.get(
+                _product_url(query_barcode), timeout=OFF_TIMEOUT, allow_redirects=True
+            )
+            call.response(response.status_code, response.content)
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        raise HttpError(
+            status_code=502,  # Bad Gateway → API externe en erreur
+            message=f"External API returned an error: {e}",
+        ) from e
+    except requests.RequestException as e:
+        raise HttpError(
+            status_code=503,  # Service Unavailable → connexion impossible
+            message=f"External API unreachable: {e}",
+        ) from e
+
+    # JSON parsing
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise HttpError(
+            status_code=502,
+            message=f"Invalid JSON received from external API: {e}",
+        ) from e
+
+    with off_validation("fetch_product"):
+        return parse_product_response(query_barcode, data)
+
+
+async def afetch_product(query_barcode: str) -> OFFProductSchema:
+    """
+    Async ``fetch_product``: the wait on OFF does not hold a thread (async
+    views), errors are the same.
+    """
+    try:
+        with off_call("afetch_product", query_barcode) as call:
+            async with httpx.AsyncClient(
+                timeout=OFF_TIMEOUT, follow_redirects=True
+            ) as client:
+                response = await client.get(_product_url(query_barcode))
+            call.response(response.status_code, response.content)
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        raise HttpError(
+            status_code=502,
+            message=f"External API returned an error: {e}",
+        ) from e
+    except httpx.HTTPError as e:
+        raise HttpError(
+            status_code=503,
+            message=f"External API unreachable: {e}",
+        ) from e
+
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise HttpError(
+            status_code=502,
+            message=f"Invalid JSON received from external API: {e}",
+        ) from e
+
+    with off_validation("afetch_product"):
+        return parse_product_response(query_barcode, data)
+
+
+def resync_products(barcodes: Iterable[str]) -> int:
+    """
+    Overwrite products with their current Open Food Facts data, one request
+    per product.
+
+    Products that Open Food Facts does not return (unknown, errors), or
+    returns invalid, are left as they are.
+
+    :return: number of products written
+    """
+    documents: list[dict[str, Any]] = []
+    for barcode in barcodes:
+        try:
+            product = fetch_product(barcode)
+        except (HttpError, ValueError) as e:
+            logger.info("Product %s not resynced: %s", barcode, e)
+            continue
+        documents.append(product.model_dump(exclude={"image_url"}))
+    if not documents:
+        return 0
+    results = write_products(documents)
+    return sum(result["status"] != "invalid" for result in results)
+
+
 def get_schema_from_ingredients(product: Product) -> list[OFFIngredientSchema]:
     """
     Reconstructs the COMPLETE tree of a product's ingredients
@@ -170,9 +259,22 @@ def save_ingredients_from_schema(
 ) -> None:
     """
     Recursive saving of OFF ingredients into Django database.
+
+    The product is marked as modified once for the whole tree (ingredients
+    have no save receiver: it would update the product once per ingredient).
     """
+    if not ingredients_schema:
+        return
+    _save_ingredient_nodes(ingredients_schema, product, parent)
+    Product.objects.filter(pk=product.pk).update(updated_at=timezone.now())
 
-    for ing in ingredients_schema or []:
+
+def _save_ingredient_nodes(
+    ingredients_schema: list[OFFIngredientSchema],
+    product: Product,
+    parent: Ingredient | None,
+) -> None:
+    for ing in ingredients_schema:
         # Search or create reference ingredient
         ingredient_ref: IngredientRef | None = IngredientRef.objects.filter(
             name=ing.name.strip()
@@ -190,15 +292,11 @@ def save_ingredients_from_schema(
 
         # Recursive call on sub-ingredients
         if ing.ingredients:
-            save_ingredients_from_schema(
-                ingredients_schema=ing.ingredients,
-                product=product,
-                parent=ingredient,
-            )
+            _save_ingredient_nodes(ing.ingredients, product, ingredient)
 
 
 def build_ingredient_json_from_schema(
-    ingredient: OFFIngredientSchema, reference_names: set[str]
+    ingredient: OFFIngredientSchema, reference_names: AbstractSet[str]
 ) -> dict[str, Any]:
     """
     Build a JSON-serializable dictionary for a single ingredient,
@@ -0,0 +1,152 @@
+"""
+Keyset (cursor) pagination of products.
+
+Pages are fetched with ``WHERE (sort_key, barcode) > (last values) ORDER BY
+sort_key, barcode LIMIT n`` instead of ``OFFSET``, so every page is an index
+range scan whose cost does not depend on its position nor on the catalog size.
+The barcode (primary key) breaks ties so that the order is total.
+
+Cursors are the signed sort values of the last row of a page. They are signed
+with the sort key as salt: a cursor of another sort, or a tampered one, is
+ignored and the first page is returned.
+"""
+
+import datetime as dt
+from dataclasses import dataclass
+from typing import Any
+from typing import Final
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models.expressions import OrderBy
+
+from .models import Product
+
+PRODUCT_LIST_PAGE_SIZE: Final = 50
+
+
+@dataclass(frozen=True)
+class KeysetOrdering:
+    """Order on ``field`` then ``barcode``, both in the same direction."""
+
+    field: str
+    descending: bool = False
+    # Products without a value are always listed last
+    nullable: bool = False
+
+    def order_by(self) -> list[OrderBy]:
+        nulls_last = True if self.nullable else None
+        if self.descending:
+            return [
+                F(self.field).desc(nulls_last=nulls_last),
+                F("barcode").desc(),
+            ]
+        return [F(self.field).asc(nulls_last=nulls_last), F("barcode").asc()]
+
+    def after(self, value: Any, barcode: str) -> Q:
+        """Filter on the rows following ``(value, barcode)``."""
+        op = "lt" if self.descending else "gt"
+        if value is None:
+            return Q(**{f"{self.field}__isnull": True, f"barcode__{op}": barcode})
+
+        following = Q(**{f"{self.field}__{op}": value}) | Q(
+            **{self.field: value, f"barcode__{op}": barcode}
+        )
+        if self.nullable:
+            return following | Q(**{f"{self.field}__isnull": True})
+        # Redundant bound on the leading column, so that the planner can turn
+        # the disjunction into an index range scan.
+        return Q(**{f"{self.field}__{op}e": value}) & following
+
+
+@dataclass
+class KeysetPage:
+    object_list: list[Product]
+    next_cursor: str | None
+    # Read by vanilla's ListView.get(): keyset pages are not counted, there is
+    # no paginator (and no page numbers) behind them.
+    paginator: None = None
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next()
+
+
+# Sort keys accepted by the product list (``?sort=``), mapped to keyset
+# orderings. Products without a score are always listed last.
+PRODUCT_LIST_ORDERINGS: dict[str, KeysetOrdering] = {
+    "name": KeysetOrdering("name"),
+    "-name": KeysetOrdering("name", descending=True),
+    "created_at": KeysetOrdering("created_at"),
+    "-created_at": KeysetOrdering("created_at", descending=True),
+    "nutrition_score": KeysetOrdering("nutrition_score", nullable=True),
+    "-nutrition_score": KeysetOrdering(
+        "nutrition_score", descending=True, nullable=True
+    ),
+    # Only when searching (annotated by products.search.search_products)
+    "relevance": KeysetOrdering("search_relevance", descending=True),
+}
+PRODUCT_LIST_DEFAULT_SORT: Final = "-created_at"
+PRODUCT_LIST_SEARCH_DEFAULT_SORT: Final = "relevance"
+
+
+def resolve_product_sort(sort: str, *, searching: bool) -> str:
+    """Return a valid sort key (relevance only applies to searches)."""
+    if searching:
+        return (
+            sort if sort in PRODUCT_LIST_ORDERINGS else PRODUCT_LIST_SEARCH_DEFAULT_SORT
+        )
+    if sort in PRODUCT_LIST_ORDERINGS and sort != PRODUCT_LIST_SEARCH_DEFAULT_SORT:
+        return sort
+    return PRODUCT_LIST_DEFAULT_SORT
+
+
+def encode_cursor(product: Product, ordering: KeysetOrdering, salt: str) -> str:
+    value = getattr(product, ordering.field)
+    if isinstance(value, dt.datetime):
+        value = value.isoformat()
+    return signing.dumps([value, product.barcode], salt=salt)
+
+
+def decode_cursor(
+    cursor: str, ordering: KeysetOrdering, salt: str
+) -> tuple[Any, str] | None:
+    try:
+        raw_value, barcode = signing.loads(cursor, salt=salt)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    try:
+        field = Product._meta.get_field(ordering.field)  # noqa: SLF001
+    except FieldDoesNotExist:  # annotation (e.g. search relevance)
+        return raw_value, barcode
+    return field.to_python(raw_value), barcode
+
+
+def paginate_products(
+    queryset: QuerySet[Product],
+    ordering: KeysetOrdering,
+    cursor: str | None,
+    *,
+    salt: str,
+    page_size: int = PRODUCT_LIST_PAGE_SIZE,
+) -> KeysetPage:
+    """Return the page following ``cursor`` (the first page without cursor)."""
+    queryset = queryset.order_by(*ordering.order_by())
+    position = decode_cursor(cursor, ordering, salt) if cursor else None
+    if position is not None:
+        queryset = queryset.filter(ordering.after(*position))
+
+    # One extra row tells whether there is a next page, without a COUNT(*)
+    products = list(queryset[: page_size + 1])
+    if len(products) <= page_size:
+        return KeysetPage(object_list=products, next_cursor=None)
+    products = products[:page_size]
+    return KeysetPage(
+        object_list=products,
+        next_cursor=encode_cursor(products[-1], ordering, salt),
+    )
@@ -0,0 +1,184 @@
+"""
+Loading and serialization of stored products for the read API.
+
+Responses carry only the requested (sparse) fields, and only what they need is
+loaded: the product columns of the selected fields, then one query per selected
+related table (macronutrients, vitamins, ingredients) for a whole page of
+products. A page therefore costs at most four queries, whatever its size.
+
+Ingredient trees can also be read one level at a time (``ingredient_level``),
+for clients that only expand some nodes.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+from typing import Final
+
+from django.db.models import Exists
+from django.db.models import FloatField
+from django.db.models import OuterRef
+from django.db.models import QuerySet
+from django.db.models.functions import Cast
+
+from .models import Ingredient
+from .models import Product
+from .models import ProductMacronutrient
+from .models import ProductVitamin
+
+# API field -> Product column
+PRODUCT_SCALAR_FIELDS: Final = {
+    "name": "name",
+    "description": "description",
+    "image_url": "image",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "energy_kj": "energy",
+    "nutrition_score": "nutrition_score",
+    "nutrition_grade": "nutrition_grade",
+}
+PRODUCT_RELATED_FIELDS: Final = ("macronutrients", "vitamins", "ingredients")
+PRODUCT_FIELDS: Final = ("barcode", *PRODUCT_SCALAR_FIELDS, *PRODUCT_RELATED_FIELDS)
+# Without ``fields``: every product column, no related table
+DEFAULT_PRODUCT_FIELDS: Final = ("barcode", *PRODUCT_SCALAR_FIELDS)
+
+
+def parse_product_fields(fields: str | None) -> tuple[str, ...]:
+    """Parse a comma separated ``fields`` parameter (``barcode`` is implied)."""
+    if not fields:
+        return DEFAULT_PRODUCT_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in PRODUCT_FIELDS]
+    if unknown:
+        msg = f"Unknown fields: {', '.join(unknown)}. Available: " + ", ".join(
+            PRODUCT_FIELDS
+        )
+        raise ValueError(msg)
+    return ("barcode", *dict.fromkeys(f for f in requested if f != "barcode"))
+
+
+def product_columns(fields: Iterable[str]) -> list[str]:
+    """Product columns to load (``QuerySet.only``) for the given fields."""
+    return ["barcode"] + [
+        PRODUCT_SCALAR_FIELDS[field]
+        for field in fields
+        if field in PRODUCT_SCALAR_FIELDS
+    ]
+
+
+def _scalar_value(product: Product, field: str) -> Any:
+    if field == "image_url":
+        return product.image.url if product.image else None
+    if field == "energy_kj":
+        # Stored in base units (kJ)
+        return None if product.energy is None else float(product.energy.magnitude)  # pyright: ignore[reportAttributeAccessIssue]
+    return getattr(product, PRODUCT_SCALAR_FIELDS[field])
+
+
+def _amounts(
+    queryset: QuerySet[Any], nutrient_field: str, barcodes: list[str]
+) -> dict[str, dict[str, float]]:
+    amounts: defaultdict[str, dict[str, float]] = defaultdict(dict)
+    for barcode, name, amount in queryset.filter(
+        product_id__in=barcodes, amount__isnull=False
+    ).values_list(
+        "product_id",
+        f"{nutrient_field}_id",
+        Cast("amount", output_field=FloatField()),
+    ):
+        amounts[barcode][name] = amount
+    return amounts
+
+
+def _ingredient_trees(barcodes: list[str]) -> dict[str, list[dict[str, Any]]]:
+    roots: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+    rows = list(
+        Ingredient.objects.filter(product_id__in=barcodes)
+        .order_by("id")
+        .values_list(
+            "id", "product_id", "parent_id", "name", "percentage", "reference__name"
+        )
+    )
+    # Indexed first, then attached: a row may have been re-parented under an
+    # ingredient created after it.
+    nodes: dict[int, dict[str, Any]] = {
+        ingredient_id: {
+            "id": ingredient_id,
+            "name": name,
+            "percentage": percentage,
+            "reference": reference,
+            "ingredients": [],
+        }
+        for ingredient_id, _barcode, _parent_id, name, percentage, reference in rows
+    }
+    for ingredient_id, barcode, parent_id, *_ in rows:
+        node = nodes[ingredient_id]
+        if parent_id is None:
+            roots[barcode].append(node)
+        else:
+            nodes[parent_id]["ingredients"].append(node)
+    return roots
+
+
+def _ingredient_level_queryset(
+    barcode: str, parent_id: int | None
+) -> QuerySet[Ingredient, dict[str, Any]]:
+    return (
+        Ingredient.objects.filter(product_id=barcode, parent_id=parent_id)
+        .annotate(
+            has_children=Exists(Ingredient.objects.filter(parent_id=OuterRef("pk")))
+        )
+        .order_by("id")
+        .values("id", "name", "percentage", "has_reference", "has_children")
+    )
+
+
+def ingredient_level(barcode: str, parent_id: int | None) -> list[dict[str, Any]]:
+    """
+    Return the direct children of an ingredient (the roots without
+    ``parent_id``) in one query, each flagged with ``has_children``.
+    """
+    return list(_ingredient_level_queryset(barcode, parent_id))
+
+
+async def aingredient_level(
+    barcode: str, parent_id: int | None
+) -> list[dict[str, Any]]:
+    """Async ``ingredient_level`` (async views)."""
+    return [row async for row in _ingredient_level_queryset(barcode, parent_id)]
+
+
+def serialize_products(
+    products: list[Product],
+    fields: tuple[str, ...],
+) -> list[dict[str, Any]]:
+    """
+    Serialize products with their selected fields.
+
+    :param products: products loaded with (at least) ``product_columns(fields)``
+    """
+    barcodes = [product.barcode for product in products]
+    related: dict[str, dict[str, Any]] = {}
+    if barcodes:
+        if "macronutrients" in fields:
+            related["macronutrients"] = _amounts(
+                ProductMacronutrient.objects.all(), "macronutrient", barcodes
+            )
+        if "vitamins" in fields:
+            related["vitamins"] = _amounts(
+                ProductVitamin.objects.all(), "vitamin", barcodes
+            )
+        if "ingredients" in fields:
+            related["ingredients"] = _ingredient_trees(barcodes)
+
+    results: list[dict[str, Any]] = []
+    for product in products:
+        data: dict[str, Any] = {"barcode": product.barcode}
+        for field in fields:
+            if field in PRODUCT_SCALAR_FIELDS:
+                data[field] = _scalar_value(product, field)
+            elif field in related:
+                default: Any = [] if field == "ingredients" else {}
+                data[field] = related[field].get(product.barcode, default)
+        results.append(data)
+    return results
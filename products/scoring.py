@@ -0,0 +1,221 @@
+"""
+Nutri-Score style nutrition scoring, computed in batch for the whole catalog.
+
+Inputs are read as plain floats in base units (kJ for energy, g per 100 g for
+macronutrients), pivoted into one row per product and scored in a single
+vectorized NumPy pass. Results are stored on ``Product`` so views can sort and
+filter on them without any computation per request.
+
+Only the 2017 "general foods" table is implemented. Sodium and the
+fruit/vegetable/nut share are not tracked yet and therefore count 0 points.
+"""
+
+from typing import TYPE_CHECKING
+from typing import Final
+
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from config.lazy_imports import lazy_import
+
+from .models import Product
+from .models import ProductMacronutrient
+from .notifications import notify_products_changed
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from django.db.models import QuerySet
+else:
+    pd = lazy_import("pandas")
+
+# Macronutrients (Macronutrient.name) used as score inputs, energy comes from
+# the Product itself.
+SCORE_INPUT_MACRONUTRIENTS: Final = ("saturated_fat", "sugars", "fiber", "proteins")
+
+# Inputs without which a product cannot be scored. Missing fiber counts 0 points.
+REQUIRED_SCORE_INPUTS: Final = ("energy", "saturated_fat", "sugars", "proteins")
+
+# A value strictly greater than the n-th threshold earns n points.
+ENERGY_THRESHOLDS: Final = tuple(335.0 * n for n in range(1, 11))
+SATURATED_FAT_THRESHOLDS: Final = tuple(float(n) for n in range(1, 11))
+SUGARS_THRESHOLDS: Final = (4.5, 9.0, 13.5, 18.0, 22.5, 27.0, 31.0, 36.0, 40.0, 45.0)
+FIBER_THRESHOLDS: Final = (0.9, 1.9, 2.8, 3.7, 4.7)
+PROTEINS_THRESHOLDS: Final = (1.6, 3.2, 4.8, 6.4, 8.0)
+
+# Above this many negative points, proteins are not counted (fruit/vegetable
+# points are always 0 here, so the exception never applies).
+PROTEINS_CAP_NEGATIVE_POINTS: Final = 11
+
+# Upper bound (inclusive) of each grade, the last grade takes everything above.
+GRADE_UPPER_BOUNDS: Final = ((-1, "A"), (2, "B"), (10, "C"), (18, "D"))
+LAST_GRADE: Final = "E"
+
+SCORE_CHUNK_SIZE: Final = 2000
+
+
+def _points(values: "np.ndarray", thresholds: tuple[float, ...]) -> "np.ndarray":
+    """Number of thresholds strictly exceeded by each value."""
+    return np.searchsorted(thresholds, values, side="left")
+
+
+def compute_nutrition_scores(inputs: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Compute score and grade for every row of ``inputs``.
+
+    :param inputs: one row per product (indexed by barcode) with ``energy``
+        (kJ) and ``SCORE_INPUT_MACRONUTRIENTS`` (g) columns, NaN when unknown.
+    :return: DataFrame with the same index and ``nutrition_score`` (nullable
+        integer) and ``nutrition_grade`` ("" when the product cannot be scored)
+        columns.
+    """
+    complete = inputs[list(REQUIRED_SCORE_INPUTS)].notna().all(axis=1).to_numpy()
+    values = inputs.fillna(0.0)
+
+    negative = (
+        _points(values["energy"].to_numpy(dtype=float), ENERGY_THRESHOLDS)
+        + _points(
+            values["saturated_fat"].to_numpy(dtype=float), SATURATED_FAT_THRESHOLDS
+        )
+        + _points(values["sugars"].to_numpy(dtype=float), SUGARS_THRESHOLDS)
+    )
+    fiber = _points(values["fiber"].to_numpy(dtype=float), FIBER_THRESHOLDS)
+    proteins = np.where(
+        negative >= PROTEINS_CAP_NEGATIVE_POINTS,
+        0,
+        _points(values["proteins"].to_numpy(dtype=float), PROTEINS_THRESHOLDS),
+    )
+    score = negative - fiber - proteins
+
+    grade = np.select(
+        [score <= bound for bound, _grade in GRADE_UPPER_BOUNDS],
+        [grade for _bound, grade in GRADE_UPPER_BOUNDS],
+        default=LAST_GRADE,
+    )
+
+    return pd.DataFrame(
+        {
+            "nutrition_score": pd.Series(score, index=inputs.index)
+            .where(complete)
+            .astype("Int64"),
+            "nutrition_grade": np.where(complete, grade, ""),
+        },
+        index=inputs.index,
+    )
+
+
+def load_score_inputs(barcodes: list[str]) -> "pd.DataFrame":
+    """
+    Load score inputs of the given products in 2 queries.
+
+    Float magnitudes are read directly from the database (stored in base
+    units) to avoid building one pint Quantity per value.
+    """
+    energy = pd.DataFrame.from_records(
+        Product.objects.filter(barcode__in=barcodes).values_list(
+            "barcode", Cast("energy", output_field=FloatField())
+        ),
+        columns=["barcode", "energy"],
+    ).set_index("barcode")
+
+    amounts = pd.DataFrame.from_records(
+        ProductMacronutrient.objects.filter(
+            product_id__in=barcodes,
+            macronutrient_id__in=SCORE_INPUT_MACRONUTRIENTS,
+        ).values_list(
+            "product_id",
+            "macronutrient_id",
+            Cast("amount", output_field=FloatField()),
+        ),
+        columns=["barcode", "macronutrient", "amount"],
+    )
+    if amounts.empty:
+        pivot = pd.DataFrame(index=energy.index, columns=SCORE_INPUT_MACRONUTRIENTS)
+    else:
+        pivot = amounts.pivot_table(
+            index="barcode",
+            columns="macronutrient",
+            values="amount",
+            aggfunc="first",
+        )
+
+    return energy.join(
+        pivot.reindex(columns=list(SCORE_INPUT_MACRONUTRIENTS)).astype(float)
+    )
+
+
+def rescore_products(
+    *,
+    only_stale: bool = True,
+    chunk_size: int = SCORE_CHUNK_SIZE,
+    products: "QuerySet[Product] | None" = None,
+) -> int:
+    """
+    Recompute and store nutrition scores, chunk by chunk.
+
+    The stale flag of a chunk is cleared *before* its inputs are read, in the
+    same transaction. An edit committed meanwhile sets the flag again (the
+    row lock makes it wait for this chunk), so it is picked up by the next
+    run instead of being lost.
+
+    :param only_stale: only rescore products whose inputs changed
+    :param chunk_size: number of products loaded and written per transaction
+    :param products: products to consider (default: the whole catalog)
+    :return: number of products rescored
+    """
+    if products is None:
+        products = Product.objects.all()
+    queryset = products.order_by("barcode")
+    if only_stale:
+        queryset = queryset.filter(nutrition_score_stale=True)
+
+    rescored = 0
+    last_barcode = ""
+    while True:
+        barcodes: list[str] = list(
+            queryset.filter(barcode__gt=last_barcode).values_list("barcode", flat=True)[
+                :chunk_size
+            ]
+        )
+        if not barcodes:
+            break
+        last_barcode = barcodes[-1]
+
+        with transaction.atomic():
+            Product.objects.filter(barcode__in=barcodes).update(
+                nutrition_score_stale=False
+            )
+            scores = compute_nutrition_scores(load_score_inputs(barcodes))
+            stored = {
+                barcode: (score, grade)
+                for barcode, score, grade in Product.objects.filter(
+                    barcode__in=barcodes
+                ).values_list("barcode", "nutrition_score", "nutrition_grade")
+            }
+            # Only write (and mark as modified) products whose score changed
+            now = timezone.now()
+            changed: list[Product] = []
+            for barcode, score, grade in scores.itertuples(name=None):
+                new_score = None if pd.isna(score) else int(score)
+                if stored.get(barcode) != (new_score, grade):
+                    changed.append(
+                        Product(
+                            barcode=barcode,
+                            nutrition_score=new_score,
+                            nutrition_grade=grade,
+                            updated_at=now,
+                        )
+                    )
+            Product.objects.bulk_update(
+                changed,
+                fields=["nutrition_score", "nutrition_grade", "updated_at"],
+                batch_size=chunk_size,
+            )
+            notify_products_changed(
+                (product.barcode for product in changed), "products.rescored"
+            )
+        rescored += len(barcodes)
+
+    return rescored
@@ -0,0 +1,108 @@
+"""
+Ranked product search (PostgreSQL full-text and trigram similarity).
+
+Each product stores a ``search_vector`` (name weighted A, description B and
+ingredient names C) indexed with GIN, and its name has a ``pg_trgm`` GIN index
+for typo tolerance. A search matches either index (bitmap OR of two index
+scans) and ranks matches by ``ts_rank`` plus name similarity, so only matching
+rows are ever read.
+
+Vectors are refreshed with one ``UPDATE`` by ``update_search_vectors`` when a
+product is saved (see ``products.signals``) and by set-based writers;
+``rebuild_search_vectors`` refreshes the whole catalog in chunks.
+"""
+
+from collections.abc import Iterable
+from typing import Final
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import CombinedSearchVector
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import transaction
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import QuerySet
+from django.db.models import Subquery
+from django.db.models import Value
+
+from .models import Ingredient
+from .models import Product
+
+# Names mix languages (OFF data): no stemming, only lowercasing.
+SEARCH_CONFIG: Final = "simple"
+SEARCH_CHUNK_SIZE: Final = 5000
+
+# Fields whose change requires refreshing the vector of a product
+SEARCH_VECTOR_FIELDS: Final = frozenset({"name", "description"})
+
+
+def product_search_vector() -> CombinedSearchVector:
+    """Expression computing the search vector of a product row."""
+    ingredient_names = Subquery(
+        Ingredient.objects.filter(product=OuterRef("pk"))
+        .order_by()
+        .values("product")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        + SearchVector(ingredient_names, weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(barcodes: Iterable[str]) -> int:
+    """Refresh the search vector of the given products (one ``UPDATE``)."""
+    return Product.objects.filter(barcode__in=list(barcodes)).update(
+        search_vector=product_search_vector()
+    )
+
+
+def rebuild_search_vectors(chunk_size: int = SEARCH_CHUNK_SIZE) -> int:
+    """Refresh every search vector, one transaction per chunk of products."""
+    updated = 0
+    last_barcode = ""
+    while True:
+        barcodes = list(
+            Product.objects.filter(barcode__gt=last_barcode)
+            .order_by("barcode")
+            .values_list("barcode", flat=True)[:chunk_size]
+        )
+        if not barcodes:
+            return updated
+        with transaction.atomic():
+            updated += update_search_vectors(barcodes)
+        last_barcode = barcodes[-1]
+
+
+def search_products(
+    queryset: QuerySet[Product],
+    text: str,
+) -> QuerySet[Product]:
+    """
+    Filter ``queryset`` on ``text`` and annotate ``search_relevance``.
+
+    Digits only are searched as a barcode prefix (a primary key range scan),
+    anything else with the full-text and trigram indexes.
+    """
+    text = text.strip()
+    if text.isdigit():
+        # ":" follows "9" in ASCII: [text, text + ":") holds every barcode
+        # starting with text.
+        return queryset.filter(barcode__gte=text, barcode__lt=f"{text}:").annotate(
+            search_relevance=Value(1.0, output_field=FloatField())
+        )
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    return queryset.filter(
+        Q(search_vector=query) | Q(name__trigram_similar=text)
+    ).annotate(
+        search_relevance=SearchRank(F("search_vector"), query)
+        + TrigramSimilarity("name", text)
+    )
@@ -1,8 +1,23 @@
 # products/signals.py
+from typing import Any
+
+from django.db import transaction
 from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
+from .catalog import bump_catalog_version
+from .models import IngredientRef
+from .models import Macronutrient
 from .models import Product
+from .models import ProductMacronutrient
+from .models import ProductVitamin
+from .notifications import notify_products_changed
+from .scoring import SCORE_INPUT_MACRONUTRIENTS
+from .search import SEARCH_VECTOR_FIELDS
+from .search import update_search_vectors
 
 
 @receiver(post_delete, sender=Product)
@@ -10,3 +25,54 @@ def delete_product_image(instance: Product, **kwargs):  # pyright: ignore[report
     """Delete image file from storage when Product instance is deleted."""
     if instance.image:
         instance.image.delete(save=False)
+
+
+@receiver(pre_save, sender=Product)
+def flag_product_nutrition_score(instance: Product, update_fields=None, **kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    """Flag the nutrition score for recompute when a Product is fully saved."""
+    if update_fields is None:
+        instance.nutrition_score_stale = True
+    elif "energy" in update_fields:
+        Product.objects.filter(pk=instance.pk).update(nutrition_score_stale=True)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(instance: Product, update_fields=None, **kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    """Refresh the search vector (name, description, ingredients) of a Product."""
+    if update_fields is None or not SEARCH_VECTOR_FIELDS.isdisjoint(update_fields):
+        update_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+def notify_product_saved(instance: Product, **kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    """Push the change to WebSocket subscribers once committed."""
+    notify_products_changed([instance.pk], "products.saved")
+
+
+# No post_delete receivers on purpose: any delete listener prevents Django from
+# fast-deleting the rows (bulk deletes, Product cascades). Set-based writers
+# flag and touch the products they change themselves.
+@receiver(post_save, sender=ProductMacronutrient)
+def touch_product_on_macronutrient_change(instance: ProductMacronutrient, **kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    """Mark the Product as modified, and its score to recompute if needed."""
+    changes: dict[str, Any] = {"updated_at": timezone.now()}
+    if instance.macronutrient_id in SCORE_INPUT_MACRONUTRIENTS:  # pyright: ignore[reportAttributeAccessIssue]
+        changes["nutrition_score_stale"] = True
+    Product.objects.filter(pk=instance.product_id).update(**changes)  # pyright: ignore[reportAttributeAccessIssue]
+
+
+# No Ingredient receiver: trees are saved node by node, and mark their product
+# as modified once (save_ingredients_from_schema, IngredientAdmin).
+@receiver(post_save, sender=ProductVitamin)
+def touch_product_on_related_change(instance: ProductVitamin, **kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    """Mark the Product as modified when one of its vitamins is."""
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())  # pyright: ignore[reportAttributeAccessIssue]
+
+
+@receiver([post_save, post_delete], sender=Macronutrient)
+@receiver([post_save, post_delete], sender=IngredientRef)
+def invalidate_catalog(**kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    """Invalidate the cached catalog (macronutrients, references) of every process."""
+    # Once committed: a process reloading its snapshot before would load the
+    # rows as they were, under the new version.
+    transaction.on_commit(bump_catalog_version)
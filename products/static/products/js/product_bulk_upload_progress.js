@@ -0,0 +1,100 @@
+// Script called in opennutrilab/templates/products/product_bulk_upload.html
+// Progress is pushed over the notifications WebSocket (topic "job:<task id>",
+// see config/websocket.py); the status API is read once the subscription is
+// active (catching up on what happened before), and polled only when
+// WebSockets are unavailable.
+window.addEventListener('DOMContentLoaded', () => {
+  const container = document.getElementById('bulk-upload-status');
+  if (!container) {
+    return; // no import running
+  }
+
+  const POLL_INTERVAL_MS = 1000;
+  const statusUrl = container.dataset.statusUrl;
+  const wsPath = container.dataset.wsPath;
+  const topic = `job:${container.dataset.taskId}`;
+  const progressBar = document.getElementById('bulk-upload-progress');
+  const summary = document.getElementById('bulk-upload-summary');
+  const errorsTable = document.getElementById('bulk-upload-errors');
+  let finished = false;
+  progressBar.style.width = '0%';
+
+  function showErrors(errors) {
+    if (!errors.length) {
+      return;
+    }
+    const body = errorsTable.tBodies[0] ?? errorsTable.createTBody();
+    errors.forEach((error) => {
+      const row = body.insertRow();
+      [error.row, error.column, error.message].forEach((value) => {
+        row.insertCell().textContent = value;
+      });
+    });
+    errorsTable.classList.remove('d-none');
+  }
+
+  // Render a status (API response or pushed message), return true once done
+  function render(status) {
+    if (finished) {
+      return true;
+    }
+    if (status.state === 'PROGRESS' && status.progress) {
+      const { done, total } = status.progress;
+      progressBar.style.width = `${total ? (100 * done) / total : 0}%`;
+      summary.textContent = `${done} / ${total}`;
+    } else if (status.state === 'SUCCESS') {
+      const { rows, imported, errors } = status.result;
+      progressBar.style.width = '100%';
+      summary.textContent = `${imported} / ${rows} imported, ${errors.length} errors`;
+      showErrors(errors);
+      finished = true;
+    } else if (status.state === 'FAILURE') {
+      progressBar.classList.add('bg-danger');
+      summary.textContent = status.error;
+      finished = true;
+    }
+    return finished;
+  }
+
+  async function fetchStatus() {
+    try {
+      const response = await fetch(statusUrl);
+      if (!response.ok) throw new Error('network error');
+      return render(await response.json());
+    } catch (error) {
+      console.error('Failed to fetch bulk upload status:', error);
+      return false;
+    }
+  }
+
+  async function poll() {
+    if (!(await fetchStatus())) {
+      setTimeout(poll, POLL_INTERVAL_MS);
+    }
+  }
+
+  if (!wsPath || !('WebSocket' in window)) {
+    poll();
+    return;
+  }
+
+  const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+  const socket = new WebSocket(`${scheme}://${window.location.host}${wsPath}`);
+  socket.addEventListener('open', () => {
+    socket.send(JSON.stringify({ subscribe: [topic] }));
+  });
+  socket.addEventListener('message', async (event) => {
+    const message = JSON.parse(event.data);
+    const done = message.subscribed
+      ? await fetchStatus()
+      : message.event === 'job' && render(message);
+    if (done) {
+      socket.close();
+    }
+  });
+  socket.addEventListener('close', () => {
+    if (!finished) {
+      poll(); // connection lost: fall back to polling
+    }
+  });
+});
@@ -4,9 +4,20 @@ window.addEventListener('DOMContentLoaded', () => {
   const plotInputs = document.querySelectorAll('#product-form .plot-input');
   const tableDiv = document.getElementById('ingredients_table');
 
+  // Children of stored ingredients are loaded on expand, one level at a time:
+  // a placeholder child makes Tabulator show the expand toggle until then.
+  const ingredientsUrl = window.CONFIG && window.CONFIG.ingredientsUrl;
+  const loadingRow = () => ({ name: '…', _placeholder: true });
+  const withLazyChildren = (nodes) =>
+    (nodes || []).map((node) =>
+      node.has_children && !node.ingredients
+        ? { ...node, ingredients: [loadingRow()] }
+        : node,
+    );
+
   if (tableDiv) {
-    const ingredientsData = JSON.parse(
-      document.getElementById('ingredients-data').textContent,
+    const ingredientsData = withLazyChildren(
+      JSON.parse(document.getElementById('ingredients-data').textContent),
     );
 
     var table = new Tabulator('#ingredients_table', {
@@ -39,6 +50,23 @@ window.addEventListener('DOMContentLoaded', () => {
       dataTreeChildField: 'ingredients',
     });
 
+    if (ingredientsUrl) {
+      table.on('dataTreeRowExpanded', async (row) => {
+        const children = row.getData().ingredients || [];
+        if (!children.length || !children[0]._placeholder) {
+          return; // already loaded
+        }
+        const params = new URLSearchParams({ parent: row.getData().id });
+        const response = await fetch(`${ingredientsUrl}?${params}`);
+        if (!response.ok) {
+          return;
+        }
+        await row.update({
+          ingredients: withLazyChildren(await response.json()),
+        });
+      });
+    }
+
     if (loader) {
       loader.style.display = 'none';
     }
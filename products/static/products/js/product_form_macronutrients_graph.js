@@ -60,15 +60,73 @@ window.addEventListener('DOMContentLoaded', () => {
     });
   }
 
-  async function updatePlot() {
-    const formData = new FormData();
+  // Chart data is streamed over one WebSocket connection (the server coalesces
+  // rapid updates). The HTTP endpoint is only used until the socket is open.
+  let socket = null;
+  const wsPath = window.CONFIG.macronutrientsWsPath;
+  if (wsPath && 'WebSocket' in window) {
+    const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+    socket = new WebSocket(`${scheme}://${window.location.host}${wsPath}`);
+    socket.addEventListener('message', (event) => {
+      try {
+        renderPlot(JSON.parse(event.data));
+      } catch (error) {
+        console.error('Failed to update macronutrients graph:', error);
+      }
+    });
+    socket.addEventListener('open', updatePlot);
+  }
 
+  function getPlotInputs() {
+    const values = {};
     plotInputs.forEach((input) => {
       const value = input.value?.trim();
-      formData.append(input.name, value === '' || value == null ? 0 : value);
+      values[input.name] = value === '' || value == null ? 0 : value;
     });
+    return values;
+  }
+
+  function renderPlot(newData) {
+    const macronutrients = newData?.macronutrients;
 
-    const params = new URLSearchParams(formData);
+    if (!macronutrients) {
+      console.warn('No macronutrient data found in response:', newData);
+      return; // nothing to update
+    }
+
+    const {
+      fat = 0,
+      saturated_fat = 0,
+      carbohydrates = 0,
+      sugars = 0,
+      fiber = 0,
+      proteins = 0,
+    } = macronutrients;
+
+    const TOTAL_PERCENTAGE = 100;
+    const used = fat + carbohydrates + fiber + proteins;
+    const remaining = newData.others ?? Math.max(TOTAL_PERCENTAGE - used, 0);
+
+    plot_data[0].values = [
+      fat,
+      saturated_fat,
+      carbohydrates,
+      sugars,
+      fiber,
+      proteins,
+      remaining,
+    ];
+
+    Plotly.react('macronutrients_graph', plot_data, plot_layout);
+  }
+
+  async function updatePlot() {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify(getPlotInputs()));
+      return;
+    }
+
+    const params = new URLSearchParams(getPlotInputs());
     const apiUrl = window.CONFIG.macronutrientsApiUrl;
 
     if (!apiUrl) {
@@ -80,38 +138,7 @@ window.addEventListener('DOMContentLoaded', () => {
       const response = await fetch(apiUrl + '?' + params.toString());
       if (!response.ok) throw new Error('network error');
 
-      const newData = await response.json();
-      const macronutrients = newData?.macronutrients;
-
-      if (!macronutrients) {
-        console.warn('No macronutrient data found in response:', newData);
-        return; // nothing to update
-      }
-
-      const {
-        fat = 0,
-        saturated_fat = 0,
-        carbohydrates = 0,
-        sugars = 0,
-        fiber = 0,
-        proteins = 0,
-      } = macronutrients;
-
-      const TOTAL_PERCENTAGE = 100;
-      const used = fat + carbohydrates + fiber + proteins;
-      const remaining = Math.max(TOTAL_PERCENTAGE - used, 0);
-
-      plot_data[0].values = [
-        fat,
-        saturated_fat,
-        carbohydrates,
-        sugars,
-        fiber,
-        proteins,
-        remaining,
-      ];
-
-      Plotly.react('macronutrients_graph', plot_data, plot_layout);
+      renderPlot(await response.json());
     } catch (error) {
       console.error('Failed to update macronutrients graph:', error);
     }
@@ -0,0 +1,23 @@
+// Script called in opennutrilab/templates/products/product_list.html
+// Shows a reload banner when products change (pushed over the notifications
+// WebSocket, see config/websocket.py) instead of polling the list.
+window.addEventListener('DOMContentLoaded', () => {
+  const banner = document.getElementById('catalog-changed');
+  const wsPath = banner && banner.dataset.wsPath;
+  if (!wsPath || !('WebSocket' in window)) {
+    return;
+  }
+
+  const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+  const socket = new WebSocket(`${scheme}://${window.location.host}${wsPath}`);
+  socket.addEventListener('open', () => {
+    socket.send(JSON.stringify({ subscribe: ['catalog'] }));
+  });
+  socket.addEventListener('message', (event) => {
+    const message = JSON.parse(event.data);
+    if (message.event && message.event.startsWith('products.')) {
+      banner.classList.remove('d-none');
+      socket.close(); // one change is enough to offer a reload
+    }
+  });
+});
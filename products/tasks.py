@@ -0,0 +1,259 @@
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+from uuid import uuid4
+
+from celery import Task
+from celery import shared_task
+from celery import states
+from celery.signals import task_postrun
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.utils import timezone
+
+from config.db_router import replica_reads
+
+from .bulk_upload import BULK_UPLOAD_EXTENSIONS
+from .bulk_upload import import_products_sheet
+from .deletion import mark_products_deleted
+from .deletion import purge_deleted_products
+from .export import EXPORT_CHUNK_SIZE
+from .export import export_catalog
+from .export import export_products_part
+from .jobs import CPU_QUEUE
+from .jobs import IO_QUEUE
+from .jobs import BarcodeRange
+from .jobs import ChunkedJob
+from .jobs import ChunkTask
+from .jobs import finish_chunked_job
+from .jobs import start_chunked_job
+from .models import Product
+from .notifications import notify_job
+from .openfoodfacts.utils import resync_products
+from .scoring import SCORE_CHUNK_SIZE
+from .scoring import rescore_products
+
+if TYPE_CHECKING:
+    from django.contrib.sessions.backends.base import SessionBase
+    from django.db.models import QuerySet
+
+# Bulk upload tasks started from a session, whose status it may read
+BULK_UPLOADS_SESSION_KEY: Final = "products_bulk_uploads"
+BULK_UPLOADS_SESSION_MAX: Final = 20
+
+
+@shared_task(queue=CPU_QUEUE)
+def rescore_products_task(*, only_stale: bool = True) -> int:
+    """Recompute stored nutrition scores (only the stale ones by default)."""
+    return rescore_products(only_stale=only_stale)
+
+
+def _default_export_dir() -> Path:
+    return (
+        Path(settings.MEDIA_ROOT)
+        / "exports"
+        / timezone.now().strftime("%Y%m%dT%H%M%SZ")
+    )
+
+
+@shared_task(queue=CPU_QUEUE)
+def export_catalog_task(output_dir: str | None = None) -> dict[str, Any]:
+    """Export the catalog as Parquet, in MEDIA_ROOT/exports/<timestamp> by default."""
+    path = Path(output_dir) if output_dir else _default_export_dir()
+    with replica_reads():
+        return export_catalog(output_dir=path)
+
+
+@shared_task(bind=True, queue=CPU_QUEUE)
+def bulk_upload_products_task(self: Task, path: str, filename: str) -> dict[str, Any]:
+    """Import a products sheet saved in the default storage, then delete it."""
+
+    def report_progress(done: int, total: int) -> None:
+        progress = {"done": done, "total": total}
+        if not self.request.is_eager:
+            self.update_state(state="PROGRESS", meta=progress)
+        notify_job(self.request.id, "PROGRESS", progress=progress)
+
+    try:
+        with default_storage.open(path, "rb") as file:
+            return import_products_sheet(file, filename, progress=report_progress)
+    finally:
+        default_storage.delete(path)
+
+
+def start_bulk_upload(uploaded_file: UploadedFile, session: "SessionBase") -> str:
+    """
+    Store an uploaded sheet and enqueue its import, return the task id (kept
+    in the session of the caller, see ``is_own_bulk_upload``).
+    """
+    filename = uploaded_file.name or ""
+    extension = Path(filename).suffix.lower()
+    if extension not in BULK_UPLOAD_EXTENSIONS:
+        msg = f"Unsupported file type {extension!r}, expected one of " + ", ".join(
+            BULK_UPLOAD_EXTENSIONS
+        )
+        raise ValueError(msg)
+
+    path = default_storage.save(
+        f"uploads/products/{uuid4().hex}{extension}", uploaded_file
+    )
+    task_id: str = bulk_upload_products_task.delay(path, filename).id
+    session[BULK_UPLOADS_SESSION_KEY] = [
+        *session.get(BULK_UPLOADS_SESSION_KEY, [])[-BULK_UPLOADS_SESSION_MAX + 1 :],
+        task_id,
+    ]
+    return task_id
+
+
+def is_own_bulk_upload(session: "SessionBase", task_id: str) -> bool:
+    """Whether the bulk upload task was started from this session."""
+    return task_id in session.get(BULK_UPLOADS_SESSION_KEY, [])
+
+
+@shared_task()
+def purge_deleted_products_task() -> dict[str, int]:
+    """Delete the products marked deleted, then enqueue their image cleanup."""
+    purged = purge_deleted_products()
+    if purged["images"]:
+        delete_product_images_task.delay(purged["images"])
+    return {"products": purged["products"], "images": len(purged["images"])}
+
+
+@shared_task(queue=IO_QUEUE)
+def delete_product_images_task(names: list[str]) -> int:
+    """Delete image files of purged products from the default storage."""
+    for name in names:
+        default_storage.delete(name)
+    return len(names)
+
+
+def start_products_deletion(barcodes: Iterable[str]) -> int:
+    """Mark products deleted and enqueue their purge, return the marked count."""
+    marked = mark_products_deleted(barcodes)
+    if marked:
+        transaction.on_commit(purge_deleted_products_task.delay)
+    return marked
+
+
+# Chunked catalog jobs (see products.jobs) ------------------------------------
+
+# Open Food Facts asks for at most 100 product reads a minute: at most 2
+# chunks of 20 products at once, 2 chunks a minute per worker.
+RESYNC_CHUNK_SIZE: Final = 20
+RESYNC_MAX_CONCURRENCY: Final = 2
+RESYNC_RATE_LIMIT: Final = "2/m"
+
+
+@shared_task()
+def finish_chunked_job_task(_processed: list[int], job_id: str) -> dict[str, Any]:
+    """Chord callback of the chunked jobs: record their success."""
+    return finish_chunked_job(job_id)
+
+
+@shared_task(base=ChunkTask, queue=CPU_QUEUE)
+def rescore_chunk_task(
+    job_id: str, index: int, barcode_range: BarcodeRange, options: dict[str, Any]
+) -> int:
+    return RESCORING_JOB.run_chunk(job_id, index, barcode_range, options)
+
+
+@shared_task(base=ChunkTask, queue=CPU_QUEUE)
+def export_chunk_task(
+    job_id: str, index: int, barcode_range: BarcodeRange, options: dict[str, Any]
+) -> int:
+    return EXPORT_JOB.run_chunk(job_id, index, barcode_range, options)
+
+
+@shared_task(base=ChunkTask, queue=IO_QUEUE, rate_limit=RESYNC_RATE_LIMIT)
+def resync_chunk_task(
+    job_id: str, index: int, barcode_range: BarcodeRange, options: dict[str, Any]
+) -> int:
+    return RESYNC_JOB.run_chunk(job_id, index, barcode_range, options)
+
+
+def _all_products(_options: dict[str, Any]) -> "QuerySet[Product]":
+    return Product.objects.all()
+
+
+def _rescoring_scope(options: dict[str, Any]) -> "QuerySet[Product]":
+    if options["only_stale"]:
+        return Product.objects.filter(nutrition_score_stale=True)
+    return Product.objects.all()
+
+
+def _rescore_chunk(
+    products: "QuerySet[Product]", _index: int, options: dict[str, Any]
+) -> int:
+    return rescore_products(only_stale=options["only_stale"], products=products)
+
+
+def _export_chunk(
+    products: "QuerySet[Product]", index: int, options: dict[str, Any]
+) -> int:
+    # One part per chunk: exporting a chunk again overwrites its part
+    return export_products_part(products, Path(options["output_dir"]), index)
+
+
+def _resync_chunk(
+    products: "QuerySet[Product]", _index: int, _options: dict[str, Any]
+) -> int:
+    return resync_products(products.values_list("barcode", flat=True))
+
+
+# Rescoring and export chunks are database-bound: 4 at once per job
+RESCORING_JOB: Final = ChunkedJob(
+    name="rescore",
+    chunk_task=rescore_chunk_task,
+    scope=_rescoring_scope,
+    run=_rescore_chunk,
+    chunk_size=SCORE_CHUNK_SIZE,
+    max_concurrency=4,
+)
+EXPORT_JOB: Final = ChunkedJob(
+    name="export",
+    chunk_task=export_chunk_task,
+    scope=_all_products,
+    run=_export_chunk,
+    chunk_size=EXPORT_CHUNK_SIZE,
+    max_concurrency=4,
+)
+RESYNC_JOB: Final = ChunkedJob(
+    name="resync",
+    chunk_task=resync_chunk_task,
+    scope=_all_products,
+    run=_resync_chunk,
+    chunk_size=RESYNC_CHUNK_SIZE,
+    max_concurrency=RESYNC_MAX_CONCURRENCY,
+)
+CHUNKED_JOBS: Final = {job.name: job for job in (RESCORING_JOB, EXPORT_JOB, RESYNC_JOB)}
+
+
+def start_job(name: str, **options: Any) -> str:
+    """
+    Start a chunked job by name, return its id.
+
+    :param options: ``only_stale`` (rescore), ``output_dir`` (export, default:
+        MEDIA_ROOT/exports/<timestamp>)
+    """
+    if name == RESCORING_JOB.name:
+        options.setdefault("only_stale", True)
+    elif name == EXPORT_JOB.name and not options.get("output_dir"):
+        options["output_dir"] = str(_default_export_dir())
+    return start_chunked_job(CHUNKED_JOBS[name], options, finish_chunked_job_task)
+
+
+@task_postrun.connect
+def notify_job_finished(
+    task_id: str, task: Task, retval: Any, state: str | None = None, **kwargs: Any
+) -> None:
+    """Push the outcome of product jobs to their WebSocket subscribers."""
+    if not task.name.startswith(f"{__name__}."):
+        return
+    if state == states.SUCCESS:
+        notify_job(task_id, state, result=retval)
+    elif state is not None:
+        notify_job(task_id, state, error=str(retval))
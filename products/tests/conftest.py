@@ -0,0 +1,12 @@
+import pytest
+
+from products.catalog import clear_catalog_cache
+
+
+@pytest.fixture(autouse=True)
+def _catalog_cache():
+    # Each test runs in a rolled back transaction: never reuse a macronutrient
+    # catalog loaded by a previous test.
+    clear_catalog_cache()
+    yield
+    clear_catalog_cache()
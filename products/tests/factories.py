@@ -0,0 +1,103 @@
+from typing import Any
+
+from factory import DictFactory
+from factory import Faker
+from factory import LazyAttribute
+from factory import LazyFunction
+from factory import Sequence
+from factory import SubFactory
+
+# Restricted circulation prefix (in-store codes): never a real product
+SYNTHETIC_BARCODE_PREFIX = "200"
+
+
+def ean13(number: int) -> str:
+    """Valid EAN-13 barcode number ``number`` of the synthetic range."""
+    digits = f"{SYNTHETIC_BARCODE_PREFIX}{number:09d}"
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(digits))
+    return f"{digits}{(10 - total % 10) % 10}"
+
+
+def ingredient_tree(depth: int, breadth: int = 2) -> list[dict[str, Any]]:
+    """
+    Ingredient tree of ``depth`` levels, ``breadth`` ingredients per node.
+
+    Names are unique in the tree (their path): ``breadth + breadth**2 + ...
+    + breadth**depth`` ingredients.
+    """
+
+    def level(path: str, remaining: int) -> list[dict[str, Any]] | None:
+        if remaining == 0:
+            return None
+        return [
+            {
+                "name": f"Ingredient {path}{i}",
+                "percentage": round(100 / breadth, 1),
+                "ingredients": level(f"{path}{i}.", remaining - 1),
+            }
+            for i in range(1, breadth + 1)
+        ]
+
+    return level("", depth) or []
+
+
+class MacronutrientsFactory(DictFactory):
+    # "Of which" values within their parent, total within 100 g
+    fat = Faker("pyfloat", min_value=0, max_value=30, right_digits=1)
+    saturated_fat = LazyAttribute(lambda o: round(o.fat * 0.4, 1))
+    carbohydrates = Faker("pyfloat", min_value=0, max_value=50, right_digits=1)
+    sugars = LazyAttribute(lambda o: round(o.carbohydrates * 0.3, 1))
+    fiber = Faker("pyfloat", min_value=0, max_value=10, right_digits=1)
+    proteins = Faker("pyfloat", min_value=0, max_value=10, right_digits=1)
+
+
+class ProductDocumentFactory(DictFactory):
+    """A product document, as written by ``write_products`` (batch API)."""
+
+    barcode = Sequence(ean13)
+    name = Faker("sentence", nb_words=3)
+    description = Faker("sentence", nb_words=8)
+    energy = Faker("pyint", min_value=0, max_value=3700)
+    macronutrients = SubFactory(MacronutrientsFactory)
+    ingredients = LazyFunction(lambda: ingredient_tree(depth=2))
+
+
+def off_product_response(document: dict[str, Any]) -> dict[str, Any]:
+    """Open Food Facts API response for a product ``document``."""
+
+    def off_ingredients(
+        ingredients: list[dict[str, Any]] | None,
+    ) -> list[dict[str, Any]] | None:
+        if ingredients is None:
+            return None
+        return [
+            {
+                "text": ingredient["name"],
+                "percent": ingredient["percentage"],
+                "ingredients": off_ingredients(ingredient["ingredients"]),
+            }
+            for ingredient in ingredients
+        ]
+
+    macronutrients = document.get("macronutrients") or {}
+    return {
+        "status": "success",
+        "result": {
+            "id": "product_found",
+            "name": "Product found",
+            "lc_name": "Product found",
+        },
+        "product": {
+            "code": document["barcode"],
+            "product_name": document["name"],
+            "categories": document.get("description"),
+            "nutriments": {
+                "energy_100g": document.get("energy"),
+                **{
+                    f"{name.replace('saturated_fat', 'saturated-fat')}_100g": amount
+                    for name, amount in macronutrients.items()
+                },
+            },
+            "ingredients": off_ingredients(document.get("ingredients")),
+        },
+    }
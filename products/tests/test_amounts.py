@@ -0,0 +1,57 @@
+from typing import Any
+
+import pytest
+from pint import Quantity
+
+from products.amounts import write_macronutrient_amounts
+from products.models import Product
+from products.models import ProductMacronutrient
+
+
+def stored_amounts(barcode: str) -> dict[str, Quantity]:
+    return dict(
+        ProductMacronutrient.objects.filter(product_id=barcode).values_list(
+            "macronutrient_id", "amount"
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_write_macronutrient_amounts_upserts_and_clears(
+    django_assert_num_queries: Any,
+):
+    Product.objects.create(name="First", barcode="3229820794556")
+    Product.objects.create(name="Second", barcode="4006381333931")
+    write_macronutrient_amounts(
+        {
+            "3229820794556": {"fat": 1.0, "sugars": 2.0, "proteins": 3.0},
+            "4006381333931": {"fat": 4.0, "sugars": 5.0},
+        }
+    )
+    # Cleared after the first write, which flagged both products
+    Product.objects.update(nutrition_score_stale=False)
+
+    with django_assert_num_queries(3):
+        write_macronutrient_amounts(
+            {
+                "3229820794556": {"fat": Quantity(1.5, "g"), "sugars": None},
+                "4006381333931": {"fat": None, "sugars": None, "fiber": 6.0},
+            }
+        )
+
+    # Macronutrients absent from the mapping are left untouched
+    assert stored_amounts("3229820794556") == {
+        "fat": Quantity(1.5, "g"),
+        "proteins": Quantity(3.0, "g"),
+    }
+    assert stored_amounts("4006381333931") == {"fiber": Quantity(6.0, "g")}
+    # Both changed score inputs (fat, sugars): flagged again by this write
+    assert all(Product.objects.values_list("nutrition_score_stale", flat=True))
+
+
+@pytest.mark.django_db
+def test_write_macronutrient_amounts_skips_empty_writes(
+    django_assert_num_queries: Any,
+):
+    with django_assert_num_queries(0):
+        write_macronutrient_amounts({})
@@ -1,8 +1,18 @@
+from typing import Any
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
 from django.test import Client
+from django.urls import reverse
+from pint import Quantity
+
+from products.models import Ingredient
+from products.models import Macronutrient
+from products.models import Product
+from products.models import ProductMacronutrient
+from products.models import ProductVitamin
+from products.models import Vitamin
 
 
 @pytest.mark.django_db
@@ -22,6 +32,7 @@ def test_get_product_success():
 
     mock_response = Mock()
     mock_response.status_code = 200
+    mock_response.content = b"{}"
     mock_response.json.return_value = mock_json
 
     with patch(
@@ -39,6 +50,7 @@ def test_get_product_success():
 def test_get_product_off_api_error():
     mock_response = Mock()
     mock_response.status_code = 500
+    mock_response.content = b"{}"
     mock_response.json.return_value = {"detail": "server error"}
 
     with patch(
@@ -76,3 +88,146 @@ def test_get_macronutrients_form_data():
     assert data["macronutrients"]["sugars"] == 20.0  # noqa: PLR2004
     assert data["macronutrients"]["fiber"] == 5.0  # noqa: PLR2004
     assert data["macronutrients"]["proteins"] == 15.0  # noqa: PLR2004
+
+
+def create_stored_product(barcode: str, name: str) -> Product:
+    product = Product.objects.create(
+        barcode=barcode, name=name, energy=Quantity(1000.0, "kJ")
+    )
+    ProductMacronutrient.objects.create(
+        product=product,
+        macronutrient=Macronutrient.objects.get(name="fat"),
+        amount=Quantity(12.5, "g"),
+    )
+    vitamin, _ = Vitamin.objects.get_or_create(
+        name="vitamin_c", defaults={"atc_code": "A11GA01", "chembl_id": "CHEMBL196"}
+    )
+    ProductVitamin.objects.create(
+        product=product, vitamin=vitamin, amount=Quantity(30.0, "mg")
+    )
+    flour = Ingredient.objects.create(product=product, name="Flour")
+    Ingredient.objects.create(product=product, name="Wheat", parent=flour)
+    return product
+
+
+@pytest.mark.django_db
+def test_get_stored_product_with_related_fields(django_assert_max_num_queries: Any):
+    create_stored_product("3229820794556", "Biscuits")
+    url = reverse("api-1.0.0:get_stored_product", kwargs={"barcode": "3229820794556"})
+
+    # Validators lookup (product row reused), then one query per related table
+    with django_assert_max_num_queries(4):
+        response = Client().get(
+            url, {"fields": "name,energy_kj,macronutrients,vitamins,ingredients"}
+        )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    data = response.json()
+    assert data["name"] == "Biscuits"
+    assert data["energy_kj"] == 1000.0  # noqa: PLR2004
+    assert data["macronutrients"] == {"fat": 12.5}
+    assert data["vitamins"] == {"vitamin_c": 30.0}
+    [flour] = data["ingredients"]
+    assert flour["name"] == "Flour"
+    assert [child["name"] for child in flour["ingredients"]] == ["Wheat"]
+    # Sparse: unselected fields are absent
+    assert "description" not in data
+
+
+@pytest.mark.django_db
+def test_get_stored_product_ingredients_reparented_under_later_row():
+    product = create_stored_product("3229820794556", "Biscuits")
+    wheat = Ingredient.objects.get(product=product, name="Wheat")
+    cereals = Ingredient.objects.create(product=product, name="Cereals")
+    Ingredient.objects.filter(pk=wheat.pk).update(parent=cereals)
+    url = reverse("api-1.0.0:get_stored_product", kwargs={"barcode": "3229820794556"})
+
+    data = Client().get(url, {"fields": "ingredients"}).json()
+
+    assert [
+        (node["name"], [child["name"] for child in node["ingredients"]])
+        for node in data["ingredients"]
+    ] == [("Flour", []), ("Cereals", ["Wheat"])]
+
+
+@pytest.mark.django_db
+def test_get_stored_product_conditional_and_errors(django_assert_num_queries: Any):
+    create_stored_product("3229820794556", "Biscuits")
+    client = Client()
+    url = reverse("api-1.0.0:get_stored_product", kwargs={"barcode": "3229820794556"})
+
+    response = client.get(url)
+    assert set(response.json()) == {
+        "barcode",
+        "name",
+        "description",
+        "image_url",
+        "created_at",
+        "updated_at",
+        "energy_kj",
+        "nutrition_score",
+        "nutrition_grade",
+    }
+    with django_assert_num_queries(1):
+        response = client.get(url, headers={"if-none-match": response["ETag"]})
+    assert response.status_code == 304  # noqa: PLR2004
+
+    assert client.get(url, {"fields": "name,price"}).status_code == 400  # noqa: PLR2004
+    missing = reverse(
+        "api-1.0.0:get_stored_product", kwargs={"barcode": "0000000000000"}
+    )
+    assert client.get(missing).status_code == 404  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_list_stored_products_pages_within_query_budget(
+    django_assert_max_num_queries: Any,
+):
+    for i in range(5):
+        create_stored_product(f"{i:013d}", f"Product {i}")
+    client = Client()
+    url = reverse("api-1.0.0:list_stored_products")
+    params = {
+        "fields": "name,macronutrients,vitamins,ingredients",
+        "sort": "name",
+        "limit": 3,
+    }
+
+    with django_assert_max_num_queries(4):
+        first = client.get(url, params).json()
+    with django_assert_max_num_queries(4):
+        second = client.get(url, {**params, "cursor": first["next_cursor"]}).json()
+
+    names = [product["name"] for product in first["results"] + second["results"]]
+    assert names == [f"Product {i}" for i in range(5)]
+    assert second["next_cursor"] is None
+    assert all(
+        product["macronutrients"] == {"fat": 12.5} for product in second["results"]
+    )
+
+
+@pytest.mark.django_db
+def test_get_stored_product_ingredients_one_level_per_query(
+    django_assert_num_queries: Any,
+):
+    product = create_stored_product("3229820794556", "Biscuits")
+    flour = Ingredient.objects.get(product=product, name="Flour")
+    Ingredient.objects.create(product=product, name="Sugar")
+    url = reverse(
+        "api-1.0.0:get_stored_product_ingredients", kwargs={"barcode": "3229820794556"}
+    )
+    client = Client()
+
+    with django_assert_num_queries(1):
+        roots = client.get(url).json()
+    assert [(node["name"], node["has_children"]) for node in roots] == [
+        ("Flour", True),
+        ("Sugar", False),
+    ]
+    assert "ingredients" not in roots[0]
+
+    with django_assert_num_queries(1):
+        children = client.get(url, {"parent": flour.pk}).json()
+    assert [(node["name"], node["has_children"]) for node in children] == [
+        ("Wheat", False)
+    ]
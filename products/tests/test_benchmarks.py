@@ -0,0 +1,53 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from products.models import Product
+from products.tests.factories import ProductDocumentFactory
+from products.tests.factories import ingredient_tree
+from products.writes import write_products
+
+
+def test_ingredient_tree_size():
+    def count(tree: list[dict] | None) -> int:
+        return sum(1 + count(node["ingredients"]) for node in tree or [])
+
+    assert ingredient_tree(0) == []
+    assert count(ingredient_tree(3)) == 2 + 4 + 8
+    assert count(ingredient_tree(2, breadth=3)) == 3 + 9
+
+
+@pytest.mark.django_db
+def test_product_documents_are_valid():
+    # EAN-13 check digits, nutrient ranges and ingredient trees pass validation
+    results = write_products(ProductDocumentFactory.build_batch(5))
+    assert {result["status"] for result in results} == {"created"}
+
+
+@pytest.mark.django_db
+def test_benchmark_hot_paths_reports_every_case(tmp_path: Path):
+    output = tmp_path / "hot_paths.json"
+    out = StringIO()
+
+    call_command(
+        "benchmark_hot_paths",
+        "--current-db",
+        products=[3],
+        depths=[1, 2],
+        repeat=1,
+        output=str(output),
+        stdout=out,
+    )
+
+    report = json.loads(output.read_text())
+    cases = {result["case"] for result in report["results"]}
+    assert {"off.parse_product_response", "form.save", "api.product"} <= cases
+    assert len(report["results"]) == 2 * len(cases)
+    form_save = next(r for r in report["results"] if r["case"] == "form.save")
+    assert form_save["queries"] > 0
+    assert "form.save" in out.getvalue()
+    # Nothing is left behind
+    assert not Product.objects.exists()
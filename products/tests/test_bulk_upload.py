@@ -0,0 +1,132 @@
+import io
+from typing import cast
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.urls import reverse
+from pint import Quantity
+
+from products.bulk_upload import ean13_is_valid
+from products.bulk_upload import import_products_sheet
+from products.bulk_upload import validate_sheet
+from products.models import Product
+from products.models import ProductMacronutrient
+from products.tasks import BULK_UPLOADS_SESSION_KEY
+
+SHEET = """barcode,name,energy,fat,saturated_fat
+3229820794556,Muesli,1600,8,1.5
+3229820794557,Bad checksum,100,,
+3560071429508,Too fat,100,101,
+3242272270157,,100,5,6
+"""
+
+
+# Python (object) and pyarrow (str) regexes do not match the same digits
+@pytest.mark.parametrize("dtype", [object, str])
+def test_ean13_is_valid(dtype: type):
+    barcodes = pd.Series(
+        [
+            "3229820794556",
+            "3229820794557",
+            "12345",
+            "abcdefghijklm",
+            # Full-width digits: Unicode digits, not ASCII ones
+            "\uff13\uff12\uff12\uff19\uff18\uff12\uff10\uff17\uff19\uff14\uff15\uff15\uff16",
+        ],
+        dtype=dtype,
+    )
+
+    assert ean13_is_valid(barcodes).tolist() == [True, False, False, False, False]
+
+
+def test_validate_sheet_reports_every_bad_row():
+    frame = pd.read_csv(io.StringIO(SHEET), dtype=str, keep_default_na=False)
+
+    valid, errors = validate_sheet(frame)
+
+    assert valid["barcode"].tolist() == ["3229820794556"]
+    assert {(error["row"], error["column"]) for error in errors} == {
+        (3, "barcode"),
+        (4, "fat"),
+        (5, "name"),
+        (5, "saturated_fat"),
+    }
+
+
+@pytest.mark.django_db
+def test_import_products_sheet_upserts_valid_rows():
+    Product.objects.create(barcode="3229820794556", name="Old name")
+    progress = MagicMock()
+
+    result = import_products_sheet(
+        io.BytesIO(SHEET.encode()), "products.csv", progress=progress
+    )
+
+    assert result["rows"] == 4  # noqa: PLR2004
+    assert result["imported"] == 1
+    assert len(result["errors"]) == 4  # noqa: PLR2004
+    progress.assert_called_once_with(1, 1)
+
+    product = Product.objects.get(barcode="3229820794556")
+    assert product.name == "Muesli"
+    assert product.energy == Quantity(1600, "kJ")
+    assert product.nutrition_score_stale is True
+    amounts = {
+        pm.macronutrient_id: cast("Quantity", pm.amount)  # pyright: ignore[reportAttributeAccessIssue]
+        for pm in ProductMacronutrient.objects.filter(product=product)
+    }
+    assert amounts == {"fat": Quantity(8, "g"), "saturated_fat": Quantity(1.5, "g")}
+    assert not Product.objects.filter(barcode="3560071429508").exists()
+
+
+@pytest.mark.django_db
+def test_bulk_upload_view_runs_import(client: Client, settings):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    upload = SimpleUploadedFile("products.csv", SHEET.encode(), "text/csv")
+
+    response = client.post(reverse("bulk_upload_products"), {"file": upload})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.context["task_id"]
+    assert Product.objects.filter(barcode="3229820794556").exists()
+
+
+@pytest.mark.django_db
+def test_get_bulk_upload_status_reports_progress(client: Client):
+    session = client.session
+    session[BULK_UPLOADS_SESSION_KEY] = ["some-task-id"]
+    session.save()
+    with patch("products.api_ninja.AsyncResult") as mock_result:
+        mock_result.return_value.state = "PROGRESS"
+        mock_result.return_value.info = {"done": 1000, "total": 5000}
+        response = client.get("/api-ninja/products/bulk-upload/some-task-id")
+
+    assert response.json() == {
+        "state": "PROGRESS",
+        "progress": {"done": 1000, "total": 5000},
+        "result": None,
+        "error": None,
+    }
+
+
+@pytest.mark.django_db
+def test_get_bulk_upload_status_only_for_own_uploads(client: Client, settings):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    upload = SimpleUploadedFile("products.csv", SHEET.encode(), "text/csv")
+    task_id = client.post(reverse("bulk_upload_products"), {"file": upload}).context[
+        "task_id"
+    ]
+    url = reverse("api-1.0.0:get_bulk_upload_status", kwargs={"task_id": task_id})
+
+    with patch("products.api_ninja.AsyncResult") as mock_result:
+        mock_result.return_value.state = "STARTED"
+        mock_result.return_value.successful.return_value = False
+        mock_result.return_value.failed.return_value = False
+        assert client.get(url).status_code == 200  # noqa: PLR2004
+        assert Client().get(url).status_code == 404  # noqa: PLR2004
+
+    mock_result.assert_called_once_with(task_id)
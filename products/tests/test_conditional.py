@@ -0,0 +1,92 @@
+from typing import Any
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from products.amounts import write_macronutrient_amounts
+from products.catalog import bump_catalog_version
+from products.models import Product
+from products.openfoodfacts.schema import OFFIngredientSchema
+from products.openfoodfacts.utils import save_ingredients_from_schema
+from products.scoring import rescore_products
+
+
+def get_etag(client: Client, product: Product) -> str:
+    response = client.get(reverse("edit_product", args=[product.pk]))
+    assert response.status_code == 200  # noqa: PLR2004
+    return response["ETag"]
+
+
+@pytest.mark.django_db
+def test_edit_page_answers_revalidation_with_304_in_one_query(
+    client: Client, django_assert_num_queries: Any
+):
+    product = Product.objects.create(barcode="3229820794556", name="Chocolate")
+    url = reverse("edit_product", args=[product.pk])
+
+    response = client.get(url)
+    assert response.status_code == 200  # noqa: PLR2004
+    assert "Last-Modified" not in response
+    assert "private" in response["Cache-Control"]
+
+    with django_assert_num_queries(1):
+        response = client.get(url, headers={"if-none-match": response["ETag"]})
+    assert response.status_code == 304  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_product_etag_changes_with_related_rows():
+    client = Client()
+    product = Product.objects.create(barcode="3229820794556", name="Chocolate")
+    etags = {get_etag(client, product)}
+
+    write_macronutrient_amounts({product.pk: {"fat": 30.0}})
+    etags.add(get_etag(client, product))
+
+    save_ingredients_from_schema([OFFIngredientSchema(name="Cocoa")], product)
+    etags.add(get_etag(client, product))
+
+    product.name = "Dark chocolate"
+    product.save()
+    etags.add(get_etag(client, product))
+
+    assert len(etags) == 4  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_edit_page_etag_covers_csrf_secret_and_catalog():
+    client = Client()
+    product = Product.objects.create(barcode="3229820794556", name="Chocolate")
+    etag = get_etag(client, product)
+    assert get_etag(client, product) == etag
+
+    # Another client has another CSRF secret: the page embeds another token
+    assert get_etag(Client(), product) != etag
+
+    bump_catalog_version()
+    assert get_etag(client, product) != etag
+
+
+@pytest.mark.django_db
+def test_rescore_only_touches_products_whose_score_changed():
+    product = Product.objects.create(barcode="3229820794556", name="Unscored")
+    rescore_products()  # no inputs: the score stays empty
+    product.refresh_from_db()
+
+    Product.objects.filter(pk=product.pk).update(nutrition_score_stale=True)
+    rescore_products()
+
+    assert Product.objects.get(pk=product.pk).updated_at == product.updated_at
+
+
+@pytest.mark.django_db
+def test_edit_page_with_reset_has_no_validators(client: Client):
+    product = Product.objects.create(barcode="3229820794556", name="Chocolate")
+
+    response = client.get(
+        reverse("edit_product", args=[product.pk]),
+        {"reset": "0"},
+    )
+
+    assert "ETag" not in response
@@ -0,0 +1,40 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+from config.db_pool import database_pool_options
+
+
+@pytest.mark.parametrize(
+    ("concurrency", "min_size", "max_size"),
+    [(0, 1, 1), (1, 1, 1), (20, 10, 20)],
+)
+def test_database_pool_options_sized_from_concurrency(
+    concurrency: int, min_size: int, max_size: int
+):
+    options = database_pool_options(concurrency, timeout=5.0)
+
+    assert (options["min_size"], options["max_size"]) == (min_size, max_size)
+    assert options["timeout"] == 5.0  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+def test_benchmark_db_pool_reports_both_modes():
+    out = StringIO()
+
+    call_command("benchmark_db_pool", threads=2, requests=10, json=True, stdout=out)
+
+    results = json.loads(out.getvalue())
+    for mode in ("without_pool", "with_pool"):
+        assert results[mode]["requests"] == 10  # noqa: PLR2004
+        assert results[mode]["requests_per_second"] > 0
+    pool = results["with_pool"]["pool"]
+    assert pool["pool_max"] == 2  # noqa: PLR2004
+    assert 0 <= pool["saturation"] <= 1
+    # The configured databases are left alone, the benchmark pool is closed
+    assert "benchmark_with_pool" not in connections.settings
+    assert "benchmark_with_pool" not in DatabaseWrapper._connection_pools  # noqa: SLF001
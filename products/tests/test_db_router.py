@@ -0,0 +1,61 @@
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from config.db_router import REPLICA_DB_ALIAS
+from config.db_router import STICKY_COOKIE
+from config.db_router import PrimaryReplicaRouter
+from config.db_router import PrimaryStickinessMiddleware
+from config.db_router import read_from_replica
+from config.db_router import replica_reads
+from products.models import Product
+
+router = PrimaryReplicaRouter()
+
+
+@pytest.fixture(autouse=True)
+def replica(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("config.db_router.replica_configured", lambda: True)
+
+
+def test_only_marked_product_reads_use_the_replica():
+    assert router.db_for_read(Product) is None
+
+    with replica_reads():
+        assert router.db_for_read(Product) == REPLICA_DB_ALIAS
+        assert router.db_for_read(get_user_model()) is None
+
+        # Once products are written, reads see them on the primary
+        router.db_for_write(Product)
+        assert router.db_for_read(Product) is None
+
+
+def test_client_sticks_to_primary_after_writing():
+    reads: list[str | None] = []
+
+    @read_from_replica
+    def view(request: HttpRequest) -> HttpResponse:
+        reads.append(router.db_for_read(Product))
+        if request.method == "POST":
+            router.db_for_write(Product)
+        return HttpResponse()
+
+    middleware = PrimaryStickinessMiddleware(view)
+    factory = RequestFactory()
+
+    assert STICKY_COOKIE not in middleware(factory.get("/")).cookies
+    response = middleware(factory.post("/"))
+    until = float(response.cookies[STICKY_COOKIE].value)
+    assert until > time.time()
+
+    # Within the window, then after it
+    factory.cookies[STICKY_COOKIE] = str(until)
+    middleware(factory.get("/"))
+    factory.cookies[STICKY_COOKIE] = str(time.time() - 1)
+    middleware(factory.get("/"))
+
+    assert reads == [REPLICA_DB_ALIAS, REPLICA_DB_ALIAS, None, REPLICA_DB_ALIAS]
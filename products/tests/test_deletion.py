@@ -0,0 +1,135 @@
+import json
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from django.contrib import admin
+from django.contrib.auth.models import Permission
+from django.test import Client
+from django.test import RequestFactory
+from django.urls import reverse
+from pint import Quantity
+
+from opennutrilab.users.tests.factories import UserFactory
+from products.deletion import purge_deleted_products
+from products.models import Ingredient
+from products.models import Macronutrient
+from products.models import Product
+from products.models import ProductMacronutrient
+from products.models import ProductVitamin
+from products.models import Vitamin
+from products.tasks import purge_deleted_products_task
+from products.tasks import start_products_deletion
+
+
+def create_product(barcode: str, image: str = "") -> Product:
+    product = Product.objects.create(barcode=barcode, name=barcode, image=image)
+    ProductMacronutrient.objects.create(
+        product=product,
+        macronutrient=Macronutrient.objects.get(name="fat"),
+        amount=Quantity(1.0, "g"),
+    )
+    vitamin, _ = Vitamin.objects.get_or_create(
+        name="vitamin_c", defaults={"atc_code": "A11GA01", "chembl_id": "CHEMBL196"}
+    )
+    ProductVitamin.objects.create(
+        product=product, vitamin=vitamin, amount=Quantity(1.0, "mg")
+    )
+    flour = Ingredient.objects.create(product=product, name="Flour")
+    Ingredient.objects.create(product=product, name="Wheat", parent=flour)
+    return product
+
+
+@pytest.mark.django_db
+def test_marked_products_are_hidden_then_purged_by_batches(
+    django_capture_on_commit_callbacks: Any,
+    django_assert_num_queries: Any,
+):
+    barcodes = ["0000000000001", "0000000000002", "0000000000003"]
+    for barcode in barcodes:
+        create_product(barcode, image=f"images/products/{barcode}.jpg")
+    kept = create_product("0000000000004")
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        assert start_products_deletion(barcodes) == 3  # noqa: PLR2004
+    # The purge is enqueued once the marks are committed (along with the
+    # notification of the deleted products)
+    assert callbacks.count(purge_deleted_products_task.delay) == 1
+    assert list(Product.objects.values_list("barcode", flat=True)) == [kept.pk]
+    assert Product.all_objects.count() == 4  # noqa: PLR2004
+
+    # Per batch, in its savepoint: the lock then one DELETE per table. Then
+    # the empty lookup ending the purge.
+    with django_assert_num_queries(2 * 7 + 3):
+        result = purge_deleted_products(batch_size=2)
+
+    assert result == {
+        "products": 3,
+        "images": [f"images/products/{barcode}.jpg" for barcode in barcodes],
+    }
+    assert list(Product.all_objects.values_list("barcode", flat=True)) == [kept.pk]
+    for model in (Ingredient, ProductMacronutrient, ProductVitamin):
+        assert set(model.objects.values_list("product_id", flat=True)) == {kept.pk}
+
+
+@pytest.mark.django_db
+def test_purge_task_enqueues_image_cleanup():
+    create_product("0000000000001", image="images/products/0000000000001.jpg")
+    create_product("0000000000002")
+    start_products_deletion(["0000000000001", "0000000000002"])
+
+    with patch("products.tasks.delete_product_images_task.delay") as delete_images:
+        assert purge_deleted_products_task() == {"products": 2, "images": 1}
+
+    delete_images.assert_called_once_with(["images/products/0000000000001.jpg"])
+
+
+@pytest.mark.django_db
+def test_bulk_delete_api_marks_products():
+    create_product("0000000000001")
+    client = Client()
+    client.force_login(UserFactory(is_staff=True))
+
+    response = client.post(
+        reverse("api-1.0.0:delete_products_bulk"),
+        json.dumps({"barcodes": ["0000000000001", "0000000000009"]}),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 202  # noqa: PLR2004
+    assert response.json() == {"marked": 1}
+    assert not Product.objects.exists()
+    assert Product.all_objects.get().deleted_at is not None
+
+
+@pytest.mark.django_db
+def test_bulk_delete_api_refuses_anonymous_and_non_staff_users():
+    create_product("0000000000001")
+    non_staff = Client()
+    non_staff.force_login(UserFactory(is_staff=False))
+
+    for client, status_code in (
+        (Client(enforce_csrf_checks=True), 403),  # cross-site form: no CSRF token
+        (Client(), 401),
+        (non_staff, 403),
+    ):
+        response = client.post(
+            reverse("api-1.0.0:delete_products_bulk"),
+            json.dumps({"barcodes": ["0000000000001"]}),
+            content_type="application/json",
+        )
+        assert response.status_code == status_code
+
+    assert Product.objects.exists()
+
+
+@pytest.mark.django_db
+def test_admin_delete_action_requires_delete_permission(rf: RequestFactory):
+    request = rf.get("/admin/products/product/")
+    request.user = UserFactory(is_staff=True)
+    model_admin = admin.site.get_model_admin(Product)
+    assert "delete_in_background" not in model_admin.get_actions(request)
+
+    request.user.user_permissions.add(Permission.objects.get(codename="delete_product"))
+    request.user = type(request.user).objects.get(pk=request.user.pk)
+    assert "delete_in_background" in model_admin.get_actions(request)
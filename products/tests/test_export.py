@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pint import Quantity
+
+from products.export import export_catalog
+from products.export import flatten_ingredients
+from products.models import Ingredient
+from products.models import Macronutrient
+from products.models import Product
+from products.models import ProductMacronutrient
+
+
+def test_flatten_ingredients_adds_depth_and_path():
+    # Children listed before their parent on purpose
+    rows = [
+        (3, "1234567890128", 2, "Gluten", None, None),
+        (2, "1234567890128", 1, "Wheat", 30.0, None),
+        (1, "1234567890128", None, "Flour", 50.0, None),
+    ]
+
+    frame = flatten_ingredients(rows).set_index("id")
+
+    assert frame.loc[1, "depth"] == 0
+    assert frame.loc[1, "path"] == "Flour"
+    assert frame.loc[3, "depth"] == 2  # noqa: PLR2004
+    assert frame.loc[3, "path"] == "Flour > Wheat > Gluten"
+
+
+@pytest.mark.django_db
+def test_export_catalog_writes_one_part_per_chunk_and_table(tmp_path: Path):
+    for barcode in ("1234567890128", "3229820794556", "3560071429508"):
+        Product.objects.create(
+            barcode=barcode, name=barcode, energy=Quantity(1.0, "kcal")
+        )
+    product = Product.objects.get(barcode="3229820794556")
+    ProductMacronutrient.objects.create(
+        product=product,
+        macronutrient=Macronutrient.objects.get(name="fat"),
+        amount=Quantity(1500, "mg"),
+    )
+    flour = Ingredient.objects.create(product=product, name="Flour")
+    Ingredient.objects.create(product=product, name="Wheat", parent=flour)
+
+    stats = export_catalog(output_dir=tmp_path, chunk_size=2)
+
+    assert stats["rows"] == {
+        "products": 3,
+        "product_macronutrients": 1,
+        "product_vitamins": 0,
+        "ingredients": 2,
+    }
+    assert len(list((tmp_path / "products").glob("*.parquet"))) == 2  # noqa: PLR2004
+
+    products = pd.read_parquet(tmp_path / "products")
+    assert products["energy_kj"].round(3).tolist() == [4.184] * 3
+
+    macronutrients = pd.read_parquet(tmp_path / "product_macronutrients")
+    assert macronutrients["amount_g"].tolist() == [1.5]
+
+    ingredients = pd.read_parquet(tmp_path / "ingredients")
+    assert sorted(ingredients["path"]) == ["Flour", "Flour > Wheat"]
@@ -1,9 +1,12 @@
+from typing import Any
 from typing import cast
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
 from crispy_forms.bootstrap import FieldWithButtons
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from pint import Quantity
 from quantityfield.units import ureg
 
@@ -204,7 +207,7 @@ def test_save_with_fetched_image_and_delete():
         patch("django.core.files.storage.FileSystemStorage.save") as mock_save,
     ):
         # --- Mock HTTP response ---
-        mock_response = Mock()
+        mock_response = Mock(status_code=200)
         mock_response.content = b"fake image bytes"
         mock_response.raise_for_status = Mock()
         mock_requests_get.return_value = mock_response
@@ -238,6 +241,40 @@ def test_save_with_fetched_image_and_delete():
         assert product.image.name == path
 
 
+@pytest.mark.django_db
+def test_save_downloads_image_before_any_database_write():
+    form = ProductForm(
+        data={
+            "barcode": "3242272270157",
+            "name": "Apple",
+            "energy_0": 100,
+            "energy_1": "kJ",
+        }
+    )
+    form.extra_data = {"fetched_image_url": "https://example.com/apple.jpg"}
+    assert form.is_valid(), form.errors
+    queries_before_download: list[int] = []
+
+    def download(*args: Any, **kwargs: Any) -> Mock:
+        queries_before_download.append(len(queries))
+        return Mock(status_code=200, content=b"fake image bytes")
+
+    with (
+        patch("products.forms.requests.get", side_effect=download),
+        patch("django.core.files.storage.FileSystemStorage.exists", return_value=False),
+        patch(
+            "django.core.files.storage.FileSystemStorage.save",
+            return_value="images/products/3242272270157.jpg",
+        ),
+        CaptureQueriesContext(connection) as queries,
+    ):
+        form.save()
+
+    # The network wait happens before the transaction of the writes
+    assert queries_before_download == [0]
+    assert Product.objects.filter(barcode="3242272270157").exists()
+
+
 @pytest.mark.django_db
 def test_product_form_save_with_ingredients_schema():
     # --- Setup product ---
@@ -283,3 +320,75 @@ def test_product_form_save_with_ingredients_schema():
         ing_to_delete = Ingredient.objects.create(name="OldIngredient", product=product)
         form.save()
         assert not Ingredient.objects.filter(pk=ing_to_delete.pk).exists()
+
+
+@pytest.mark.django_db
+def test_product_form_edit_construction_makes_one_query(
+    django_assert_num_queries: Any,
+):
+    product = Product.objects.create(name="Query Test", barcode="3229820794556")
+    ProductMacronutrient.objects.create(
+        product=product,
+        macronutrient=Macronutrient.objects.get(name="fat"),
+        amount=Quantity(value=3.0, units=ureg.g),
+    )
+    ProductForm(instance=product)  # warm up the macronutrient catalog cache
+
+    # Only the amounts prefill query remains
+    with django_assert_num_queries(1):
+        form = ProductForm(instance=product)
+
+    assert form.fields["macronutrients_fat"].initial == Quantity(3.0, "g")
+
+
+@pytest.mark.django_db
+def test_product_form_sees_new_macronutrient_after_catalog_change(
+    django_capture_on_commit_callbacks: Any,
+):
+    ProductForm()  # warm up the macronutrient catalog cache
+
+    with django_capture_on_commit_callbacks(execute=True):
+        macronutrient = Macronutrient.objects.create(
+            name="starch_test", name_in_form="macronutrients_starch_test"
+        )
+        # The catalog is invalidated once the change is committed
+        assert macronutrient.name_in_form not in ProductForm().fields
+
+    assert macronutrient.name_in_form in ProductForm().fields
+
+
+@pytest.mark.django_db
+def test_product_form_save_writes_macronutrients_in_constant_queries(
+    django_assert_num_queries: Any,
+):
+    product = Product.objects.create(name="Query Test", barcode="3229820794556")
+    ProductMacronutrient.objects.create(
+        product=product,
+        macronutrient=Macronutrient.objects.get(name="sugars"),
+        amount=Quantity(value=3.0, units=ureg.g),
+    )
+    form = ProductForm(
+        data={
+            "barcode": "3229820794556",
+            "name": "Query Test",
+            "energy_0": 150,
+            "energy_1": "kJ",
+            "macronutrients_fat_0": 2.5,
+            "macronutrients_fat_1": "g",
+            "macronutrients_proteins_0": 8.0,
+            "macronutrients_proteins_1": "g",
+        },
+        instance=product,
+    )
+    assert form.is_valid(), form.errors
+
+    # Amounts upsert, cleared amounts delete, score flag, product update and
+    # search vector refresh, whatever the number of macronutrients
+    with django_assert_num_queries(5):
+        form.save()
+
+    assert dict(
+        ProductMacronutrient.objects.filter(product=product).values_list(
+            "macronutrient_id", "amount"
+        )
+    ) == {"fat": Quantity(2.5, "g"), "proteins": Quantity(8.0, "g")}
@@ -0,0 +1,63 @@
+import sys
+from types import ModuleType
+
+import pytest
+
+from config.importtime import ENTRY_POINTS
+from config.importtime import SETUP_ENTRY_POINT
+from config.importtime import measure_imports
+from config.importtime import parse_importtime
+from config.lazy_imports import lazy_import
+
+# Loaded on first use only: never by importing an entry point. Not listed:
+# ``requests`` (allauth imports it for its social account providers),
+# ``redis`` (Celery loads it with its result backend) and ``numpy`` (pint
+# imports it, through the quantity fields of the models).
+LAZY_PACKAGES = {"pandas", "pyarrow", "httpx"}
+
+IMPORTTIME_STDERR = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | early
+--- importtime marker ---
+import time:        50 |         50 |   json.decoder
+import time:        20 |         70 | json
+import time:        30 |         30 | products.units
+"""
+
+
+def test_parse_importtime_counts_after_marker():
+    times = parse_importtime("products", IMPORTTIME_STDERR)
+
+    assert times.self_us == {"json.decoder": 50, "json": 20, "products.units": 30}
+    assert times.total_us == 100  # noqa: PLR2004
+    assert times.by_package() == {"json": 70, "products": 30}
+
+
+def test_parse_importtime_failed_import():
+    with pytest.raises(RuntimeError):
+        parse_importtime("products", "ModuleNotFoundError: No module named 'x'")
+
+
+def test_lazy_import_executes_on_first_access(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+
+    module = lazy_import("colorsys")
+    assert type(module) is not ModuleType
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert type(module) is ModuleType
+    assert lazy_import("colorsys") is module
+
+
+def test_lazy_import_missing_module():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_import("no_such_module")
+
+
+@pytest.mark.parametrize("entry_point", ENTRY_POINTS)
+def test_entry_points_do_not_import_lazy_packages(entry_point: str):
+    times = measure_imports(entry_point)
+    if entry_point != SETUP_ENTRY_POINT:
+        times.self_us.update(measure_imports(SETUP_ENTRY_POINT).self_us)
+
+    packages = {name.partition(".")[0] for name in times.modules}
+    assert not packages & LAZY_PACKAGES
@@ -0,0 +1,89 @@
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from django.test import Client
+from pint import Quantity
+
+from products.jobs import get_job_status
+from products.jobs import get_job_store
+from products.jobs import split_barcode_ranges
+from products.jobs import start_chunked_job
+from products.models import Product
+from products.tasks import EXPORT_JOB
+from products.tasks import export_chunk_task
+from products.tasks import finish_chunked_job_task
+
+BARCODES = ("1234567890128", "3229820794556", "3560071429508")
+
+
+@pytest.fixture
+def products() -> list[Product]:
+    return [
+        Product.objects.create(
+            barcode=barcode, name=barcode, energy=Quantity(1.0, "kcal")
+        )
+        for barcode in BARCODES
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("products")
+def test_split_barcode_ranges_covers_the_keyspace():
+    assert split_barcode_ranges(Product.objects.all(), 2) == [
+        ("", "3229820794556"),
+        ("3229820794556", None),
+    ]
+    assert split_barcode_ranges(Product.objects.none(), 2) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("products")
+def test_chunked_job_runs_every_chunk_once(settings, tmp_path: Path):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    options = {"output_dir": str(tmp_path)}
+
+    job_id = start_chunked_job(
+        replace(EXPORT_JOB, chunk_size=2), options, finish_chunked_job_task
+    )
+
+    assert get_job_status(job_id) == {
+        "state": "SUCCESS",
+        "progress": {"done": 2, "total": 2},
+        "result": {"chunks": 2, "processed": 3},
+    }
+    assert len(list((tmp_path / "products").glob("*.parquet"))) == 2  # noqa: PLR2004
+
+    # Delivered again once done: skipped
+    assert export_chunk_task.apply(args=(job_id, 0, ("", None), options)).get() == 0
+    assert get_job_status(job_id)["progress"] == {"done": 2, "total": 2}  # pyright: ignore[reportOptionalSubscript]
+
+
+def test_job_store_caps_running_chunks():
+    store = get_job_store()
+    store.start("capped", {"state": "PROGRESS", "total": 3, "done": 0})
+
+    assert store.acquire_slot("capped", 0, 2)
+    assert store.acquire_slot("capped", 1, 2)
+    assert not store.acquire_slot("capped", 2, 2)
+    store.release_slot("capped", 0)
+    assert store.acquire_slot("capped", 2, 2)
+
+
+@pytest.mark.django_db
+def test_get_job_status_endpoint(client: Client):
+    job_id = start_chunked_job(
+        EXPORT_JOB, {"output_dir": "unused"}, finish_chunked_job_task
+    )
+
+    response = client.get(f"/api-ninja/products/jobs/{job_id}")
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.json() == {
+        "state": "SUCCESS",
+        "progress": {"done": 0, "total": 0},
+        "result": {"chunks": 0, "processed": 0},
+        "error": None,
+    }
+
+    response = client.get("/api-ninja/products/jobs/unknown")
+    assert response.status_code == 404  # noqa: PLR2004
@@ -0,0 +1,93 @@
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+from django.test import Client
+from prometheus_client import REGISTRY
+
+from config.metrics import OTHER_METHOD
+from config.metrics import UNRESOLVED_ROUTE
+from config.metrics import outbound_http
+
+
+def _sample(name: str, route: str) -> float:
+    return REGISTRY.get_sample_value(name, {"route": route}) or 0.0
+
+
+@pytest.mark.django_db
+def test_requests_observed_by_route(client: Client):
+    count = _sample("opennutrilab_request_db_queries_count", "/products/")
+    queries = _sample("opennutrilab_request_db_queries_sum", "/products/")
+
+    response = client.get("/products/", {"format": "json"})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert _sample("opennutrilab_request_db_queries_count", "/products/") == count + 1
+    assert _sample("opennutrilab_request_db_queries_sum", "/products/") > queries
+    assert (
+        REGISTRY.get_sample_value(
+            "opennutrilab_request_duration_seconds_count",
+            {"route": "/products/", "method": "GET", "status": "200"},
+        )
+        or 0
+    ) >= 1
+
+
+@pytest.mark.django_db
+def test_non_standard_methods_share_a_label(client: Client):
+    labels = {"route": UNRESOLVED_ROUTE, "status": "404"}
+    count = (
+        REGISTRY.get_sample_value(
+            "opennutrilab_request_duration_seconds_count",
+            {**labels, "method": OTHER_METHOD},
+        )
+        or 0
+    )
+
+    client.generic("X-RANDOM-42", "/no-such-page/")
+
+    assert (
+        REGISTRY.get_sample_value(
+            "opennutrilab_request_duration_seconds_count",
+            {**labels, "method": OTHER_METHOD},
+        )
+        == count + 1
+    )
+    assert (
+        REGISTRY.get_sample_value(
+            "opennutrilab_request_duration_seconds_count",
+            {**labels, "method": "X-RANDOM-42"},
+        )
+        is None
+    )
+
+
+@pytest.mark.django_db
+def test_outbound_http_time_observed(client: Client):
+    route = "/api-ninja/products/off/<barcode>"
+    count = _sample("opennutrilab_request_http_duration_seconds_count", route)
+    mock_response = Mock(status_code=500, content=b"{}")
+
+    with patch("products.api_ninja.requests.get", return_value=mock_response):
+        client.get("/api-ninja/products/off/1234567890")
+
+    assert (
+        _sample("opennutrilab_request_http_duration_seconds_count", route) == count + 1
+    )
+
+
+def test_outbound_http_outside_of_requests():
+    with outbound_http():
+        pass  # nothing to record, no error
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_requires_token(client: Client, settings):
+    settings.METRICS_TOKEN = ""
+    assert client.get("/metrics").status_code == 404  # noqa: PLR2004
+
+    settings.METRICS_TOKEN = "secret"  # noqa: S105
+    assert client.get("/metrics").status_code == 404  # noqa: PLR2004
+    response = client.get("/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200  # noqa: PLR2004
+    assert b"opennutrilab_request_db_queries_bucket" in response.content
@@ -0,0 +1,127 @@
+import asyncio
+import json
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from config.pubsub import publish
+from config.websocket import websocket_application
+from products.models import Product
+from products.notifications import NOTIFICATIONS_WS_PATH
+from products.writes import write_products
+
+
+def run_notifications_session(
+    commands: list[Any], publications: list[tuple[list[str], dict[str, Any]]]
+) -> list[dict[str, Any]]:
+    """Subscribe, publish from another thread (as views do), then disconnect."""
+
+    async def session() -> list[dict[str, Any]]:
+        inbound: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        outbound: list[dict[str, Any]] = []
+
+        await inbound.put({"type": "websocket.connect"})
+        for command in commands:
+            await inbound.put(
+                {"type": "websocket.receive", "text": json.dumps(command)}
+            )
+
+        async def receive() -> dict[str, Any]:
+            return await inbound.get()
+
+        async def send(message: dict[str, Any]) -> None:
+            outbound.append(message)
+
+        scope = {"type": "websocket", "path": NOTIFICATIONS_WS_PATH}
+        task = asyncio.create_task(websocket_application(scope, receive, send))
+        await asyncio.sleep(0.01)
+        for topics, data in publications:
+            await asyncio.to_thread(publish, topics, data)
+        await asyncio.sleep(0.01)
+        await inbound.put({"type": "websocket.disconnect"})
+        await task
+        return [
+            json.loads(message["text"])
+            for message in outbound
+            if message["type"] == "websocket.send"
+        ]
+
+    return asyncio.run(session())
+
+
+def test_subscribers_only_receive_their_topics():
+    messages = run_notifications_session(
+        [{"subscribe": ["product:0000000000001", "job:abc"]}],
+        [
+            (["catalog", "product:0000000000002"], {"event": "products.saved"}),
+            (
+                ["catalog", "product:0000000000001", "product:0000000000003"],
+                {"event": "products.saved", "count": 2},
+            ),
+            (["job:abc"], {"event": "job", "state": "SUCCESS"}),
+        ],
+    )
+
+    assert messages == [
+        {"subscribed": ["job:abc", "product:0000000000001"]},
+        {
+            "topics": ["product:0000000000001"],
+            "event": "products.saved",
+            "count": 2,
+        },
+        {"topics": ["job:abc"], "event": "job", "state": "SUCCESS"},
+    ]
+
+
+def test_unsubscribe_and_invalid_topics():
+    messages = run_notifications_session(
+        [
+            {"subscribe": ["catalog", "product:1"]},
+            {"unsubscribe": ["catalog"]},
+            {"subscribe": ["users:1"]},
+        ],
+        [(["catalog"], {"event": "products.deleted"})],
+    )
+
+    assert messages == [
+        {"subscribed": ["catalog", "product:1"]},
+        {"subscribed": ["product:1"]},
+        {"error": "Invalid topics to subscribe."},
+    ]
+
+
+@pytest.mark.django_db
+def test_product_save_is_published_on_commit(
+    django_capture_on_commit_callbacks: Any,
+):
+    with (
+        patch("products.notifications.publish") as mock_publish,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        Product.objects.create(barcode="3229820794556", name="Chocolate")
+        mock_publish.assert_not_called()
+
+    mock_publish.assert_called_once_with(
+        ["catalog", "product:3229820794556"],
+        {"event": "products.saved", "count": 1},
+    )
+
+
+@pytest.mark.django_db
+def test_batch_write_is_published_once(django_capture_on_commit_callbacks: Any):
+    items = [
+        {"barcode": "3229820794556", "name": "Chocolate"},
+        {"barcode": "4006381333931", "name": "Apple juice"},
+    ]
+
+    with (
+        patch("products.notifications.publish") as mock_publish,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        write_products(items)
+
+    mock_publish.assert_called_once_with(
+        ["catalog", "product:3229820794556", "product:4006381333931"],
+        {"event": "products.saved", "count": 2},
+    )
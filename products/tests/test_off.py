@@ -1,14 +1,22 @@
 # Test OpenFoodFacts related fonctionalities
+import asyncio
 import json
+from collections.abc import Callable
+from functools import partial
 from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import httpx
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from ninja.errors import HttpError
+from prometheus_client import REGISTRY
 from requests import HTTPError
 from requests import RequestException
+from requests import Timeout
 
 from products.base_schema import MacronutrientsSchema
 from products.base_schema import ProductSchema
@@ -19,6 +27,7 @@ from products.openfoodfacts.schema import OFFIngredientSchema
 from products.openfoodfacts.schema import OFFProductSchema
 from products.openfoodfacts.schema import ProductFormSchema
 from products.openfoodfacts.schema import product_schema_to_form_data
+from products.openfoodfacts.utils import afetch_product
 from products.openfoodfacts.utils import build_ingredient_json_from_schema
 from products.openfoodfacts.utils import fetch_local_product
 from products.openfoodfacts.utils import fetch_product
@@ -353,6 +362,151 @@ def test_fetch_product_barcode_mismatch():
         fetch_product("999999")
 
 
+@pytest.fixture
+def off_response() -> dict[str, Any]:
+    """Response of the Open Food Facts API for a product found."""
+    return {
+        "status": "success",
+        "result": {
+            "id": "product_found",
+            "name": "Product found",
+            "lc_name": "Product found",
+        },
+        "product": {"code": "999999", "product_name": "Remote Product"},
+    }
+
+
+def run_afetch_product(
+    barcode: str, handler: Callable[[httpx.Request], httpx.Response]
+) -> OFFProductSchema:
+    client = partial(httpx.AsyncClient, transport=httpx.MockTransport(handler))
+    with patch("products.openfoodfacts.utils.httpx.AsyncClient", client):
+        return asyncio.run(afetch_product(barcode))
+
+
+def test_afetch_product_parses_like_fetch_product(off_response: dict[str, Any]):
+    mock_response = MagicMock()
+    mock_response.json.return_value = off_response
+    mock_response.raise_for_status.return_value = None
+    with patch("products.openfoodfacts.utils.requests.get", return_value=mock_response):
+        expected = fetch_product("999999")
+
+    product = run_afetch_product(
+        "999999", lambda request: httpx.Response(200, json=off_response)
+    )
+
+    assert product == expected
+
+
+def test_afetch_product_http_error():
+    with pytest.raises(HttpError) as exc:
+        run_afetch_product("999999", lambda request: httpx.Response(500))
+
+    assert exc.value.status_code == 502  # noqa: PLR2004
+
+
+def test_afetch_product_unreachable():
+    def handler(request: httpx.Request) -> httpx.Response:
+        msg = "Connection refused"
+        raise httpx.ConnectError(msg, request=request)
+
+    with pytest.raises(HttpError) as exc:
+        run_afetch_product("999999", handler)
+
+    assert exc.value.status_code == 503  # noqa: PLR2004
+
+
+def _off_sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_fetch_product_telemetry(off_response: dict[str, Any]):
+    mock_response = MagicMock(
+        status_code=200, content=json.dumps(off_response).encode()
+    )
+    mock_response.json.return_value = off_response
+    calls = _off_sample(
+        "opennutrilab_off_call_duration_seconds_count",
+        call_site="fetch_product",
+        outcome="200",
+    )
+    size = _off_sample("opennutrilab_off_response_bytes_sum", call_site="fetch_product")
+    validations = _off_sample(
+        "opennutrilab_off_validation_duration_seconds_count",
+        call_site="fetch_product",
+    )
+
+    with patch("products.openfoodfacts.utils.requests.get", return_value=mock_response):
+        fetch_product("999999")
+
+    assert (
+        _off_sample(
+            "opennutrilab_off_call_duration_seconds_count",
+            call_site="fetch_product",
+            outcome="200",
+        )
+        == calls + 1
+    )
+    assert _off_sample(
+        "opennutrilab_off_response_bytes_sum", call_site="fetch_product"
+    ) == size + len(mock_response.content)
+    assert (
+        _off_sample(
+            "opennutrilab_off_validation_duration_seconds_count",
+            call_site="fetch_product",
+        )
+        == validations + 1
+    )
+
+
+def test_fetch_product_timeout_telemetry(settings, caplog: pytest.LogCaptureFixture):
+    settings.OFF_SLOW_CALL_SECONDS = 0
+    timeouts = _off_sample(
+        "opennutrilab_off_call_duration_seconds_count",
+        call_site="fetch_product",
+        outcome="timeout",
+    )
+
+    with (
+        patch(
+            "products.openfoodfacts.utils.requests.get",
+            side_effect=Timeout("Read timed out"),
+        ),
+        pytest.raises(HttpError),
+    ):
+        fetch_product("999999")
+
+    assert (
+        _off_sample(
+            "opennutrilab_off_call_duration_seconds_count",
+            call_site="fetch_product",
+            outcome="timeout",
+        )
+        == timeouts + 1
+    )
+    assert "Slow Open Food Facts call (fetch_product) for 999999" in caplog.text
+
+
+def test_afetch_product_not_found_telemetry():
+    not_found = _off_sample(
+        "opennutrilab_off_call_duration_seconds_count",
+        call_site="afetch_product",
+        outcome="404",
+    )
+
+    with pytest.raises(HttpError):
+        run_afetch_product("999999", lambda request: httpx.Response(404))
+
+    assert (
+        _off_sample(
+            "opennutrilab_off_call_duration_seconds_count",
+            call_site="afetch_product",
+            outcome="404",
+        )
+        == not_found + 1
+    )
+
+
 def test_product_schema_to_form_data():
     """Test conversion from ProductSchema to ProductFormSchema."""
     product: ProductSchema[MacronutrientsSchema, Any] = ProductSchema(
@@ -547,6 +701,28 @@ def test_save_ingredients_updates_percentage():
     assert ing.percentage == 5  # noqa: PLR2004
 
 
+@pytest.mark.django_db
+def test_save_ingredients_touches_product_once():
+    product = Product.objects.create(barcode="6666666666666", name="Touched Product")
+    schema_tree = [
+        OFFIngredientSchema(
+            name="Flour", ingredients=[OFFIngredientSchema(name="Wheat")]
+        ),
+        OFFIngredientSchema(name="Salt"),
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        save_ingredients_from_schema(schema_tree, product)
+
+    product_updates = [
+        query["sql"]
+        for query in queries.captured_queries
+        if query["sql"].startswith('UPDATE "products_product"')
+    ]
+    assert len(product_updates) == 1
+    assert Product.objects.get(pk=product.pk).updated_at > product.updated_at
+
+
 @pytest.mark.django_db
 def test_save_ingredients_empty_list():
     product = Product.objects.create(barcode="4444444444444", name="Empty Product")
@@ -0,0 +1,68 @@
+import time
+from pathlib import Path
+
+import pytest
+from django.core.files.storage import default_storage
+from django.test import Client
+
+from config.profiling import PROFILE_HEADER
+from config.profiling import PROFILE_RESPONSE_HEADER
+from config.profiling import StackSampler
+from config.profiling import make_profile_token
+from opennutrilab.users.tests.factories import UserFactory
+
+
+@pytest.fixture(autouse=True)
+def _media_storage(settings, tmp_path: Path) -> None:
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stack_sampler_folds_project_stacks():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    _busy(0.1)
+    sampler.stop()
+
+    lines = sampler.folded().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_busy (products/tests/test_profiling.py:" in stack
+
+
+@pytest.mark.django_db
+def test_staff_profiles_with_query_flag(client: Client):
+    client.force_login(UserFactory(is_staff=True))
+
+    response = client.get("/products/", {"profile": "1"}, HTTP_X_REQUEST_ID="abc-123")
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["X-Request-ID"] == "abc-123"
+    name = response[PROFILE_RESPONSE_HEADER]
+    assert name.startswith("profiles/")
+    assert name.endswith("-abc-123.folded")
+    assert default_storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_query_flag_ignored_for_other_users(client: Client):
+    client.force_login(UserFactory())
+
+    response = client.get("/products/", {"profile": "1"})
+
+    assert PROFILE_RESPONSE_HEADER not in response
+
+
+@pytest.mark.django_db
+def test_signed_header_profiles(client: Client):
+    response = client.get("/products/", headers={PROFILE_HEADER: make_profile_token()})
+    assert PROFILE_RESPONSE_HEADER in response
+
+    response = client.get("/products/", headers={PROFILE_HEADER: "forged:token"})
+    assert PROFILE_RESPONSE_HEADER not in response
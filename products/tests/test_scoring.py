@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from django.test import Client
+from django.urls import reverse
+from pint import Quantity
+
+from products.models import Macronutrient
+from products.models import Product
+from products.models import ProductMacronutrient
+from products.scoring import compute_nutrition_scores
+from products.scoring import rescore_products
+
+
+def make_inputs(**columns: list[float]) -> pd.DataFrame:
+    size = len(next(iter(columns.values())))
+    inputs = pd.DataFrame(
+        {
+            name: [np.nan] * size
+            for name in ("energy", "saturated_fat", "sugars", "fiber", "proteins")
+        },
+        index=[f"p{i}" for i in range(size)],
+    )
+    for name, values in columns.items():
+        inputs[name] = values
+    return inputs
+
+
+def test_compute_nutrition_scores_points_and_grades():
+    inputs = make_inputs(
+        energy=[336.0, 3400.0, 100.0],
+        saturated_fat=[0.5, 12.0, 0.0],
+        sugars=[5.0, 50.0, 0.0],
+        fiber=[np.nan, 0.0, 5.0],
+        proteins=[10.0, 10.0, 10.0],
+    )
+
+    scores = compute_nutrition_scores(inputs)
+
+    # 2 negative points - 5 protein points
+    assert scores.loc["p0", "nutrition_score"] == -3  # noqa: PLR2004
+    assert scores.loc["p0", "nutrition_grade"] == "A"
+    # 30 negative points, proteins are not counted above 11 negative points
+    assert scores.loc["p1", "nutrition_score"] == 30  # noqa: PLR2004
+    assert scores.loc["p1", "nutrition_grade"] == "E"
+    # 0 negative points - 5 fiber points - 5 protein points
+    assert scores.loc["p2", "nutrition_score"] == -10  # noqa: PLR2004
+
+
+def test_compute_nutrition_scores_requires_inputs():
+    inputs = make_inputs(
+        energy=[np.nan],
+        saturated_fat=[1.0],
+        sugars=[1.0],
+        proteins=[1.0],
+    )
+
+    scores = compute_nutrition_scores(inputs)
+
+    assert pd.isna(scores.loc["p0", "nutrition_score"])
+    assert scores.loc["p0", "nutrition_grade"] == ""
+
+
+def set_amount(product: Product, name: str, value: float) -> None:
+    ProductMacronutrient.objects.update_or_create(
+        product=product,
+        macronutrient=Macronutrient.objects.get(name=name),
+        defaults={"amount": Quantity(value, "g")},
+    )
+
+
+@pytest.mark.django_db
+def test_rescore_products_only_recomputes_stale_products():
+    product = Product.objects.create(
+        barcode="3229820794556",
+        name="Muesli",
+        energy=Quantity(1600.0, "kJ"),
+    )
+    for name, value in {"saturated_fat": 1.5, "sugars": 20.0, "proteins": 9.0}.items():
+        set_amount(product, name, value)
+
+    assert rescore_products() == 1
+    product.refresh_from_db()
+    # 4 (energy) + 1 (saturated fat) + 4 (sugars) - 5 (proteins)
+    assert product.nutrition_score == 4  # noqa: PLR2004
+    assert product.nutrition_grade == "C"
+    assert product.nutrition_score_stale is False
+
+    # Nothing changed: nothing to rescore
+    assert rescore_products() == 0
+
+    # A score input changed: the product is rescored
+    set_amount(product, "sugars", 1.0)
+    assert rescore_products() == 1
+    product.refresh_from_db()
+    assert product.nutrition_score == 0
+    assert product.nutrition_grade == "B"
+
+
+@pytest.mark.django_db
+def test_product_list_filters_and_sorts_by_nutrition_score(client: Client):
+    Product.objects.create(
+        barcode="3229820794556", name="Bad", nutrition_score=20, nutrition_grade="E"
+    )
+    Product.objects.create(
+        barcode="3560071429508", name="Good", nutrition_score=-2, nutrition_grade="A"
+    )
+    Product.objects.create(barcode="1234567890128", name="Unknown")
+
+    response = client.get(reverse("list_products"), {"grade": "A"})
+    assert [p.name for p in response.context["product_list"]] == ["Good"]
+
+    response = client.get(reverse("list_products"), {"sort": "nutrition_score"})
+    assert [p.name for p in response.context["product_list"]] == [
+        "Good",
+        "Bad",
+        "Unknown",
+    ]
@@ -0,0 +1,84 @@
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from products.models import Ingredient
+from products.models import Product
+from products.search import rebuild_search_vectors
+from products.search import search_products
+
+
+def search_names(text: str) -> list[str]:
+    return [
+        product.name
+        for product in search_products(Product.objects.all(), text).order_by(
+            "-search_relevance", "barcode"
+        )
+    ]
+
+
+@pytest.mark.django_db
+def test_search_ranks_name_before_description_and_ingredients():
+    Product.objects.create(
+        barcode="3229820794556", name="Cookies", description="With hazelnut"
+    )
+    Product.objects.create(barcode="3560071429508", name="Hazelnut spread")
+    spread = Product.objects.create(barcode="4006381333931", name="Spread")
+    Ingredient.objects.create(product=spread, name="Hazelnut")
+    # Ingredients saved after the product: refreshed by the next save
+    spread.save()
+    Product.objects.create(barcode="5000112546415", name="Orange juice")
+
+    assert search_names("hazelnut") == ["Hazelnut spread", "Cookies", "Spread"]
+
+
+@pytest.mark.django_db
+def test_search_tolerates_typos_and_matches_barcode_prefix():
+    Product.objects.create(barcode="3229820794556", name="Chocolate")
+    Product.objects.create(barcode="3560071429508", name="Biscuits")
+
+    assert search_names("chocolat") == ["Chocolate"]
+    assert search_names("32298") == ["Chocolate"]
+
+
+@pytest.mark.django_db
+def test_search_vector_follows_name_changes():
+    product = Product.objects.create(barcode="3229820794556", name="Chocolate")
+
+    product.name = "Caramel"
+    product.save(update_fields=["name"])
+
+    assert search_names("caramel") == ["Caramel"]
+    assert search_names("chocolate") == []
+
+
+@pytest.mark.django_db
+def test_rebuild_search_vectors_fills_missing_vectors():
+    Product.objects.bulk_create(
+        [
+            Product(barcode="3229820794556", name="Chocolate"),
+            Product(barcode="3560071429508", name="Chocolate milk"),
+        ]
+    )
+    assert not Product.objects.filter(search_vector__isnull=False).exists()
+
+    assert rebuild_search_vectors(chunk_size=1) == 2  # noqa: PLR2004
+
+    assert search_names("chocolate milk")[0] == "Chocolate milk"
+
+
+@pytest.mark.django_db
+def test_search_api_returns_ranked_results(client: Client):
+    Product.objects.create(barcode="3229820794556", name="Dark chocolate")
+    Product.objects.create(
+        barcode="3560071429508", name="Biscuits", description="Chocolate chips"
+    )
+
+    response = client.get(
+        reverse("api-1.0.0:get_products_search"), {"q": "chocolate", "limit": 1}
+    )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    [result] = response.json()
+    assert result["barcode"] == "3229820794556"
+    assert result["relevance"] > 0
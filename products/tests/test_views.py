@@ -1,10 +1,11 @@
 import json
 from typing import TYPE_CHECKING
 from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock
 from unittest.mock import patch
 
 import pytest
+from asgiref.sync import async_to_sync
 from django.test import Client
 from django.test import RequestFactory
 from django.urls import reverse
@@ -13,31 +14,41 @@ from pint import Quantity
 from products.base_schema import MacronutrientsSchema
 from products.base_schema import ProductSchema
 from products.forms import ProductForm
+from products.models import Ingredient
 from products.models import IngredientRef
 from products.models import Product
 from products.openfoodfacts.schema import OFFIngredientSchema
 from products.openfoodfacts.schema import OFFProductSchema
 from products.openfoodfacts.schema import product_schema_to_form_data
-from products.views import ProductCreateView  # adapte à ton module
-from products.views import ProductEditView  # adapte à ton module
+from products.views import ProductCreateAsyncView
+from products.views import ProductEditAsyncView
+from products.views import ProductFormAsyncView
+from products.views import ProductListView
 from products.views import prepare_product_form_data  # adapte à ton module
+from products.websocket import MACRONUTRIENTS_CHART_PATH
 
 if TYPE_CHECKING:
     from django.http.response import HttpResponse
 
 
+def async_view(
+    view_class: type[ProductFormAsyncView], request: Any, **kwargs: Any
+) -> ProductFormAsyncView:
+    view = view_class()
+    view.setup(request, **kwargs)
+    return view
+
+
 @pytest.mark.django_db
-class TestProductCreateView:
+class TestProductCreateAsyncView:
     def setup_method(self):
         self.factory = RequestFactory()
 
     def test_get_form_without_barcode(self):
         """Le formulaire doit être vide si aucun code-barres n'est fourni."""
-        request = self.factory.get("/products/new/")
-        view = ProductCreateView()
-        view.request = request
+        view = async_view(ProductCreateAsyncView, self.factory.get("/products/new/"))
 
-        form = view.get_form()  # pyright: ignore[reportUnknownMemberType]
+        form = async_to_sync(view.get_form)(None)
 
         assert isinstance(form, ProductForm), (
             "Le formulaire retourné n'est pas une instance de ProductForm"
@@ -46,8 +57,8 @@ class TestProductCreateView:
             f"Le formulaire initial n'est pas vide : {form.initial}"
         )
 
-    @patch("products.views.fetch_product")
-    def test_get_form_with_barcode(self, mock_fetch_product_data: MagicMock):
+    @patch("products.views.afetch_product", new_callable=AsyncMock)
+    def test_get_form_with_barcode(self, mock_afetch_product: AsyncMock):
         """The form should be pre-filled when a barcode is provided."""
 
         # --- Create a realistic ProductSchema instance ---
@@ -61,19 +72,20 @@ class TestProductCreateView:
             ),
         )
 
-        # fetch_product_data() should return this schema instance
-        mock_fetch_product_data.return_value = mock_product_schema
+        # afetch_product() should return this schema instance
+        mock_afetch_product.return_value = mock_product_schema
 
         # --- Create the request and assign it to the view ---
-        request = self.factory.get("/products/create/?barcode=123456")
-        view = ProductCreateView()
-        view.request = request
+        view = async_view(
+            ProductCreateAsyncView,
+            self.factory.get("/products/create/?barcode=123456"),
+        )
 
         # --- Call the method under test ---
-        form = view.get_form()  # pyright: ignore[reportUnknownMemberType]
+        form = async_to_sync(view.get_form)(None)
 
         # --- Assertions ---
-        mock_fetch_product_data.assert_called_once_with(query_barcode="123456")
+        mock_afetch_product.assert_awaited_once_with(query_barcode="123456")
 
         expected_initial = product_schema_to_form_data(mock_product_schema).dict()
         assert form.initial == expected_initial, (
@@ -89,20 +101,17 @@ class TestProductCreateView:
 
 
 @pytest.mark.django_db
-class TestProductEditView:
+class TestProductEditAsyncView:
     def setup_method(self):
         self.factory = RequestFactory()
 
     def test_get_form_raises_without_instance(self):
-        view = ProductEditView()
-        view.request = self.factory.get("/fake-url/")
+        view = async_view(ProductEditAsyncView, self.factory.get("/fake-url/"))
         # `match` performs a substring/regex search, so it passes as long as the text
         # is contained in the exception message.
         with pytest.raises(ValueError, match="Product instance is required"):
-            view.get_form()  # pyright: ignore[reportUnknownMemberType]
+            async_to_sync(view.get_form)(None)
 
-    # @patch("products.views.fetch_product_data")
-    # def test_get_form
     def test_get_form_without_reset(self):
         product = Product.objects.create(
             barcode="1234567890123",
@@ -111,9 +120,12 @@ class TestProductEditView:
             energy=Quantity(10.0, "kJ"),
         )
 
-        view = ProductEditView()
-        view.request = self.factory.get(f"/products/edit/{product.barcode}/")
-        form = view.get_form(instance=product)  # pyright: ignore[reportUnknownMemberType]
+        view = async_view(
+            ProductEditAsyncView,
+            self.factory.get(f"/products/edit/{product.barcode}/"),
+            pk=product.pk,
+        )
+        form = async_to_sync(view.get_form)(product)
 
         assert isinstance(form, ProductForm)
 
@@ -126,9 +138,8 @@ class TestProductEditView:
         }
         assert form.initial == expected_form
 
-    @pytest.mark.django_db
-    @patch("products.views.fetch_product")
-    def test_get_form_with_reset(self, mock_fetch_product_data: MagicMock):
+    @patch("products.views.afetch_product", new_callable=AsyncMock)
+    def test_get_form_with_reset(self, mock_afetch_product: AsyncMock):
         product = Product.objects.create(
             barcode="1234567890123",
             name="Test Product",
@@ -148,17 +159,19 @@ class TestProductEditView:
             ),
         )
 
-        # fetch_product_data() should return this schema instance
-        mock_fetch_product_data.return_value = mock_product_schema
+        # afetch_product() should return this schema instance
+        mock_afetch_product.return_value = mock_product_schema
 
-        view = ProductEditView()
-        view.request = RequestFactory().get(
-            f"/products/edit/{product.barcode}/?reset=1"
+        view = async_view(
+            ProductEditAsyncView,
+            self.factory.get(f"/products/edit/{product.barcode}/?reset=1"),
+            pk=product.pk,
         )
 
-        form = view.get_form(instance=product)  # pyright: ignore[reportUnknownMemberType]
+        form = async_to_sync(view.get_form)(product)
 
         # --------------------------------------------------------------------
+        mock_afetch_product.assert_awaited_once_with(query_barcode=product.barcode)
         expected_initial = product_schema_to_form_data(mock_product_schema).dict()
         expected_initial["image"] = None
         assert form.initial == expected_initial, (
@@ -210,6 +223,7 @@ def test_product_views_context_contains_macronutrients_url(
 
     expected_url: str = reverse(viewname="api-1.0.0:get_macronutrients_form_data")
     assert response.context["macronutrients_api_url"] == expected_url
+    assert response.context["macronutrients_ws_path"] == MACRONUTRIENTS_CHART_PATH
 
 
 @pytest.mark.django_db
@@ -257,9 +271,203 @@ def test_prepare_product_form_data_with_fetched_product_and_refs():
     assert payload[1]["has_reference"] is False
 
 
+@pytest.mark.django_db
+def test_prepare_product_form_data_embeds_only_stored_root_ingredients():
+    product = Product.objects.create(barcode="1234567890123", name="Test Product")
+    flour = Ingredient.objects.create(product=product, name="Flour")
+    Ingredient.objects.create(product=product, name="Wheat", parent=flour)
+
+    _initial, extra_data = prepare_product_form_data(product_instance=product)
+
+    payload = json.loads(extra_data["ingredients_json"])
+    assert [(node["name"], node["has_children"]) for node in payload] == [
+        ("Flour", True)
+    ]
+    # Children are fetched on expand; saving the form keeps the stored tree
+    assert extra_data["ingredients_url"] == reverse(
+        "api-1.0.0:get_stored_product_ingredients", args=[product.pk]
+    )
+    assert "ingredients" not in extra_data
+
+
 def test_prepare_product_form_data_raises_without_arguments():
     # --- Act & Assert ---
     with pytest.raises(
         ValueError, match="Either product_instance or fetched_product must be provided"
     ):
         prepare_product_form_data()
+
+
+def walk_product_list(client: Client, **params: str) -> list[str]:
+    """Follow the JSON variant of the list page by page, return the barcodes."""
+    barcodes: list[str] = []
+    cursor: str | None = None
+    while True:
+        query = {**params, "format": "json"}
+        if cursor:
+            query["cursor"] = cursor
+        data = client.get(reverse("list_products"), query).json()
+        barcodes += [row["barcode"] for row in data["results"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return barcodes
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("sort", "expected"),
+    [
+        # Ties on the sort key are broken by barcode, in the same direction
+        (
+            "name",
+            [
+                "0000000000001",
+                "0000000000002",
+                "0000000000003",
+                "0000000000004",
+                "0000000000005",
+            ],
+        ),
+        (
+            "-name",
+            [
+                "0000000000005",
+                "0000000000004",
+                "0000000000003",
+                "0000000000002",
+                "0000000000001",
+            ],
+        ),
+        # Products without a score come last in both directions
+        (
+            "nutrition_score",
+            [
+                "0000000000003",
+                "0000000000002",
+                "0000000000004",
+                "0000000000001",
+                "0000000000005",
+            ],
+        ),
+        (
+            "-nutrition_score",
+            [
+                "0000000000004",
+                "0000000000002",
+                "0000000000003",
+                "0000000000005",
+                "0000000000001",
+            ],
+        ),
+    ],
+)
+def test_product_list_keyset_pages(
+    client: Client,
+    monkeypatch: pytest.MonkeyPatch,
+    sort: str,
+    expected: list[str],
+) -> None:
+    monkeypatch.setattr(ProductListView, "paginate_by", 2)
+    for barcode, name, score in [
+        ("0000000000001", "Apple", None),
+        ("0000000000002", "Pear", 5),
+        ("0000000000003", "Pear", -1),
+        ("0000000000004", "Pear", 5),
+        ("0000000000005", "Plum", None),
+    ]:
+        Product.objects.create(barcode=barcode, name=name, nutrition_score=score)
+
+    assert walk_product_list(client, sort=sort) == expected
+
+
+@pytest.mark.django_db
+def test_product_list_defaults_to_newest_first(
+    client: Client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(ProductListView, "paginate_by", 2)
+    barcodes = [f"{i:013d}" for i in range(5)]
+    for barcode in barcodes:
+        Product.objects.create(barcode=barcode, name="Product")
+
+    assert walk_product_list(client) == barcodes[::-1]
+
+    # Cursors of another sort are ignored
+    cursor = client.get(reverse("list_products"), {"format": "json"}).json()[
+        "next_cursor"
+    ]
+    response = client.get(reverse("list_products"), {"sort": "name", "cursor": cursor})
+    assert [p.barcode for p in response.context["product_list"]] == barcodes[:2]
+
+
+@pytest.mark.django_db
+def test_product_list_search_and_next_page_link(
+    client: Client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(ProductListView, "paginate_by", 1)
+    Product.objects.create(barcode="3229820794556", name="Dark chocolate")
+    Product.objects.create(barcode="3560071429508", name="Milk chocolate")
+    Product.objects.create(barcode="4006381333931", name="Apple juice")
+
+    response = client.get(reverse("list_products"), {"q": "Chocolate"})
+    assert len(response.context["product_list"]) == 1
+    assert response.context["current_sort"] == "relevance"
+    assert "q=Chocolate" in response.context["next_page_query"]
+    assert "cursor=" in response.context["next_page_query"]
+
+    response = client.get(reverse("list_products"), {"q": "40063"})
+    assert [p.name for p in response.context["product_list"]] == ["Apple juice"]
+    assert "next_page_query" not in response.context
+
+
+@pytest.mark.django_db
+def test_product_list_page_costs_one_query(
+    client: Client, django_assert_num_queries: Any
+) -> None:
+    for i in range(60):
+        Product.objects.create(barcode=f"{i:013d}", name=f"Product {i}")
+    cursor = client.get(reverse("list_products"), {"format": "json"}).json()[
+        "next_cursor"
+    ]
+
+    with django_assert_num_queries(1):
+        data = client.get(
+            reverse("list_products"), {"format": "json", "cursor": cursor}
+        ).json()
+
+    assert len(data["results"]) == 10  # noqa: PLR2004
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_async_create_page_prefills_from_open_food_facts(client: Client) -> None:
+    fetched = ProductSchema(barcode="123456", name="Apple")
+    with patch(
+        "products.views.afetch_product", new=AsyncMock(return_value=fetched)
+    ) as mock_afetch:
+        response = client.get(reverse("create_product"), {"barcode": "123456"})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    mock_afetch.assert_awaited_once_with(query_barcode="123456")
+    assert response.context["form"].initial["name"] == "Apple"
+    assert response.context.get("product") is None
+
+
+@pytest.mark.django_db
+def test_async_edit_page_embeds_ingredient_roots(client: Client) -> None:
+    product = Product.objects.create(barcode="1234567890123", name="Chocolate")
+    cocoa = Ingredient.objects.create(product=product, name="Cocoa")
+    Ingredient.objects.create(product=product, parent=cocoa, name="Cocoa butter")
+
+    response = client.get(reverse("edit_product", args=[product.pk]))
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.context["product"] == product
+    roots = json.loads(response.context["form"].extra_data["ingredients_json"])
+    assert [(root["name"], root["has_children"]) for root in roots] == [("Cocoa", True)]
+
+
+@pytest.mark.django_db
+def test_async_edit_page_of_missing_product_is_404(client: Client) -> None:
+    response = client.get(reverse("edit_product", args=["0000000000000"]))
+
+    assert response.status_code == 404  # noqa: PLR2004
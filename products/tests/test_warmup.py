@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Any
+
+import pytest
+
+from config.asgi import lifespan_application
+from config.warmup import WARMUP_STEPS
+from products.catalog import get_ingredient_reference_names
+from products.catalog import get_macronutrients
+
+
+def run_lifespan() -> list[dict[str, Any]]:
+    async def session() -> list[dict[str, Any]]:
+        inbound: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        outbound: list[dict[str, Any]] = []
+        await inbound.put({"type": "lifespan.startup"})
+        await inbound.put({"type": "lifespan.shutdown"})
+
+        async def receive() -> dict[str, Any]:
+            return await inbound.get()
+
+        async def send(message: dict[str, Any]) -> None:
+            outbound.append(message)
+
+        await lifespan_application({"type": "lifespan"}, receive, send)
+        return outbound
+
+    return asyncio.run(session())
+
+
+@pytest.mark.django_db
+def test_lifespan_startup_warms_every_step(
+    caplog: pytest.LogCaptureFixture, django_assert_num_queries: Any
+):
+    with caplog.at_level(logging.INFO, logger="config.warmup"):
+        messages = run_lifespan()
+
+    assert messages == [
+        {"type": "lifespan.startup.complete"},
+        {"type": "lifespan.shutdown.complete"},
+    ]
+    logged = [record.getMessage() for record in caplog.records]
+    for name, _step in WARMUP_STEPS:
+        assert any(
+            message.startswith(f"Warm-up step {name!r} took") for message in logged
+        )
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+    # Loaded by the warm-up, reused by requests
+    with django_assert_num_queries(0):
+        get_macronutrients()
+        get_ingredient_reference_names()
@@ -0,0 +1,70 @@
+import asyncio
+import json
+from typing import Any
+
+from config.websocket import websocket_application
+from products.websocket import COALESCE_DELAY
+from products.websocket import MACRONUTRIENTS_CHART_PATH
+
+
+def run_websocket_session(path: str, texts: list[str]) -> list[dict[str, Any]]:
+    """Connect, send all texts at once, wait for answers and disconnect."""
+
+    async def session() -> list[dict[str, Any]]:
+        inbound: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        outbound: list[dict[str, Any]] = []
+
+        await inbound.put({"type": "websocket.connect"})
+        for text in texts:
+            await inbound.put({"type": "websocket.receive", "text": text})
+
+        async def receive() -> dict[str, Any]:
+            return await inbound.get()
+
+        async def send(message: dict[str, Any]) -> None:
+            outbound.append(message)
+
+        scope = {"type": "websocket", "path": path}
+        task = asyncio.create_task(websocket_application(scope, receive, send))
+        await asyncio.sleep(COALESCE_DELAY * 5)
+        await inbound.put({"type": "websocket.disconnect"})
+        await task
+        return outbound
+
+    return asyncio.run(session())
+
+
+def test_macronutrients_chart_coalesces_rapid_updates():
+    texts = [
+        json.dumps({"macronutrients_fat_0": fat, "macronutrients_proteins_0": 15})
+        for fat in ("1", "10", "10.5")
+    ]
+
+    messages = run_websocket_session(MACRONUTRIENTS_CHART_PATH, texts)
+
+    assert messages[0] == {"type": "websocket.accept"}
+    # Only the latest update of the burst is answered
+    assert len(messages) == 2  # noqa: PLR2004
+    data = json.loads(messages[1]["text"])
+    assert data["macronutrients"]["fat"] == 10.5  # noqa: PLR2004
+    assert data["macronutrients"]["proteins"] == 15.0  # noqa: PLR2004
+    assert data["others"] == 74.5  # noqa: PLR2004
+
+
+def test_macronutrients_chart_reports_validation_errors():
+    texts = [json.dumps({"macronutrients_fat_0": "not a number"})]
+
+    messages = run_websocket_session(MACRONUTRIENTS_CHART_PATH, texts)
+
+    data = json.loads(messages[1]["text"])
+    assert "errors" in data
+    assert data["errors"][0]["loc"] == ["macronutrients_fat_0"]
+
+
+def test_websocket_ping():
+    messages = run_websocket_session("/ws/", ["ping"])
+
+    assert messages == [
+        {"type": "websocket.accept"},
+        {"type": "websocket.send", "text": "pong!"},
+    ]
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from pint import Quantity
+
+from opennutrilab.users.tests.factories import UserFactory
+from products.models import Ingredient
+from products.models import Product
+from products.models import ProductMacronutrient
+from products.writes import write_products
+
+
+def make_document(barcode: str, name: str) -> dict:
+    return {
+        "barcode": barcode,
+        "name": name,
+        "energy": 1500,
+        "macronutrients": {"fat": 20.0, "sugars": 30.0, "carbohydrates": 60.0},
+        "ingredients": [
+            {"name": "Flour", "percentage": 50.0, "ingredients": [{"text": "Wheat"}]},
+            {"name": "Sugar"},
+        ],
+    }
+
+
+def ean13(number: int) -> str:
+    digits = f"{number:012d}"
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return f"{digits}{(10 - total % 10) % 10}"
+
+
+@pytest.mark.django_db
+def test_batch_write_api_creates_updates_and_reports_invalid_items():
+    Product.objects.create(barcode="3229820794556", name="Old name")
+    Ingredient.objects.create(product_id="3229820794556", name="Palm oil")
+    client = Client()
+    client.force_login(UserFactory(is_superuser=True))
+
+    response = client.post(
+        reverse("api-1.0.0:write_products_batch"),
+        json.dumps(
+            {
+                "products": [
+                    make_document("3229820794556", "Biscuits"),
+                    make_document("3560071429508", "Cookies"),
+                    make_document("3560071429509", "Bad checksum"),
+                    {"barcode": "4006381333931"},
+                ]
+            }
+        ),
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    data = response.json()
+    assert (data["created"], data["updated"], data["invalid"]) == (1, 1, 2)
+    assert [result["status"] for result in data["results"]] == [
+        "updated",
+        "created",
+        "invalid",
+        "invalid",
+    ]
+    assert data["results"][2]["errors"][0]["field"] == "barcode"
+    assert data["results"][3]["errors"][0]["field"] == "name"
+
+    product = Product.objects.get(barcode="3229820794556")
+    assert product.name == "Biscuits"
+    assert product.energy == Quantity(1500, "kJ")
+    assert ProductMacronutrient.objects.get(
+        product=product, macronutrient_id="fat"
+    ).amount == Quantity(20.0, "g")
+    # Ingredients are replaced, with their tree
+    assert sorted(product.ingredients.values_list("name", flat=True)) == [
+        "Flour",
+        "Sugar",
+        "Wheat",
+    ]
+    assert Ingredient.objects.get(product=product, name="Wheat").parent.name == "Flour"
+    assert not Product.objects.filter(barcode="3560071429509").exists()
+
+
+@pytest.mark.django_db
+def test_batch_write_api_refuses_anonymous_and_unauthorized_users():
+    unauthorized = Client()
+    unauthorized.force_login(UserFactory(is_staff=True))
+
+    for client, status_code in (
+        (Client(enforce_csrf_checks=True), 403),  # cross-site form: no CSRF token
+        (Client(), 401),
+        (unauthorized, 403),  # no add/change product permissions
+    ):
+        response = client.post(
+            reverse("api-1.0.0:write_products_batch"),
+            json.dumps({"products": [make_document("3560071429508", "Cookies")]}),
+            content_type="application/json",
+        )
+        assert response.status_code == status_code
+
+    assert not Product.objects.exists()
+
+
+@pytest.mark.django_db
+def test_write_products_queries_do_not_grow_with_batch_size():
+    def count_queries(first: int, size: int) -> int:
+        documents = [
+            make_document(ean13(number), f"Product {number}")
+            for number in range(first, first + size)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            results = write_products(documents)
+        assert {result["status"] for result in results} == {"created"}
+        return len(queries)
+
+    assert count_queries(1, 5) == count_queries(100, 50)
+
+
+def test_write_products_rejects_duplicate_sibling_ingredients():
+    document = make_document("3229820794556", "Biscuits")
+    document["ingredients"].append({"name": "Sugar"})
+
+    [result] = write_products([document])
+
+    assert result["status"] == "invalid"
+    assert result["errors"] == [
+        {"field": "ingredients", "message": "Duplicate ingredient 'Sugar'."}
+    ]
@@ -1,19 +1,27 @@
 from django.urls import path
 from django.urls.resolvers import URLPattern
 
-from .views import ProductCreateView
+from .views import ProductBulkUploadView
+from .views import ProductCreateAsyncView
 from .views import ProductDeleteView
-from .views import ProductEditView
+from .views import ProductEditAsyncView
 from .views import ProductListView
 
 urlpatterns: list[URLPattern] = [
     path(route="products/", view=ProductListView.as_view(), name="list_products"),
     path(
-        route="products/new/", view=ProductCreateView.as_view(), name="create_product"
+        route="products/new/",
+        view=ProductCreateAsyncView.as_view(),
+        name="create_product",
+    ),
+    path(
+        route="products/bulk-upload/",
+        view=ProductBulkUploadView.as_view(),
+        name="bulk_upload_products",
     ),
     path(
         route="products/<str:pk>/edit/",
-        view=ProductEditView.as_view(),
+        view=ProductEditAsyncView.as_view(),
         name="edit_product",
     ),
     path(
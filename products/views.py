@@ -1,133 +1,306 @@
 import json
+from abc import ABC
+from abc import abstractmethod
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import override
 
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import Http404
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import HttpResponseRedirect
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import reverse
 from django.urls import reverse_lazy
-from vanilla import CreateView
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.cache import cache_control
 from vanilla import DeleteView
+from vanilla import FormView
 from vanilla import ListView
-from vanilla import UpdateView
 
+from config.db_router import read_from_replica
+
+from .catalog import get_ingredient_reference_names
+from .conditional import aget_conditional_product
+from .conditional import preload_conditional_product
+from .conditional import product_form_condition
+from .forms import ProductBulkUploadForm
 from .forms import ProductForm
-from .models import IngredientRef
+from .models import NutritionGrade
 from .models import Product
+from .notifications import NOTIFICATIONS_WS_PATH
 from .openfoodfacts.schema import OFFProductSchema
 from .openfoodfacts.schema import ProductFormSchema
 from .openfoodfacts.schema import product_schema_to_form_data
+from .openfoodfacts.utils import afetch_product
 from .openfoodfacts.utils import build_ingredient_json_from_schema
-from .openfoodfacts.utils import fetch_product
-from .openfoodfacts.utils import get_schema_from_ingredients
+from .pagination import PRODUCT_LIST_ORDERINGS
+from .pagination import PRODUCT_LIST_PAGE_SIZE
+from .pagination import KeysetPage
+from .pagination import paginate_products
+from .pagination import resolve_product_sort
+from .reads import aingredient_level
+from .reads import ingredient_level
+from .search import search_products
+from .tasks import start_bulk_upload
+from .websocket import MACRONUTRIENTS_CHART_PATH
 
 if TYPE_CHECKING:
-    from products.openfoodfacts.schema import OFFIngredientSchema
+    from django.db.models import QuerySet
+
+# Columns rendered by the list (and its JSON variant)
+PRODUCT_LIST_FIELDS = (
+    "barcode",
+    "name",
+    "created_at",
+    "nutrition_score",
+    "nutrition_grade",
+)
 
 
+@method_decorator(read_from_replica, name="get")
 class ProductListView(ListView):
     model = Product
+    paginate_by = PRODUCT_LIST_PAGE_SIZE
 
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if request.GET.get("format") != "json":
+            return super().get(request, *args, **kwargs)
 
-class ProductCreateView(CreateView):
-    model = Product
-    form_class = ProductForm
-    success_url = reverse_lazy("list_products")
+        # Lightweight variant for infinite scroll: the rows of one page and the
+        # cursor of the next one.
+        page = self.paginate_queryset(self.get_queryset(), self.paginate_by)
+        return JsonResponse(
+            {
+                "results": [
+                    {
+                        "barcode": product.barcode,
+                        "name": product.name,
+                        "created_at": product.created_at,
+                        "nutrition_score": product.nutrition_score,
+                        "nutrition_grade": product.nutrition_grade,
+                        "edit_url": reverse("edit_product", args=[product.pk]),
+                    }
+                    for product in page.object_list
+                ],
+                "next_cursor": page.next_cursor,
+            }
+        )
 
-    def get_form(
-        self,
-        data=None,  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
-        files=None,  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
-        extra_data: dict[str, Any] | None = None,
-        **kwargs: Any,
-    ) -> form_class:
-        barcode: str | None = self.request.GET.get("barcode")
-        initial: dict[str, Any] = {}
-        if barcode:
-            fetched_product: OFFProductSchema = fetch_product(query_barcode=barcode)
-            initial, extra_data = prepare_product_form_data(
-                fetched_product=fetched_product, extra_data=extra_data
-            )
+    def get_search(self) -> str:
+        return self.request.GET.get("q", "").strip()
 
-        return self.form_class(
-            data=data,
-            files=files,
-            initial=initial,
-            extra_data=extra_data,
-            **kwargs,
+    def get_sort(self) -> str:
+        return resolve_product_sort(
+            self.request.GET.get("sort", ""), searching=bool(self.get_search())
+        )
+
+    def get_queryset(self) -> "QuerySet[Product]":
+        queryset: QuerySet[Product] = super().get_queryset()  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+        queryset = queryset.only(*PRODUCT_LIST_FIELDS)
+
+        grade: str | None = self.request.GET.get("grade")
+        if grade in NutritionGrade.values:
+            queryset = queryset.filter(nutrition_grade=grade)
+
+        search = self.get_search()
+        if search:
+            queryset = search_products(queryset, search)
+
+        return queryset
+
+    def paginate_queryset(
+        self,
+        queryset: "QuerySet[Product]",
+        page_size: int,
+    ) -> KeysetPage:
+        sort = self.get_sort()
+        return paginate_products(
+            queryset,
+            PRODUCT_LIST_ORDERINGS[sort],
+            self.request.GET.get("cursor"),
+            salt=f"products.list:{sort}",
+            page_size=page_size,
         )
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context: dict[str, Any] = super().get_context_data(**kwargs)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
-        context["macronutrients_api_url"] = reverse_lazy(
-            "api-1.0.0:get_macronutrients_form_data"
-        )
+        context["nutrition_grades"] = NutritionGrade.values
+        context["current_grade"] = self.request.GET.get("grade", "")
+        context["current_sort"] = self.get_sort()
+        context["search"] = self.request.GET.get("q", "")
+        context["notifications_ws_path"] = NOTIFICATIONS_WS_PATH
+
+        page: KeysetPage = context["page_obj"]
+        if page.next_cursor:
+            query = self.request.GET.copy()
+            query["cursor"] = page.next_cursor
+            context["next_page_query"] = query.urlencode()
         return context
 
 
-class ProductEditView(UpdateView):
-    model = Product
-    form_class = ProductForm
-    success_url = reverse_lazy("list_products")
+class ProductFormAsyncView(View, ABC):
+    """
+    Async product form (create and edit pages), subclasses provide its data.
 
-    def get_form(
-        self,
-        data=None,  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
-        files=None,  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
-        extra_data: dict[str, Any] | None = None,
-        **kwargs: Any,  # https://adamj.eu/tech/2021/05/11/python-type-hints-args-and-kwargs/
-    ) -> form_class:
-        reset: bool = self.request.GET.get("reset") == "1"
-        product_instance: Product | None = kwargs.get("instance")
-        if product_instance is None:
-            msg = "Product instance is required to edit a product."
-            raise ValueError(msg)
+    The Open Food Facts fetch and the prefill reads are awaited: a page
+    waiting for Open Food Facts holds no worker thread. Building, validating
+    and saving the form stay synchronous (stored amounts, image download):
+    each is one ``sync_to_async`` call.
+    """
 
-        fetched_product: OFFProductSchema | None = None
-        if reset:
-            fetched_product = fetch_product(query_barcode=product_instance.barcode)
+    template_name = "products/product_form.html"
+    success_url = reverse_lazy("list_products")
 
-        initial, extra_data = prepare_product_form_data(
-            product_instance=product_instance,
-            fetched_product=fetched_product,
-            extra_data=extra_data,
-        )
+    async def get_product(self) -> Product | None:
+        return None
+
+    @abstractmethod
+    async def get_form_data(
+        self, product: Product | None
+    ) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        """Return the ``initial`` and ``extra_data`` of the form."""
 
-        return self.form_class(
+    async def get_form(
+        self,
+        product: Product | None,
+        data: Any = None,
+        files: Any = None,
+    ) -> ProductForm:
+        initial, extra_data = await self.get_form_data(product)
+        return await sync_to_async(ProductForm)(
             data=data,
             files=files,
             initial=initial,
             extra_data=extra_data,
-            **kwargs,
+            instance=product,
         )
 
-    def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
-        context: dict[str, Any] = super().get_context_data(**kwargs)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
-        context["macronutrients_api_url"] = reverse_lazy(
-            "api-1.0.0:get_macronutrients_form_data"
+    def render_form(self, form: ProductForm, product: Product | None) -> HttpResponse:
+        context: dict[str, Any] = {
+            "view": self,
+            "form": form,
+            "macronutrients_api_url": reverse_lazy(
+                "api-1.0.0:get_macronutrients_form_data"
+            ),
+            "macronutrients_ws_path": MACRONUTRIENTS_CHART_PATH,
+        }
+        if product is not None:
+            context["object"] = context["product"] = product
+        return TemplateResponse(self.request, self.template_name, context)
+
+    async def get(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        product = await self.get_product()
+        return self.render_form(await self.get_form(product), product)
+
+    async def post(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        product = await self.get_product()
+        form = await self.get_form(product, data=request.POST, files=request.FILES)
+        if await sync_to_async(_save_if_valid)(form):
+            return HttpResponseRedirect(self.success_url)
+        return self.render_form(form, product)
+
+
+class ProductCreateAsyncView(ProductFormAsyncView):
+    @override
+    async def get_form_data(
+        self, product: Product | None
+    ) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        barcode: str | None = self.request.GET.get("barcode")
+        if not barcode:
+            return {}, None
+        fetched_product = await afetch_product(query_barcode=barcode)
+        return await aprepare_product_form_data(fetched_product=fetched_product)
+
+
+# Revalidated with the product ETag on every use, never shared (CSRF token).
+# The product is loaded by the async ORM first, the (synchronous) validators
+# of product_form_condition only read it.
+@method_decorator(cache_control(private=True, no_cache=True), name="get")
+@method_decorator(preload_conditional_product, name="get")
+@method_decorator(product_form_condition, name="get")
+class ProductEditAsyncView(ProductFormAsyncView):
+    @override
+    async def get_product(self) -> Product | None:
+        product = await aget_conditional_product(self.request, self.kwargs["pk"])
+        if product is None:
+            raise Http404
+        return product
+
+    @override
+    async def get_form_data(
+        self, product: Product | None
+    ) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        if product is None:
+            msg = "Product instance is required to edit a product."
+            raise ValueError(msg)
+        fetched_product: OFFProductSchema | None = None
+        if self.request.GET.get("reset") == "1":
+            fetched_product = await afetch_product(query_barcode=product.barcode)
+        return await aprepare_product_form_data(
+            product_instance=product, fetched_product=fetched_product
         )
-        return context
 
 
+def _save_if_valid(form: ProductForm) -> bool:
+    if not form.is_valid():
+        return False
+    form.save()
+    return True
+
+
+# Opts in to request-level atomicity: the lookup and the cascade delete
+# commit together (no outbound call in this view).
+@method_decorator(transaction.atomic, name="post")
 class ProductDeleteView(DeleteView):
     model = Product
     success_url = reverse_lazy("list_products")
 
 
+class ProductBulkUploadView(FormView):
+    form_class = ProductBulkUploadForm
+    template_name = "products/product_bulk_upload.html"
+
+    def form_valid(self, form: ProductBulkUploadForm) -> HttpResponse:
+        # The import runs in a Celery task, its progress is pushed to the page.
+        task_id: str = start_bulk_upload(
+            form.cleaned_data["file"], self.request.session
+        )
+        context: dict[str, Any] = self.get_context_data(  # pyright: ignore[reportUnknownMemberType]
+            form=self.get_form(),  # pyright: ignore[reportUnknownMemberType]
+            task_id=task_id,
+            status_url=reverse(
+                "api-1.0.0:get_bulk_upload_status", kwargs={"task_id": task_id}
+            ),
+            notifications_ws_path=NOTIFICATIONS_WS_PATH,
+        )
+        return self.render_to_response(context)  # pyright: ignore[reportUnknownMemberType]
+
+
 # Utilities
 
 
-def prepare_product_form_data(
-    product_instance: Product | None = None,
-    fetched_product: OFFProductSchema | None = None,
-    extra_data: dict[str, Any] | None = None,
-) -> tuple[dict[str, Any], dict[str, Any]]:
-    """
-    Prepare `initial` and `extra_data` for Product form.
+async def _areference_names() -> frozenset[str]:
+    # A cache lookup once loaded (products.catalog)
+    return await sync_to_async(get_ingredient_reference_names)()
 
-    :param product_instance: Product from DB (for Edit)
-    :param fetched_product: OFFProductSchema from API (for Create or Edit reset)
-    :param reset: whether to force fetch_product even on Edit
-    :param extra_data: existing extra_data dict
-    :return: tuple(initial, extra_data)
-    """
+
+def _product_form_data(
+    product_instance: Product | None,
+    fetched_product: OFFProductSchema | None,
+    extra_data: dict[str, Any] | None,
+    reference_names: frozenset[str],
+    ingredient_roots: list[dict[str, Any]],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Build ``prepare_product_form_data`` from its loaded rows."""
     initial: dict[str, Any] = {}
     extra_data = extra_data or {}
 
@@ -141,10 +314,6 @@ def prepare_product_form_data(
         # Ingredients from fetched_product
         extra_data["ingredients"] = fetched_product.ingredients
         if fetched_product.ingredients:
-            reference_names = {
-                name.lower()
-                for name in IngredientRef.objects.values_list("name", flat=True)
-            }
             extra_data["ingredients_json"] = json.dumps(
                 [
                     build_ingredient_json_from_schema(ingredient, reference_names)
@@ -152,16 +321,59 @@ def prepare_product_form_data(
                 ]
             )
     elif product_instance is not None:
-        # Edit normal (no reset) → ingredients from DB
-        ingredients: list[OFFIngredientSchema] = get_schema_from_ingredients(
-            product_instance
-        )
-        extra_data["ingredients"] = ingredients
-        extra_data["ingredients_json"] = json.dumps(
-            [ingredient.model_dump(by_alias=False) for ingredient in ingredients]
+        # Edit normal (no reset) → ingredients from DB, loaded lazily: only the
+        # roots are embedded, the table fetches children when a node is
+        # expanded. No "ingredients" schema: saving keeps the stored tree.
+        extra_data["ingredients_json"] = json.dumps(ingredient_roots)
+        extra_data["ingredients_url"] = reverse(
+            "api-1.0.0:get_stored_product_ingredients",
+            kwargs={"barcode": product_instance.barcode},
         )
     else:
         msg = "Either product_instance or fetched_product must be provided"
         raise ValueError(msg)
 
     return initial, extra_data
+
+
+def prepare_product_form_data(
+    product_instance: Product | None = None,
+    fetched_product: OFFProductSchema | None = None,
+    extra_data: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Prepare `initial` and `extra_data` for Product form.
+
+    :param product_instance: Product from DB (for Edit)
+    :param fetched_product: OFFProductSchema from API (for Create or Edit reset)
+    :param extra_data: existing extra_data dict
+    :return: tuple(initial, extra_data)
+    """
+    reference_names: frozenset[str] = frozenset()
+    ingredient_roots: list[dict[str, Any]] = []
+    if fetched_product is not None:
+        if fetched_product.ingredients:
+            reference_names = get_ingredient_reference_names()
+    elif product_instance is not None:
+        ingredient_roots = ingredient_level(product_instance.barcode, None)
+    return _product_form_data(
+        product_instance, fetched_product, extra_data, reference_names, ingredient_roots
+    )
+
+
+async def aprepare_product_form_data(
+    product_instance: Product | None = None,
+    fetched_product: OFFProductSchema | None = None,
+    extra_data: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Async ``prepare_product_form_data``: same result, async ORM reads."""
+    reference_names: frozenset[str] = frozenset()
+    ingredient_roots: list[dict[str, Any]] = []
+    if fetched_product is not None:
+        if fetched_product.ingredients:
+            reference_names = await _areference_names()
+    elif product_instance is not None:
+        ingredient_roots = await aingredient_level(product_instance.barcode, None)
+    return _product_form_data(
+        product_instance, fetched_product, extra_data, reference_names, ingredient_roots
+    )
@@ -0,0 +1,84 @@
+"""
+WebSocket channel streaming macronutrients chart data to the product form.
+
+The client sends the plot inputs of the form as a JSON object (field name ->
+value) on every change. Rapid updates are coalesced: only the latest payload
+received during ``COALESCE_DELAY`` is validated and answered, so typing in a
+field costs one message per burst instead of one request per keystroke.
+"""
+
+import asyncio
+import json
+from typing import Any
+from typing import Final
+
+from pydantic import ValidationError
+
+from products.openfoodfacts.schema import MacronutrientsFormSchema
+
+MACRONUTRIENTS_CHART_PATH: Final = "/ws/products/macronutrients/"
+
+# Seconds to wait for more updates before answering the latest one.
+COALESCE_DELAY: Final = 0.05
+
+TOTAL_PERCENTAGE: Final = 100.0
+
+
+def build_macronutrients_chart_data(
+    macronutrients: MacronutrientsFormSchema,
+) -> dict[str, Any]:
+    """Return macronutrient values and the remaining share ("others")."""
+    values = macronutrients.dict()
+    used = sum(
+        values[name] or 0.0 for name in ("fat", "carbohydrates", "fiber", "proteins")
+    )
+    return {
+        "macronutrients": values,
+        "others": max(TOTAL_PERCENTAGE - used, 0.0),
+    }
+
+
+def build_macronutrients_chart_message(text: str) -> str:
+    """Validate a client payload and return the JSON message to send back."""
+    try:
+        macronutrients = MacronutrientsFormSchema.model_validate_json(text)
+    except ValidationError as e:
+        return json.dumps({"errors": json.loads(e.json(include_url=False))})
+    return json.dumps(build_macronutrients_chart_data(macronutrients))
+
+
+async def macronutrients_chart_application(scope, receive, send):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType, reportUnusedParameter]
+    latest_text: str | None = None
+    pending = asyncio.Event()
+
+    async def flush() -> None:
+        nonlocal latest_text
+        while True:
+            await pending.wait()
+            await asyncio.sleep(COALESCE_DELAY)
+            pending.clear()
+            text, latest_text = latest_text, None
+            if text is not None:
+                await send(
+                    {
+                        "type": "websocket.send",
+                        "text": build_macronutrients_chart_message(text),
+                    }
+                )
+
+    flusher = asyncio.create_task(flush())
+    try:
+        while True:
+            event = await receive()
+
+            if event["type"] == "websocket.connect":
+                await send({"type": "websocket.accept"})
+
+            if event["type"] == "websocket.disconnect":
+                break
+
+            if event["type"] == "websocket.receive" and event.get("text"):
+                latest_text = event["text"]
+                pending.set()
+    finally:
+        flusher.cancel()
@@ -0,0 +1,221 @@
+"""
+Batch writes of whole product documents (``ProductDocumentSchema``).
+
+A batch is validated item by item (schema), then all at once with the
+vectorized checks of the spreadsheet importer (EAN-13, nutrient ranges).
+Valid documents are written in one transaction with set-based statements:
+the importer upserts for products and macronutrient amounts, then one
+``INSERT`` per ingredient tree level. The cost of a batch depends on its
+depth, not on its number of products.
+
+A document replaces the stored product: missing description, energy,
+macronutrients or ingredients clear the stored values. Images are not
+fetched.
+"""
+
+from collections import Counter
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Final
+
+from django.db import transaction
+from pydantic import ValidationError
+
+from config.lazy_imports import lazy_import
+
+from .base_schema import ProductDocumentSchema
+from .base_schema import ProductIngredientSchema
+from .bulk_upload import FIRST_DATA_ROW
+from .bulk_upload import MACRONUTRIENT_COLUMNS
+from .bulk_upload import upsert_products
+from .bulk_upload import validate_sheet
+from .models import Ingredient
+from .models import IngredientRef
+from .models import Product
+from .search import update_search_vectors
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+PRODUCT_BATCH_MAX: Final = 5000
+
+# (barcode, parent ingredient, schema node) of one tree level
+_IngredientLevel = list[tuple[str, Ingredient | None, ProductIngredientSchema]]
+
+
+def _duplicate_ingredients(
+    nodes: list[ProductIngredientSchema], path: str = ""
+) -> list[str]:
+    """Names appearing twice among siblings (unique in the database)."""
+    counts = Counter(node.name for node in nodes)
+    duplicates = [f"{path}{name}" for name, count in counts.items() if count > 1]
+    for node in nodes:
+        if node.ingredients:
+            duplicates += _duplicate_ingredients(
+                node.ingredients, f"{path}{node.name} > "
+            )
+    return duplicates
+
+
+def _validate_documents(
+    items: list[dict[str, Any]],
+) -> tuple[
+    dict[int, ProductDocumentSchema], "pd.DataFrame", dict[int, list[dict[str, str]]]
+]:
+    """
+    Validate a batch, item by item then as a whole.
+
+    :return: the valid documents by item index, their rows as validated by
+        ``validate_sheet`` (ready for ``upsert_products``) and the errors by
+        item index
+    """
+    documents: dict[int, ProductDocumentSchema] = {}
+    errors: dict[int, list[dict[str, str]]] = {}
+    for index, item in enumerate(items):
+        try:
+            document = ProductDocumentSchema.model_validate(item)
+        except ValidationError as e:
+            errors[index] = [
+                {
+                    "field": ".".join(str(part) for part in error["loc"]),
+                    "message": error["msg"],
+                }
+                for error in e.errors(include_url=False)
+            ]
+            continue
+        duplicates = _duplicate_ingredients(document.ingredients or [])
+        if duplicates:
+            errors[index] = [
+                {"field": "ingredients", "message": f"Duplicate ingredient {name!r}."}
+                for name in duplicates
+            ]
+            continue
+        documents[index] = document
+
+    # Same checks as spreadsheets, on the whole batch at once: documents are
+    # laid out as the text cells of a sheet.
+    indexes = list(documents)
+    sheet = pd.DataFrame.from_records(
+        [
+            {
+                "barcode": document.barcode,
+                "name": document.name,
+                "description": document.description or "",
+                "energy": "" if document.energy is None else str(document.energy),
+                **{
+                    name: "" if amount is None else str(amount)
+                    for name, amount in (
+                        document.macronutrients.model_dump()
+                        if document.macronutrients
+                        else {}
+                    ).items()
+                },
+            }
+            for document in documents.values()
+        ],
+        columns=["barcode", "name", "description", "energy", *MACRONUTRIENT_COLUMNS],
+    ).fillna("")
+    valid, sheet_errors = validate_sheet(sheet)
+    for error in sheet_errors:
+        index = indexes[error["row"] - FIRST_DATA_ROW]
+        documents.pop(index, None)
+        errors.setdefault(index, []).append(
+            {"field": error["column"], "message": error["message"]}
+        )
+    return documents, valid, errors
+
+
+def _write_ingredient_trees(
+    trees: dict[str, list[ProductIngredientSchema]],
+) -> None:
+    """Replace the ingredients of the given products, one INSERT per level."""
+    Ingredient.objects.filter(product_id__in=list(trees)).delete()
+
+    names: set[str] = set()
+    pending = [node for nodes in trees.values() for node in nodes]
+    while pending:
+        node = pending.pop()
+        names.add(node.name.strip())
+        pending += node.ingredients or []
+    references = dict(
+        IngredientRef.objects.filter(name__in=names).values_list("name", "id")
+    )
+
+    level: _IngredientLevel = [
+        (barcode, None, node) for barcode, nodes in trees.items() for node in nodes
+    ]
+    while level:
+        created = Ingredient.objects.bulk_create(
+            [
+                Ingredient(
+                    product_id=barcode,
+                    parent=parent,
+                    name=node.name,
+                    percentage=node.percentage,
+                    reference_id=references.get(node.name.strip()),
+                )
+                for barcode, parent, node in level
+            ]
+        )
+        level = [
+            (barcode, ingredient, child)
+            for (barcode, _parent, node), ingredient in zip(level, created, strict=True)
+            for child in node.ingredients or []
+        ]
+
+
+def write_products(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Validate and write a batch of product documents in one transaction.
+
+    :return: one result per item, in order: ``index``, ``barcode``, ``status``
+        (``created``, ``updated`` or ``invalid``) and ``errors``
+    """
+    documents, valid, errors = _validate_documents(items)
+
+    existing: set[str] = set()
+    if documents:
+        # The sheet checks reject duplicated barcodes: one row per product
+        barcodes = valid["barcode"].tolist()
+        existing = set(
+            Product.objects.filter(barcode__in=barcodes).values_list(
+                "barcode", flat=True
+            )
+        )
+        with transaction.atomic():
+            upsert_products(valid, chunk_size=len(valid))
+            _write_ingredient_trees(
+                {
+                    document.barcode.strip(): document.ingredients or []
+                    for document in documents.values()
+                }
+            )
+            # Vectors were refreshed by the upsert, before the ingredients
+            update_search_vectors(barcodes)
+
+    results: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        document = documents.get(index)
+        if document is None:
+            results.append(
+                {
+                    "index": index,
+                    "barcode": item.get("barcode"),
+                    "status": "invalid",
+                    "errors": errors.get(index, []),
+                }
+            )
+        else:
+            results.append(
+                {
+                    "index": index,
+                    "barcode": document.barcode.strip(),
+                    "status": "updated"
+                    if document.barcode.strip() in existing
+                    else "created",
+                    "errors": [],
+                }
+            )
+    return results